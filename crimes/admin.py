@@ -11,6 +11,7 @@ from .models import (
     CaseStatusHistory,
     CaseAssignment,
     AuditLog,
+    AuditArchive,
 )
 
 
@@ -107,4 +108,30 @@ class CaseAssignmentAdmin(admin.ModelAdmin):
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
     list_display = ("id", "timestamp", "user", "action", "entity_type", "entity_id")
-    search_fields = ("action", "entity_type", "entity_id")
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    ordering = ("-timestamp", "-id")
+    # Counting every row of the audit table on each page view is too slow.
+    show_full_result_count = False
+    search_fields = ("action",)
+    search_help_text = 'An exact action, or "Type:id" (e.g. "Case:42") for one entity.'
+
+    def get_search_results(self, request, queryset, search_term):
+        """Exact matches only, so searches use the composite indexes."""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        entity_type, sep, entity_id = term.partition(":")
+        if sep:
+            queryset = queryset.filter(
+                entity_type=entity_type.strip(), entity_id=entity_id.strip()
+            )
+        else:
+            queryset = queryset.filter(action=term)
+        return queryset, False
+
+
+@admin.register(AuditArchive)
+class AuditArchiveAdmin(admin.ModelAdmin):
+    list_display = ("month", "rows", "path", "archived_at")
+    readonly_fields = ("month", "rows", "path", "sha256", "archived_at")
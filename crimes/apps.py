@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, pre_migrate
 
 
 class CrimesConfig(AppConfig):
@@ -6,4 +7,7 @@ class CrimesConfig(AppConfig):
     name = "crimes"
 
     def ready(self):  # pragma: no cover
-        from . import signals  # noqa: F401
+        from . import audit_store, signals  # noqa: F401
+
+        pre_migrate.connect(audit_store.drop_view, sender=self)
+        post_migrate.connect(audit_store.create_view, sender=self)
@@ -0,0 +1,289 @@
+"""Buffered, transaction-aware AuditLog writer.
+
+Entries recorded inside a transaction are kept in memory and written with a
+single ``bulk_create`` just before the outermost ``audit.atomic()`` block
+commits, so they commit (or roll back) together with the change they
+describe. A rolled-back savepoint drops its entries together with its other
+on-commit hooks. Outside a transaction the entry is written immediately.
+
+Transactions opened with plain ``transaction.atomic`` still work: their
+entries are written from a robust ``transaction.on_commit`` hook instead, so
+a failing write is logged rather than turned into an error for a change
+that has already committed. With ``settings.AUDIT_LOG_BACKGROUND`` (or when
+that write fails) the batch is handed to an in-process queue drained by a
+writer thread, which retries with backoff up to ``AUDIT_LOG_WRITE_ATTEMPTS``
+times. A batch that still cannot be written is dead-lettered: logged and
+appended to a JSON-lines spool file in ``AUDIT_LOG_SPOOL_DIR``. When the
+queue stays full for ``AUDIT_LOG_QUEUE_TIMEOUT`` seconds the committing
+request writes the batch itself (backpressure rather than dropping), and
+spools it if that fails too. The queue is drained on interpreter exit.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+_local = threading.local()
+
+
+def build_entry(user, entity, action, details=""):
+    return AuditLog(
+        user=user,
+        action=action,
+        entity_type=entity.__class__.__name__,
+        entity_id=str(getattr(entity, "pk", "")),
+        details=details,
+    )
+
+
+def record(entry, using=DEFAULT_DB_ALIAS):
+    record_many([entry], using=using)
+
+
+def record_many(entries, using=DEFAULT_DB_ALIAS):
+    """Queue ``entries`` for writing before the current transaction commits."""
+    if not entries:
+        return
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        _write(entries, using)
+        return
+    _buffer_for(connection).entries.extend(entries)
+
+
+@contextmanager
+def atomic(using=DEFAULT_DB_ALIAS):
+    """``transaction.atomic`` that writes the buffered entries inside it.
+
+    Only the outermost ``audit.atomic()`` block flushes, so nested service
+    calls still share one ``bulk_create``.
+    """
+    depths = _local.__dict__.setdefault("depths", {})
+    depths[using] = depths.get(using, 0) + 1
+    try:
+        with transaction.atomic(using=using):
+            yield
+            if depths[using] == 1:
+                flush(using)
+    finally:
+        depths[using] -= 1
+
+
+def flush(using=DEFAULT_DB_ALIAS):
+    """Write the entries buffered so far in the current transaction."""
+    entries = []
+    for buf in list(_buffers().values()):
+        if buf.using == using:
+            entries.extend(buf.take())
+    if entries:
+        _write(entries, using)
+
+
+class _Buffer:
+    def __init__(self, using):
+        self.using = using
+        self.entries = []
+
+    def take(self):
+        entries, self.entries = self.entries, []
+        return entries
+
+    def flush(self):
+        # Fallback for transactions not wrapped in audit.atomic(): by now
+        # the change has committed, so the entries must not be lost.
+        entries = self.take()
+        if not entries:
+            return
+        if getattr(settings, "AUDIT_LOG_BACKGROUND", False):
+            _background_writer().submit(entries, self.using)
+            return
+        try:
+            _write(entries, self.using)
+        except Exception:
+            logger.exception(
+                "Audit log write after commit failed (%d entries); retrying",
+                len(entries),
+            )
+            _background_writer().submit(entries, self.using)
+
+
+def _buffers():
+    # Live buffers of this thread, keyed by (alias, savepoint stack). Only
+    # the buffer's on-commit hook holds it, so when Django discards the hook
+    # (its savepoint or transaction rolled back, or it ran) the buffer and
+    # its entries go too.
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = weakref.WeakValueDictionary()
+    return buffers
+
+
+def _buffer_for(connection):
+    buffers = _buffers()
+    key = (connection.alias, tuple(connection.savepoint_ids))
+    buf = buffers.get(key)
+    if buf is not None:
+        return buf
+    buf = _Buffer(connection.alias)
+    buffers[key] = buf
+    transaction.on_commit(buf.flush, using=connection.alias, robust=True)
+    return buf
+
+
+def _write(entries, using):
+    AuditLog.objects.using(using).bulk_create(entries, batch_size=BATCH_SIZE)
+
+
+_spool_lock = threading.Lock()
+
+
+def _spool_dir():
+    return getattr(settings, "AUDIT_LOG_SPOOL_DIR", None) or os.path.join(
+        settings.BASE_DIR, "audit_spool"
+    )
+
+
+def _dead_letter(entries, using):
+    """Log ``entries`` and append them to this process's spool file."""
+    logger.error(
+        "Audit log write abandoned (%d entries); spooling to %s",
+        len(entries),
+        _spool_dir(),
+    )
+    spooled_at = timezone.now().isoformat()
+    lines = [
+        json.dumps(
+            {
+                "database": using,
+                "spooled_at": spooled_at,
+                "user_id": entry.user_id,
+                "action": entry.action,
+                "entity_type": entry.entity_type,
+                "entity_id": entry.entity_id,
+                "details": entry.details,
+            },
+            separators=(",", ":"),
+        )
+        + "\n"
+        for entry in entries
+    ]
+    directory = _spool_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"auditlog-{os.getpid()}.jsonl")
+    with _spool_lock, open(path, "a", encoding="utf-8") as fh:
+        fh.writelines(lines)
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+class _BackgroundWriter:
+    def __init__(self, maxsize, put_timeout):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.put_timeout = put_timeout
+        self.thread = threading.Thread(
+            target=self._run, name="audit-log-writer", daemon=True
+        )
+        self.thread.start()
+        atexit.register(self.drain)
+
+    def submit(self, entries, using):
+        try:
+            self.queue.put((entries, using), timeout=self.put_timeout)
+            return
+        except queue.Full:
+            pass
+        # Backpressure: the writer cannot keep up, so the producer pays --
+        # and if it cannot write either, the entries are spooled.
+        try:
+            _write(entries, using)
+        except Exception:
+            logger.exception("Audit log write failed (%d entries)", len(entries))
+            _dead_letter(entries, using)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        by_alias = {}
+        for entries, using in batch:
+            by_alias.setdefault(using, []).append(entries)
+        for using, parts in by_alias.items():
+            entries = [entry for part in parts for entry in part]
+            if self._retry(entries, using):
+                continue
+            # One bad submission must not take the others down with it.
+            for part in parts:
+                try:
+                    _write(part, using)
+                except Exception:
+                    _dead_letter(part, using)
+        for _ in batch:
+            self.queue.task_done()
+
+    def _retry(self, entries, using):
+        """Write ``entries``, backing off up to 30s; False when out of attempts."""
+        attempts = getattr(settings, "AUDIT_LOG_WRITE_ATTEMPTS", 10)
+        for attempt in range(attempts):
+            try:
+                _write(entries, using)
+                return True
+            except Exception:
+                logger.exception(
+                    "Audit log write failed (%d entries, attempt %d of %d)",
+                    len(entries),
+                    attempt + 1,
+                    attempts,
+                )
+                connections[using].close()
+                if attempt + 1 < attempts:
+                    time.sleep(min(2**attempt, 30))
+        return False
+
+    def drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write_batch(batch)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _background_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = _BackgroundWriter(
+                    maxsize=getattr(settings, "AUDIT_LOG_QUEUE_SIZE", 10000),
+                    put_timeout=getattr(settings, "AUDIT_LOG_QUEUE_TIMEOUT", 0.05),
+                )
+    return _writer
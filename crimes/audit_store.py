@@ -0,0 +1,471 @@
+"""Month-partitioned ``AuditLog`` storage, with compressed archives.
+
+Audit rows are kept in one partition per calendar month (UTC):
+
+* on PostgreSQL ``crimes_auditlog`` is partitioned by range of ``timestamp``
+  (migration 0015). The ORM reads through the parent table, and filters on
+  ``timestamp`` only scan the months they cover. ``partition`` creates the
+  coming months' partitions ahead of time; rows that arrive for a month
+  without one land in ``crimes_auditlog_default`` and are moved out when
+  that month's partition is created;
+* on SQLite ``crimes_auditlog`` is the current month only. ``partition``
+  rolls every earlier month into its own ``crimes_auditlog_pYYYYMM`` table,
+  created from the table's own DDL (same primary key, foreign key and
+  indexes). ``AuditLog.objects`` (and so the admin and related lookups)
+  selects through ``crimes_auditlog_all`` there, so it still sees every
+  month. Rolled rows are read-only through the ORM, except that deleting a
+  user clears their ``user_id`` in every month (``forget_users``).
+
+``crimes_auditlog_all`` (the ``AuditTrail`` model) reads every month still
+in the database: on SQLite a ``UNION ALL`` view, rebuilt here whenever a
+month is rolled, archived or restored. It is dropped before ``migrate`` and
+created again afterwards (``drop_view`` and ``create_view``), so migrations
+never see it. Each branch is ordered by the same
+indexes, so ordered, limited queries on it merge the months instead of
+sorting them.
+
+Months older than ``AUDIT_LOG_RETENTION_MONTHS`` are archived: the
+partition is detached (PostgreSQL), written to
+``AUDIT_ARCHIVE_DIR/auditlog-YYYY-MM.jsonl.gz`` with one JSON object per
+row, recorded in ``AuditArchive`` with its row count and checksum, and only
+then dropped. The file is written beside the old one and renamed into
+place once that transaction commits. A crash before the commit leaves the
+rows in the database and the previous file in place, and the next run
+archives them again. Rows that reappear for an archived month
+(late or restored) are merged into its file when it is archived again.
+
+Archives stay queryable: ``search`` scans the files of the months a query
+covers, and ``restore`` loads a month back into a partition.
+``manage.py audit_log`` runs all of these.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from datetime import date, datetime, time as dt_time, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditArchive, AuditLog, AuditTrail
+
+TABLE = AuditLog._meta.db_table
+VIEW = AuditTrail._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+PREFIX = f"{TABLE}_p"
+COLUMNS = (
+    "id",
+    "timestamp",
+    "user_id",
+    "action",
+    "entity_type",
+    "entity_id",
+    "details",
+)
+FILTERS = ("user_id", "action", "entity_type", "entity_id")
+CHUNK_SIZE = 5000
+
+
+def _columns(names=COLUMNS):
+    return ", ".join(f'"{name}"' for name in names)
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """``[start, end)`` datetimes of ``month``."""
+    return (
+        datetime.combine(month, dt_time.min, tzinfo=dt_timezone.utc),
+        datetime.combine(add_months(month, 1), dt_time.min, tzinfo=dt_timezone.utc),
+    )
+
+
+def partition_name(month):
+    return f"{PREFIX}{month:%Y%m}"
+
+
+def _current_month(now=None):
+    return month_start((now or timezone.now()).astimezone(dt_timezone.utc))
+
+
+def _retention():
+    return getattr(settings, "AUDIT_LOG_RETENTION_MONTHS", 12)
+
+
+def _archive_dir():
+    return getattr(settings, "AUDIT_ARCHIVE_DIR", None) or os.path.join(
+        settings.BASE_DIR, "audit_archive"
+    )
+
+
+def partitions(using="default"):
+    """``{month: table}`` of the monthly partitions (rolled tables on SQLite)."""
+    found = {}
+    for name in connections[using].introspection.table_names():
+        suffix = name[len(PREFIX) :]
+        if name.startswith(PREFIX) and len(suffix) == 6 and suffix.isdigit():
+            found[date(int(suffix[:4]), int(suffix[4:]), 1)] = name
+    return dict(sorted(found.items()))
+
+
+def _params(connection, *values):
+    return [connection.ops.adapt_datetimefield_value(value) for value in values]
+
+
+def _oldest(cursor, connection, table, before=None):
+    """Month of the oldest row in ``table`` (before ``before``), or None."""
+    sql = f'SELECT MIN("timestamp") FROM {table}'
+    params = []
+    if before is not None:
+        sql += ' WHERE "timestamp" < %s'
+        params = _params(connection, before)
+    cursor.execute(sql, params)
+    value = cursor.fetchone()[0]
+    return value and month_start(_timestamp(value))
+
+
+def _attach(cursor, connection, month):
+    """Create and attach ``month``'s partition, taking its rows from the default."""
+    name = partition_name(month)
+    start, end = month_bounds(month)
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} (LIKE {TABLE} INCLUDING DEFAULTS)"
+    )
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f'WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+        f"INSERT INTO {name} SELECT * FROM moved",
+        _params(connection, start, end),
+    )
+    cursor.execute(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def _clone_ddl(cursor, name):
+    """The SQLite table's CREATE TABLE and CREATE INDEX statements, for ``name``."""
+    cursor.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE tbl_name = %s AND sql IS NOT NULL ORDER BY type = 'index'",
+        [TABLE],
+    )
+    statements = []
+    for kind, index, sql in cursor.fetchall():
+        if kind == "table":
+            sql = sql.replace(f'"{TABLE}"', f'"{name}"', 1)
+        else:
+            head, on, tail = sql.partition(f' ON "{TABLE}" ')
+            head = head.replace(f'"{index}"', f'"{name}_{index}"', 1)
+            sql = f'{head} ON "{name}" {tail}'
+        statements.append(sql)
+    return statements
+
+
+def _roll(cursor, connection, month):
+    """Move ``month``'s rows out of the SQLite table into their own table."""
+    name = partition_name(month)
+    if name not in connection.introspection.table_names(cursor):
+        for sql in _clone_ddl(cursor, name):
+            cursor.execute(sql)
+    where = '"timestamp" >= %s AND "timestamp" < %s'
+    params = _params(connection, *month_bounds(month))
+    cursor.execute(
+        f"INSERT INTO {name} ({_columns()}) "
+        f"SELECT {_columns()} FROM {TABLE} WHERE {where}",
+        params,
+    )
+    cursor.execute(f"DELETE FROM {TABLE} WHERE {where}", params)
+
+
+def forget_users(user_ids, using="default"):
+    """Clear ``user_id`` for ``user_ids`` in the rolled SQLite months.
+
+    ``SET_NULL`` only reaches the current table; a ``pre_delete`` receiver
+    in ``signals.py`` calls this for the rest. On PostgreSQL the foreign key
+    of the partitioned table already covers every month.
+    """
+    connection = connections[using]
+    if connection.vendor == "postgresql" or not user_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    with connection.cursor() as cursor:
+        for table in partitions(using).values():
+            cursor.execute(
+                f"UPDATE {table} SET user_id = NULL WHERE user_id IN ({placeholders})",
+                list(user_ids),
+            )
+
+
+def _rebuild_view(cursor, using):
+    """Point the view at the table and (on SQLite) every rolled month."""
+    tables = [TABLE]
+    if connections[using].vendor != "postgresql":
+        tables += reversed(partitions(using).values())
+    union = " UNION ALL ".join(f"SELECT {_columns()} FROM {t}" for t in tables)
+    cursor.execute(f"DROP VIEW IF EXISTS {VIEW}")
+    cursor.execute(f"CREATE VIEW {VIEW} AS {union}")
+
+
+def drop_view(using="default", **kwargs):
+    """``pre_migrate``: drop the view, so migrations can rebuild the table.
+
+    SQLite remakes a table by creating a copy, dropping the original and
+    renaming the copy, and the rename fails while a view refers to the
+    dropped table.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DROP VIEW IF EXISTS {VIEW}")
+
+
+def create_view(using="default", **kwargs):
+    """``post_migrate``: create the view again, if the table exists."""
+    connection = connections[using]
+    if TABLE not in connection.introspection.table_names():
+        return
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        _rebuild_view(cursor, using)
+
+
+def _is_attached(cursor, table):
+    cursor.execute("SELECT relispartition FROM pg_class WHERE relname = %s", [table])
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def partition(now=None, using="default"):
+    """Bring partitions up to date; returns the months created or rolled.
+
+    PostgreSQL: partitions for the current month and the next
+    ``AUDIT_LOG_PARTITIONS_AHEAD``, and for any month with rows in the
+    default partition. SQLite: every month before the current one that
+    still has rows in ``crimes_auditlog``.
+    """
+    connection = connections[using]
+    current = _current_month(now)
+    existing = partitions(using)
+    changed = []
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            ahead = getattr(settings, "AUDIT_LOG_PARTITIONS_AHEAD", 2)
+            months = {add_months(current, n) for n in range(ahead + 1)}
+            # Attaching a month moves its rows out of the default partition.
+            while month := _oldest(cursor, connection, DEFAULT_PARTITION):
+                _attach(cursor, connection, month)
+                changed.append(month)
+            for month in sorted(months - set(changed)):
+                if month in existing and _is_attached(cursor, existing[month]):
+                    continue
+                _attach(cursor, connection, month)
+                changed.append(month)
+        else:
+            cutoff = month_bounds(current)[0]
+            while month := _oldest(cursor, connection, TABLE, cutoff):
+                _roll(cursor, connection, month)
+                changed.append(month)
+            if changed:
+                _rebuild_view(cursor, using)
+    return sorted(changed)
+
+
+def _timestamp(value):
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if timezone.is_naive(value):
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value.astimezone(dt_timezone.utc)
+
+
+def _rows(cursor, table):
+    cursor.execute(f'SELECT {_columns()} FROM {table} ORDER BY "timestamp", id')
+    while chunk := cursor.fetchmany(CHUNK_SIZE):
+        for row in chunk:
+            entry = dict(zip(COLUMNS, row))
+            entry["timestamp"] = _timestamp(entry["timestamp"]).isoformat()
+            yield entry
+
+
+def read_archive(archive):
+    """Yield the rows stored in an ``AuditArchive`` file, as dicts."""
+    with gzip.open(archive.path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            yield json.loads(line)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while block := fh.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _write_archive(path, sources):
+    """Write ``sources`` (iterables of row dicts) to a temporary file.
+
+    Returns ``(temporary path, rows)``; the file sits beside ``path``, ready
+    to be renamed over it.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    rows = 0
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as fh:
+                for source in sources:
+                    for entry in source:
+                        fh.write(json.dumps(entry, separators=(",", ":")).encode())
+                        fh.write(b"\n")
+                        rows += 1
+            raw.flush()
+            os.fsync(raw.fileno())
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp, rows
+
+
+def archive(month, using="default"):
+    """Move ``month``'s partition into its archive file; returns the rows moved.
+
+    Returns 0 when the month has no partition (nothing to move).
+    """
+    connection = connections[using]
+    table = partitions(using).get(month)
+    if table is None:
+        return 0
+    if connection.vendor == "postgresql":
+        # Detached first, so rows written meanwhile go to the default
+        # partition instead of into a table about to be dropped.
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            if _is_attached(cursor, table):
+                cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {table}")
+    previous = AuditArchive.objects.using(using).filter(month=month).first()
+    path = os.path.join(_archive_dir(), f"auditlog-{month:%Y-%m}.jsonl.gz")
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        (moved,) = cursor.fetchone()
+        sources = [_rows(cursor, table)]
+        if previous is not None:
+            sources.insert(0, read_archive(previous))
+        tmp, total = _write_archive(path, sources)
+        try:
+            AuditArchive.objects.using(using).update_or_create(
+                month=month,
+                defaults={"path": path, "rows": total, "sha256": _sha256(tmp)},
+            )
+            cursor.execute(f"DROP TABLE {table}")
+            if connection.vendor != "postgresql":
+                _rebuild_view(cursor, using)
+        except BaseException:
+            _remove(tmp)
+            raise
+        # Until the drop commits, the previous file is still the one on record.
+        transaction.on_commit(lambda: os.replace(tmp, path), using=using)
+    return moved
+
+
+def expired(now=None, retention=None, using="default"):
+    """Months with a partition older than the retention window."""
+    keep = _retention() if retention is None else retention
+    cutoff = add_months(_current_month(now), -keep)
+    return [month for month in partitions(using) if month < cutoff]
+
+
+def maintain(now=None, retention=None, using="default"):
+    """``partition`` then ``archive`` every expired month.
+
+    Returns ``(months partitioned, {archived month: rows})``.
+    """
+    changed = partition(now, using)
+    archived = {
+        month: archive(month, using) for month in expired(now, retention, using)
+    }
+    return changed, archived
+
+
+def search(start=None, end=None, using="default", **filters):
+    """Yield archived rows in ``[start, end)`` matching exact ``filters``.
+
+    ``filters`` are any of ``user_id``, ``action``, ``entity_type`` and
+    ``entity_id``. Only the archives of the months in range are read; rows
+    come back as dicts with ``timestamp`` as a datetime.
+    """
+    unknown = set(filters) - set(FILTERS)
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+    if "entity_id" in filters:
+        filters["entity_id"] = str(filters["entity_id"])
+    archives = AuditArchive.objects.using(using).order_by("month")
+    if start is not None:
+        archives = archives.filter(month__gte=month_start(_timestamp(start)))
+    if end is not None:
+        archives = archives.filter(month__lt=_timestamp(end).date())
+    for archived in archives:
+        for entry in read_archive(archived):
+            if any(entry[key] != value for key, value in filters.items()):
+                continue
+            entry["timestamp"] = _timestamp(entry["timestamp"])
+            if start is not None and entry["timestamp"] < start:
+                continue
+            if end is not None and entry["timestamp"] >= end:
+                continue
+            yield entry
+
+
+def restore(month, using="default"):
+    """Load an archived month back into its partition; returns the rows loaded.
+
+    The archive's checksum is verified first. The file and its
+    ``AuditArchive`` row are removed once the rows are committed.
+    """
+    connection = connections[using]
+    archived = AuditArchive.objects.using(using).get(month=month)
+    if _sha256(archived.path) != archived.sha256:
+        raise ValueError(f"{archived.path} does not match its recorded checksum")
+    table = partition_name(month)
+    sql = (
+        f"INSERT INTO {table} ({_columns()}) "
+        f"VALUES ({', '.join(['%s'] * len(COLUMNS))})"
+    )
+    loaded = 0
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            if not _is_attached(cursor, table):
+                _attach(cursor, connection, month)
+        elif month not in partitions(using):
+            _roll(cursor, connection, month)
+            _rebuild_view(cursor, using)
+        batch = []
+        for entry in read_archive(archived):
+            ts = _params(connection, _timestamp(entry["timestamp"]))[0]
+            batch.append([ts if key == "timestamp" else entry[key] for key in COLUMNS])
+            if len(batch) >= CHUNK_SIZE:
+                cursor.executemany(sql, batch)
+                loaded += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            loaded += len(batch)
+        archived.delete()
+        transaction.on_commit(lambda: _remove(archived.path), using=using)
+    return loaded
@@ -0,0 +1,101 @@
+"""Per-request authorization context.
+
+``for_request(request)`` builds one ``AuthorizationContext`` per request. The
+first case check loads the ids of every case the user leads or is assigned
+to, in a single query, and keeps them in the cache for
+``AUTHZ_CACHE_TTL`` seconds. Every later check is a set lookup.
+
+The cached ids are dropped when a ``CaseAssignment`` for the user changes or
+the user becomes, or stops being, a case lead (see ``signals.py``). Checks
+against a loaded ``Case`` read the lead from the object itself and never
+from the cached lead ids.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Value
+
+from .models import Case, CaseAssignment
+
+
+def _cache_key(user_id):
+    return f"authz:cases:{user_id}"
+
+
+def load_case_ids(user_id):
+    """(lead case ids, assigned case ids) for ``user_id`` in one query."""
+    leads = Case.objects.filter(lead_investigator_id=user_id).values_list(
+        "pk", Value(True)
+    )
+    assigned = CaseAssignment.objects.filter(user_id=user_id).values_list(
+        "case_id", Value(False)
+    )
+    lead_ids, assigned_ids = set(), set()
+    for case_id, is_lead in leads.union(assigned, all=True):
+        (lead_ids if is_lead else assigned_ids).add(case_id)
+    return frozenset(lead_ids), frozenset(assigned_ids)
+
+
+def forget_user(user_id):
+    """Drop the cached case ids of ``user_id`` once the transaction commits."""
+    if user_id is not None:
+        transaction.on_commit(lambda: cache.delete(_cache_key(user_id)))
+
+
+class AuthorizationContext:
+    def __init__(self, user):
+        self.user = user
+        self.role = getattr(user, "role", None)
+        self._case_ids = None
+
+    @property
+    def case_ids(self):
+        if self._case_ids is None:
+            key = _cache_key(self.user.pk)
+            ids = cache.get(key)
+            if ids is None:
+                ids = load_case_ids(self.user.pk)
+                cache.set(key, ids, getattr(settings, "AUTHZ_CACHE_TTL", 60))
+            self._case_ids = ids
+        return self._case_ids
+
+    @property
+    def lead_case_ids(self):
+        return self.case_ids[0]
+
+    @property
+    def assigned_case_ids(self):
+        return self.case_ids[1]
+
+    def can_modify_case(self, case):
+        """Admins modify any case; investigators those they lead or are assigned to.
+
+        ``case`` may be a ``Case`` or a case id.
+        """
+        if self.role == "admin":
+            return True
+        if self.role != "investigator":
+            return False
+        if isinstance(case, Case):
+            # The object's own lead is authoritative; the cached lead ids may
+            # still list a case this user no longer leads.
+            return (
+                case.lead_investigator_id == self.user.pk
+                or case.pk in self.assigned_case_ids
+            )
+        return case in self.lead_case_ids or case in self.assigned_case_ids
+
+
+def for_request(request):
+    """The request's ``AuthorizationContext``, built on first use.
+
+    Accepts a Django ``HttpRequest`` or a DRF ``Request``; both share the
+    context stored on the underlying ``HttpRequest``.
+    """
+    http_request = getattr(request, "_request", request)
+    context = getattr(http_request, "_authz_context", None)
+    if context is None or context.user.pk != request.user.pk:
+        context = AuthorizationContext(request.user)
+        http_request._authz_context = context
+    return context
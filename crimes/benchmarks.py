@@ -0,0 +1,180 @@
+"""Endpoint benchmarks used by ``manage.py run_benchmarks``.
+
+For each dataset size a throw-away test database is created and filled with
+``crimes.synthetic.generate``. Every endpoint is then requested through the
+Django test client: ``repeat`` timed requests give p50/p95 latency, and one
+extra request, run under ``CaptureQueriesContext`` and ``tracemalloc``,
+gives the SQL query count and peak Python memory. (That request is kept out
+of the timings because tracing slows it down.)
+"""
+
+import json
+import math
+import platform
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import matviews
+from .models import Case, Incident, Person
+from .synthetic import generate, parse_scale
+
+# Latency noise floor: smaller absolute differences never count as regressions.
+MIN_REGRESSION_MS = 2.0
+
+
+def endpoints(sample):
+    """(name, url) pairs to measure; ``sample`` holds ids picked from the data."""
+    return [
+        ("api-incident-list", "/api/incidents/"),
+        ("api-case-list", "/api/cases/"),
+        ("api-case-list-open", "/api/cases/?status=open"),
+        ("api-person-list", "/api/people/"),
+        ("api-case-detail", f"/api/cases/{sample['case']}/"),
+        ("api-case-history", f"/api/cases/{sample['case']}/history/"),
+        ("api-case-summary", "/api/reports/case-summary"),
+        ("html-dashboard", "/dashboard/"),
+        ("html-case-list", "/cases/"),
+        ("html-case-detail", f"/cases/{sample['case']}/"),
+        ("html-case-detail-largest", f"/cases/{sample['largest_case']}/"),
+        ("html-incident-detail", f"/incidents/{sample['incident']}/"),
+        ("html-person-list", "/people/"),
+    ]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(client, url, repeat):
+    client.get(url)  # warm-up: template loading, first-connection costs
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        if hasattr(response, "streaming_content"):
+            for _ in response.streaming_content:
+                pass
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "status": response.status_code,
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "queries": len(ctx.captured_queries),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def pick_sample():
+    largest = (
+        Case.objects.annotate(n=Count("evidence_items"))
+        .order_by("-n")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    return {
+        "case": Case.objects.order_by("pk").values_list("pk", flat=True).first(),
+        "largest_case": largest,
+        "incident": Incident.objects.order_by("pk").values_list("pk", flat=True).first(),
+        "person": Person.objects.order_by("pk").values_list("pk", flat=True).first(),
+    }
+
+
+def run_size(size, repeat=20, seed=0, log=None):
+    """Seed the *current* database with ``size`` incidents and measure."""
+    generate(parse_scale(size), seed=seed, workers=1)
+    for view in matviews.VIEWS.values():
+        view.refresh()
+    User = get_user_model()
+    user, _ = User.objects.get_or_create(
+        username="benchmark_admin",
+        defaults={"role": "admin", "is_staff": True, "is_superuser": True},
+    )
+    client = Client()
+    client.force_login(user)
+    results = {}
+    for name, url in endpoints(pick_sample()):
+        results[name] = measure(client, url, repeat)
+        if log:
+            log(f"{size:>6} {name:<26} {results[name]}")
+    return results
+
+
+def run_suite(sizes, repeat=20, seed=0, log=None):
+    """Run every size in its own freshly created test database."""
+    report = {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "vendor": connection.vendor,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            report["results"][size] = run_size(size, repeat, seed, log)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+    return report
+
+
+def compare(report, baseline, threshold=0.25):
+    """Return human-readable regressions of ``report`` against ``baseline``.
+
+    A query-count increase is always a regression (that is how N+1s show up);
+    latency regresses when p95 grows by more than ``threshold`` and by more
+    than ``MIN_REGRESSION_MS``.
+    """
+    problems = []
+    for size, endpoints_ in report["results"].items():
+        base_size = baseline.get("results", {}).get(size, {})
+        for name, current in endpoints_.items():
+            base = base_size.get(name)
+            if not base:
+                continue
+            if current["queries"] > base["queries"]:
+                problems.append(
+                    f"{size} {name}: queries {base['queries']} -> {current['queries']}"
+                )
+            limit = base["p95_ms"] * (1 + threshold)
+            if (
+                current["p95_ms"] > limit
+                and current["p95_ms"] - base["p95_ms"] > MIN_REGRESSION_MS
+            ):
+                problems.append(
+                    f"{size} {name}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms"
+                )
+    return problems
+
+
+def load(path):
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def dump(report, path):
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+        fh.write("\n")
@@ -0,0 +1,205 @@
+"""Per-status case counts kept in the ``mv_case_counts`` table.
+
+The table is a hand-maintained materialized view of
+``SELECT status, COUNT(*) FROM crimes_case GROUP BY status``. Next to it,
+``mv_case_counts_state`` records the highest ``CaseStatusHistory`` and
+``Case`` ids already folded in, so that a refresh only reads what changed
+since the previous one:
+
+* cases created since then are counted under their initial status, taken
+  from their first history row (its ``old_status``, or ``new_status`` for
+  the row ``escalate_incident`` writes at creation), or their current
+  status if they have none;
+* every other history row written since then moves one case from
+  ``old_status`` to ``new_status``.
+
+Both refresh kinds run in one transaction (``REPEATABLE READ`` on
+PostgreSQL, so the watermarks and the rows they bound come from the same
+snapshot). Readers see the old counts or the new ones, never an empty or
+half-written table. The full refresh replaces the rows in place rather than
+renaming a staging table over the old one: on PostgreSQL a query waiting on
+a dropped table fails instead of reading the new one.
+
+Deleted cases and rows committed out of id order are invisible to the
+incremental refresh, so ``get_counts`` also recounts in full whenever the
+last full refresh (``reconciled_at``) is older than
+``CASE_COUNTS_RECONCILE_INTERVAL`` seconds. Deleting a case resets
+``reconciled_at`` (see ``signals.py``), so the next read after a delete
+recounts and stays exact.
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Case, CaseStatusHistory
+
+TABLE = "mv_case_counts"
+STATE_TABLE = "mv_case_counts_state"
+
+
+@contextmanager
+def _snapshot(using):
+    connection = connections[using]
+    outermost = not connection.in_atomic_block
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if outermost and connection.vendor == "postgresql":
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        yield cursor
+
+
+def _watermarks(using):
+    return (
+        CaseStatusHistory.objects.using(using).aggregate(m=Max("pk"))["m"] or 0,
+        Case.objects.using(using).aggregate(m=Max("pk"))["m"] or 0,
+    )
+
+
+def _read_state(cursor):
+    cursor.execute(
+        "SELECT last_history_id, last_case_id, refreshed_at, reconciled_at "
+        f"FROM {STATE_TABLE} WHERE id = 1"
+    )
+    return cursor.fetchone()
+
+
+def _replace(cursor, using):
+    last_history_id, last_case_id = _watermarks(using)
+    cursor.execute(f"DELETE FROM {TABLE}")
+    cursor.execute(
+        f"INSERT INTO {TABLE}(status, count) "
+        f"SELECT status, COUNT(1) FROM {Case._meta.db_table} GROUP BY status"
+    )
+    cursor.execute(f"DELETE FROM {STATE_TABLE}")
+    now = int(time.time())
+    cursor.execute(
+        f"INSERT INTO {STATE_TABLE}"
+        "(id, last_history_id, last_case_id, refreshed_at, reconciled_at) "
+        "VALUES (1, %s, %s, %s, %s)",
+        [last_history_id, last_case_id, now, now],
+    )
+
+
+def full_refresh(using="default"):
+    """Recount every case and reset the watermarks."""
+    with _snapshot(using) as cursor:
+        _replace(cursor, using)
+
+
+def invalidate(using="default"):
+    """Make the next ``get_counts`` recount in full (e.g. after a delete)."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"UPDATE {STATE_TABLE} SET reconciled_at = 0")
+
+
+def _changes(using, since, until):
+    """Status deltas between two ``(history id, case id)`` watermarks."""
+    delta = Counter()
+    first = CaseStatusHistory.objects.filter(case=OuterRef("pk")).order_by("pk")
+    created = (
+        Case.objects.using(using)
+        .filter(pk__gt=since[1], pk__lte=until[1])
+        .annotate(
+            initial=Coalesce(
+                Subquery(first.values("old_status")[:1]),
+                Subquery(first.values("new_status")[:1]),
+                F("status"),
+            )
+        )
+        .values("initial")
+        .annotate(c=Count("pk"))
+        .order_by()
+    )
+    for row in created:
+        delta[row["initial"]] += row["c"]
+    moves = (
+        CaseStatusHistory.objects.using(using)
+        .filter(pk__gt=since[0], pk__lte=until[0], old_status__isnull=False)
+        .values("old_status", "new_status")
+        .annotate(c=Count("pk"))
+        .order_by()
+    )
+    for row in moves:
+        delta[row["old_status"]] -= row["c"]
+        delta[row["new_status"]] += row["c"]
+    return delta
+
+
+def _apply(cursor, delta):
+    for status, change in sorted(delta.items()):
+        if not change:
+            continue
+        cursor.execute(
+            f"UPDATE {TABLE} SET count = count + %s WHERE status = %s",
+            [change, status],
+        )
+        if cursor.rowcount == 0:
+            cursor.execute(
+                f"INSERT INTO {TABLE}(status, count) VALUES (%s, %s)",
+                [status, change],
+            )
+    cursor.execute(f"DELETE FROM {TABLE} WHERE count = 0")
+
+
+def _serialization_failure(exc):
+    cause = exc.__cause__
+    return "40001" in (getattr(cause, "sqlstate", None), getattr(cause, "pgcode", None))
+
+
+def refresh(using="default"):
+    """Fold in the changes since the last refresh.
+
+    Returns the per-status ``Counter`` of changes applied, or ``None`` if a
+    concurrent refresh claimed the interval first or the table had never
+    been populated (in which case it was fully refreshed instead).
+    """
+    try:
+        with _snapshot(using) as cursor:
+            state = _read_state(cursor)
+            if state is None:
+                _replace(cursor, using)
+                return None
+            since = (state[0], state[1])
+            until = _watermarks(using)
+            # Claim the interval first: a concurrent refresh that read the same
+            # state updates nothing here (or fails to serialize) and backs off.
+            cursor.execute(
+                f"UPDATE {STATE_TABLE} SET last_history_id = %s, last_case_id = %s, "
+                "refreshed_at = %s "
+                "WHERE id = 1 AND last_history_id = %s AND last_case_id = %s",
+                [*until, int(time.time()), *since],
+            )
+            if cursor.rowcount == 0:
+                return None
+            delta = _changes(using, since, until)
+            _apply(cursor, delta)
+    except OperationalError as exc:
+        if _serialization_failure(exc):
+            return None
+        raise
+    return Counter({status: change for status, change in delta.items() if change})
+
+
+def get_counts(max_age=None, using="default"):
+    """``[{"status": ..., "c": ...}]`` ordered by status.
+
+    Recounts in full when the last full refresh is older than
+    ``CASE_COUNTS_RECONCILE_INTERVAL``; otherwise, with ``max_age``
+    (seconds), first catches up incrementally if the last refresh is older
+    than that.
+    """
+    with connections[using].cursor() as cursor:
+        state = _read_state(cursor)
+    reconcile_every = getattr(settings, "CASE_COUNTS_RECONCILE_INTERVAL", 600)
+    if state is None or time.time() - state[3] >= reconcile_every:
+        full_refresh(using)
+    elif max_age is not None and time.time() - state[2] >= max_age:
+        refresh(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"SELECT status, count FROM {TABLE} ORDER BY status")
+        return [{"status": status, "c": count} for status, count in cursor.fetchall()]
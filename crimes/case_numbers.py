@@ -0,0 +1,91 @@
+from django.db import IntegrityError, ProgrammingError, connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import Case, CaseNumberSequence
+
+CASE_NUMBER_FORMAT = "CASE-{year}-{seq:04d}"
+
+
+def format_case_number(year, seq):
+    return CASE_NUMBER_FORMAT.format(year=year, seq=seq)
+
+
+def allocate_case_numbers(count=1, year=None):
+    """Reserve ``count`` case numbers for ``year`` (default: current year).
+
+    O(1) regardless of how many cases exist. On Postgres a native per-year
+    sequence is used: ``nextval`` takes no row lock and never blocks other
+    workers (numbers reserved by a rolled-back transaction are skipped, as
+    with any sequence). Other backends bump a ``CaseNumberSequence`` row
+    with a single ``UPDATE ... SET last_value = last_value + count``; the
+    row lock serialises concurrent allocators for the same year only.
+    """
+    if count < 1:
+        raise ValueError("count must be >= 1")
+    year = year or timezone.now().year
+    if connection.vendor == "postgresql":
+        seqs = _pg_nextval(year, count)
+    else:
+        last = _bump_counter(year, count)
+        seqs = range(last - count + 1, last + 1)
+    return [format_case_number(year, seq) for seq in seqs]
+
+
+def _existing_max_seq(year):
+    """Highest sequence already used for ``year``; only read when seeding a year."""
+    prefix = f"CASE-{year}-"
+    latest = Case.objects.filter(case_number__startswith=prefix).aggregate(
+        m=Max("case_number")
+    )["m"]
+    if latest:
+        try:
+            return int(latest.split("-")[-1])
+        except ValueError:
+            pass
+    return 0
+
+
+@transaction.atomic
+def _bump_counter(year, count):
+    updated = CaseNumberSequence.objects.filter(year=year).update(
+        last_value=F("last_value") + count
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                CaseNumberSequence.objects.create(
+                    year=year, last_value=_existing_max_seq(year) + count
+                )
+        except IntegrityError:
+            # Another worker seeded the year first; take the normal path.
+            CaseNumberSequence.objects.filter(year=year).update(
+                last_value=F("last_value") + count
+            )
+    return CaseNumberSequence.objects.values_list("last_value", flat=True).get(
+        year=year
+    )
+
+
+def _pg_nextval(year, count):
+    name = f"crimes_case_number_{year}_seq"
+    sql = "SELECT nextval(%s) FROM generate_series(1, %s)"
+    with connection.cursor() as cur:
+        try:
+            with transaction.atomic():
+                cur.execute(sql, [name, count])
+                return [row[0] for row in cur.fetchall()]
+        except ProgrammingError as exc:
+            # psycopg raises UndefinedTable (SQLSTATE 42P01) for a missing sequence.
+            if getattr(exc.__cause__, "sqlstate", None) != "42P01":
+                raise
+        start = int(_existing_max_seq(year)) + 1
+        try:
+            with transaction.atomic():
+                cur.execute(
+                    f'CREATE SEQUENCE IF NOT EXISTS "{name}" START WITH {start}'
+                )
+        except IntegrityError:
+            pass  # created concurrently by another worker
+        cur.execute(sql, [name, count])
+        return [row[0] for row in cur.fetchall()]
@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models import Count
+
+from .models import (
+    Case,
+    CaseSummary,
+    Evidence,
+    CasePerson,
+    CaseAssignment,
+    CaseStatusHistory,
+)
+
+COUNTED_MODELS = {
+    "evidence_count": Evidence,
+    "people_count": CasePerson,
+    "assignment_count": CaseAssignment,
+    "history_count": CaseStatusHistory,
+}
+
+
+def actual_counts(case_ids):
+    """Recount related rows for ``case_ids``; one GROUP BY per counted model."""
+    counts = {cid: dict.fromkeys(CaseSummary.COUNTERS, 0) for cid in case_ids}
+    for counter, model in COUNTED_MODELS.items():
+        grouped = (
+            model.objects.filter(case_id__in=case_ids)
+            .order_by()
+            .values("case_id")
+            .annotate(n=Count("pk"))
+            .values_list("case_id", "n")
+        )
+        for case_id, n in grouped:
+            counts[case_id][counter] = n
+    return counts
+
+
+def find_drift(chunk_size=5000):
+    """Yield ``(case_id, stored, actual)`` for every case whose summary is wrong.
+
+    ``stored`` is ``None`` when the summary row is missing. Cases are
+    scanned in primary-key chunks so memory stays bounded.
+    """
+    last_id = 0
+    while True:
+        case_ids = list(
+            Case.objects.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+        if not case_ids:
+            return
+        last_id = case_ids[-1]
+        stored = {
+            row["case_id"]: row
+            for row in CaseSummary.objects.filter(case_id__in=case_ids).values(
+                "case_id", *CaseSummary.COUNTERS
+            )
+        }
+        for case_id, actual in actual_counts(case_ids).items():
+            row = stored.get(case_id)
+            if row is None:
+                yield case_id, None, actual
+                continue
+            current = {k: row[k] for k in CaseSummary.COUNTERS}
+            if current != actual:
+                yield case_id, current, actual
+
+
+def repair(case_id):
+    """Recompute and store the summary for one case under a row lock."""
+    with transaction.atomic():
+        Case.objects.select_for_update().filter(pk=case_id).exists()
+        actual = actual_counts([case_id])[case_id]
+        CaseSummary.objects.update_or_create(case_id=case_id, defaults=actual)
+    return actual
@@ -0,0 +1,103 @@
+"""Conditional GET (ETag / Last-Modified) for the API viewsets.
+
+Validators come from ``updated_at``: a detail response is keyed on the
+object's pk and timestamp, a list page on the pks and timestamps of the rows
+on that page plus whether a next page exists (so inserts, deletes and edits
+inside the page all change it). They are computed from the rows already
+loaded for the response and compared *before* serialization, so an
+unchanged resource costs its one query and an empty 304.
+
+Every write path stamps ``updated_at`` (``update_fields`` lists include it,
+and ``CaseQuerySet.update_status`` sets it), which is what makes this safe.
+Nested serializers (the users embedded in cases and incidents) have no such
+timestamp, so the ETag also covers the values of their fields.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+def validators(parts, timestamps):
+    """(quoted weak ETag, Last-Modified as a Unix timestamp or None)."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+    last_modified = max((ts for ts in timestamps if ts), default=None)
+    return (
+        "W/" + quote_etag(digest),
+        int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def _apply(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    # Responses depend on the caller's credentials: revalidate, never share.
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+class ConditionalGetMixin:
+    """ETag/Last-Modified on ``retrieve`` and ``list`` of a DRF viewset."""
+
+    def _version(self, obj, nested):
+        parts = [obj.pk, obj.updated_at]
+        for name, fields in nested:
+            related = getattr(obj, name)
+            parts.append(
+                None if related is None else [getattr(related, f) for f in fields]
+            )
+        return tuple(parts)
+
+    def _nested_fields(self):
+        """``(attribute, field names)`` of the nested serializers in use."""
+        return [
+            (field.source, list(field.Meta.fields))
+            for field in self.get_serializer_class()().fields.values()
+            if isinstance(field, serializers.ModelSerializer)
+        ]
+
+    def _not_modified(self, request, parts, timestamps):
+        fmt = getattr(request.accepted_renderer, "format", "")
+        etag, last_modified = validators((fmt, parts), timestamps)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            response = _apply(response, etag, last_modified)
+        return response, etag, last_modified
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        not_modified, etag, last_modified = self._not_modified(
+            request,
+            self._version(instance, self._nested_fields()),
+            [instance.updated_at],
+        )
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(instance)
+        return _apply(Response(serializer.data), etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        has_next = self.paginator.get_next_link() if page is not None else None
+        nested = self._nested_fields()
+        not_modified, etag, last_modified = self._not_modified(
+            request,
+            ([self._version(obj, nested) for obj in rows], has_next),
+            [obj.updated_at for obj in rows],
+        )
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(rows, many=True)
+        if page is not None:
+            response = self.get_paginated_response(serializer.data)
+        else:
+            response = Response(serializer.data)
+        return _apply(response, etag, last_modified)
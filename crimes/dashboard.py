@@ -0,0 +1,152 @@
+"""Cached dashboard aggregates with stale-while-revalidate.
+
+The dashboard is everyone's landing page, so its aggregates are computed once
+and kept in the cache as ``(fresh_until, snapshot)``. A page view costs one
+cache read:
+
+* fresh snapshot: served as is;
+* stale snapshot (TTL passed, or a write invalidated it): served as is, and
+  the first request to notice takes a short cache lock and recomputes it in a
+  background thread;
+* no snapshot (cold cache): computed inline.
+
+Writes call ``invalidate()`` (via the receivers in ``signals.py`` or directly
+from bulk paths), which marks the snapshot stale once the transaction
+commits. A refresh that started before the invalidation stores its result as
+already stale, so it cannot hide that write for a whole TTL.
+
+Case counts per status are read from ``mv_case_counts`` (see
+``case_counts.py``), caught up incrementally when the last refresh is older
+than ``CASE_COUNTS_MAX_AGE`` seconds.
+
+Use a shared cache (``REDIS_URL``) in production; with the default
+per-process LocMemCache every worker keeps its own snapshot.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from . import case_counts
+from .models import Case, CaseSummary, Incident, Person
+
+SNAPSHOT_KEY = "dashboard:snapshot"
+LOCK_KEY = "dashboard:refreshing"
+INVALIDATED_KEY = "dashboard:invalidated_at"
+RECENT = 5
+
+
+def _cache():
+    return caches[getattr(settings, "DASHBOARD_CACHE_ALIAS", "default")]
+
+
+def build_snapshot():
+    """Compute the dashboard aggregates as plain, picklable data."""
+    totals = CaseSummary.objects.aggregate(
+        evidence_total=Sum("evidence_count"),
+        avg_evidence=Avg("evidence_count", filter=Q(evidence_count__gt=0)),
+    )
+    recent_cases = Case.objects.select_related("lead_investigator").order_by(
+        "-created_at"
+    )[:RECENT]
+    recent_incidents = Incident.objects.select_related("reported_by").order_by(
+        "-created_at"
+    )[:RECENT]
+    return {
+        "case_counts": case_counts.get_counts(
+            max_age=getattr(settings, "CASE_COUNTS_MAX_AGE", 120)
+        ),
+        "incident_counts": list(
+            Incident.objects.values("status").annotate(c=Count("id")).order_by("status")
+        ),
+        "recent_cases": [
+            {
+                "id": c.id,
+                "case_number": c.case_number,
+                "title": c.title,
+                "status": c.status,
+                "lead_investigator": str(c.lead_investigator),
+            }
+            for c in recent_cases
+        ],
+        "recent_incidents": [
+            {
+                "id": i.id,
+                "title": i.title,
+                "status": i.status,
+                "reported_by": str(i.reported_by),
+            }
+            for i in recent_incidents
+        ],
+        "recent_people": list(
+            Person.objects.order_by("-created_at").values(
+                "id", "first_name", "last_name"
+            )[:RECENT]
+        ),
+        "evidence_total": totals["evidence_total"] or 0,
+        "people_total": Person.objects.count(),
+        "avg_evidence": totals["avg_evidence"] or 0,
+        "computed_at": timezone.now(),
+    }
+
+
+def refresh():
+    """Recompute and store the snapshot; returns it."""
+    started = time.time()
+    snapshot = build_snapshot()
+    cache = _cache()
+    ttl = getattr(settings, "DASHBOARD_CACHE_TTL", 60)
+    fresh_until = started + ttl
+    if cache.get(INVALIDATED_KEY, 0) >= started:
+        fresh_until = 0  # a write committed while we were computing
+    cache.set(SNAPSHOT_KEY, (fresh_until, snapshot), timeout=None)
+    return snapshot
+
+
+def _refresh_locked(in_thread):
+    try:
+        refresh()
+    finally:
+        _cache().delete(LOCK_KEY)
+        if in_thread:
+            connection.close()
+
+
+def _schedule_refresh():
+    lock_timeout = getattr(settings, "DASHBOARD_REFRESH_LOCK_TIMEOUT", 30)
+    if not _cache().add(LOCK_KEY, True, timeout=lock_timeout):
+        return  # someone else is already recomputing
+    if getattr(settings, "DASHBOARD_REFRESH_BACKGROUND", True):
+        threading.Thread(
+            target=_refresh_locked, args=(True,), name="dashboard-refresh", daemon=True
+        ).start()
+    else:
+        _refresh_locked(False)
+
+
+def get_snapshot():
+    entry = _cache().get(SNAPSHOT_KEY)
+    if entry is None:
+        return refresh()
+    fresh_until, snapshot = entry
+    if time.time() >= fresh_until:
+        _schedule_refresh()
+    return snapshot
+
+
+def _mark_stale():
+    cache = _cache()
+    cache.set(INVALIDATED_KEY, time.time(), timeout=None)
+    entry = cache.get(SNAPSHOT_KEY)
+    if entry is not None and entry[0]:
+        cache.set(SNAPSHOT_KEY, (0, entry[1]), timeout=None)
+
+
+def invalidate():
+    """Mark the snapshot stale when the current transaction commits."""
+    transaction.on_commit(_mark_stale)
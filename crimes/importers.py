@@ -0,0 +1,302 @@
+"""Streaming, chunked loaders used by ``manage.py import_records``.
+
+Each source file is read lazily (CSV or NDJSON), inserted ``chunk_size``
+rows at a time with ``bulk_create``, and its progress stored in an
+``ImportCheckpoint`` row updated in the same transaction as the chunk, so a
+crashed import resumes exactly after the last committed chunk.
+
+Source ids of imported people/incidents are kept in an in-memory map (so
+link rows can refer to people by their *source* id) and appended to a
+sidecar file before each chunk commits. On resume the file is replayed;
+entries from a chunk that never committed are overwritten when that chunk
+is imported again. ``--restart`` empties it.
+
+A source ``created_at`` (ISO datetime or date; naive values are in the
+current time zone) is kept: ``auto_now_add`` ignores it on insert, so it is
+set with a ``bulk_update`` in the same transaction.
+"""
+
+import csv
+import json
+import os
+from collections import Counter
+from datetime import date, datetime, time as dt_time
+from itertools import batched, islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Case, CasePerson, CaseSummary, ImportCheckpoint, Incident, Person
+from . import dashboard, name_matching, response_cache, rollups, search
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+class CheckpointError(Exception):
+    pass
+
+
+def detect_format(path):
+    return "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def read_records(path, fmt=None):
+    """Yield the rows of ``path``; an unparsable NDJSON line yields an
+    ``ImportRowError`` in its place so it is reported like any bad row."""
+    fmt = fmt or detect_format(path)
+    with open(path, newline="", encoding="utf-8") as fh:
+        if fmt == "csv":
+            yield from csv.DictReader(fh)
+        else:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield ImportRowError(f"invalid JSON: {exc}")
+                    continue
+                if not isinstance(record, dict):
+                    yield ImportRowError("expected a JSON object")
+                    continue
+                yield record
+
+
+class IdMap:
+    """Source id -> primary key map, persisted as an append-only CSV file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.ids = {}
+        if os.path.exists(path):
+            with open(path, newline="", encoding="utf-8") as fh:
+                for source_id, pk in csv.reader(fh):
+                    self.ids[source_id] = int(pk)
+
+    def get(self, source_id):
+        return self.ids.get(str(source_id))
+
+    def clear(self):
+        with open(self.path, "w", encoding="utf-8") as fh:
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.ids = {}
+
+    def add_many(self, pairs):
+        pairs = [(str(s), pk) for s, pk in pairs if s not in (None, "")]
+        if not pairs:
+            return
+        with open(self.path, "a", newline="", encoding="utf-8") as fh:
+            csv.writer(fh).writerows(pairs)
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.ids.update(pairs)
+
+
+class BaseImporter:
+    kind = None
+    model = None
+    keeps_id_map = False
+
+    def __init__(self, state_dir, id_maps):
+        self.state_dir = state_dir
+        self.id_maps = id_maps
+        if self.keeps_id_map:
+            path = os.path.join(state_dir, f"{self.kind}.ids")
+            self.id_maps[self.kind] = IdMap(path)
+
+    def prepare(self, rows):
+        """Hook to resolve lookups for a whole chunk in a few queries."""
+
+    def build(self, row):
+        raise NotImplementedError
+
+    def after_insert(self, created):
+        pass
+
+    def created_at(self, row):
+        """The row's source ``created_at`` as an aware datetime, or None."""
+        value = row.get("created_at")
+        if not value:
+            return None
+        try:
+            moment = parse_datetime(value)
+            day = None if moment else parse_date(value)
+        except ValueError:
+            moment = day = None
+        if day is not None:
+            moment = datetime.combine(day, dt_time.min)
+        if moment is None:
+            raise ImportRowError(f"invalid created_at {value!r}")
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def run(self, path, fmt=None, chunk_size=2000, resume=False, restart=False):
+        """Import ``path``; yields ``(rows_done, inserted, errors)`` per chunk."""
+        source = f"{self.kind}:{os.path.abspath(path)}"
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=source)
+        if restart:
+            checkpoint.rows_done = 0
+            checkpoint.save(update_fields=["rows_done", "updated_at"])
+            if self.keeps_id_map:
+                # Ids from the abandoned run must not resolve links.
+                self.id_maps[self.kind].clear()
+        elif checkpoint.rows_done and not resume:
+            raise CheckpointError(
+                f"{source} already imported up to row {checkpoint.rows_done}; "
+                "pass --resume to continue or --restart to start over"
+            )
+        done = checkpoint.rows_done
+        records = islice(read_records(path, fmt), done, None)
+        for chunk in batched(records, chunk_size):
+            self.prepare([row for row in chunk if isinstance(row, dict)])
+            objs, source_ids, created_ats, errors = [], [], [], []
+            for line, row in enumerate(chunk, start=done + 1):
+                if isinstance(row, ImportRowError):
+                    errors.append((line, str(row)))
+                    continue
+                try:
+                    obj = self.build(row)
+                    moment = self.created_at(row)
+                except KeyError as exc:
+                    errors.append((line, f"missing field {exc}"))
+                    continue
+                except ValueError as exc:
+                    errors.append((line, str(exc)))
+                    continue
+                objs.append(obj)
+                created_ats.append(moment)
+                source_ids.append(row.get("id"))
+            with transaction.atomic():
+                created = self.model.objects.bulk_create(objs)
+                dated = []
+                for obj, moment in zip(created, created_ats):
+                    if moment is not None:
+                        obj.created_at = moment
+                        dated.append(obj)
+                if dated:
+                    self.model.objects.bulk_update(dated, ["created_at"])
+                self.after_insert(created)
+                rollups.record(created)
+                dashboard.invalidate()
+                response_cache.bump(self.model)
+                if self.keeps_id_map:
+                    self.id_maps[self.kind].add_many(
+                        zip(source_ids, (obj.pk for obj in created))
+                    )
+                done += len(chunk)
+                ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                    rows_done=done
+                )
+            yield done, len(created), errors
+
+
+class IncidentImporter(BaseImporter):
+    kind = "incidents"
+    model = Incident
+    keeps_id_map = True
+
+    def prepare(self, rows):
+        usernames = {r["reported_by"] for r in rows if r.get("reported_by")}
+        User = get_user_model()
+        self.users = dict(
+            User.objects.filter(username__in=usernames).values_list("username", "pk")
+        )
+
+    def build(self, row):
+        status = row.get("status") or Incident.Status.DRAFT
+        if status not in Incident.Status.values:
+            raise ImportRowError(f"unknown status {status!r}")
+        title = row["title"]
+        if not title:
+            raise ImportRowError("title required")
+        return Incident(
+            title=title,
+            description=row.get("description") or "",
+            status=status,
+            reported_by_id=self.users.get(row.get("reported_by")),
+        )
+
+    def after_insert(self, created):
+        search.index_objects(created)
+
+
+class PersonImporter(BaseImporter):
+    kind = "people"
+    model = Person
+    keeps_id_map = True
+
+    def build(self, row):
+        if not (row["first_name"] and row["last_name"]):
+            raise ImportRowError("first_name and last_name required")
+        dob = row.get("date_of_birth") or None
+        return name_matching.apply_keys(
+            Person(
+                first_name=row["first_name"],
+                last_name=row["last_name"],
+                date_of_birth=date.fromisoformat(dob) if dob else None,
+            )
+        )
+
+    def after_insert(self, created):
+        name_matching.index_people(created)
+
+
+class CasePersonImporter(BaseImporter):
+    """Links rows: ``case_number``, ``person_id`` (source id) and ``role``."""
+
+    kind = "links"
+    model = CasePerson
+
+    def prepare(self, rows):
+        numbers = {r["case_number"] for r in rows if r.get("case_number")}
+        self.cases = dict(
+            Case.objects.filter(case_number__in=numbers).values_list(
+                "case_number", "pk"
+            )
+        )
+        people = self.id_maps.get("people")
+        self.people = {}
+        for r in rows:
+            ref = str(r.get("person_id", ""))
+            pk = people.get(ref) if people else None
+            if pk is not None:
+                self.people[ref] = pk
+        self.existing = set(
+            CasePerson.objects.filter(
+                case_id__in=self.cases.values(), person_id__in=self.people.values()
+            ).values_list("case_id", "person_id", "role")
+        )
+
+    def build(self, row):
+        case_id = self.cases.get(row["case_number"])
+        if case_id is None:
+            raise ImportRowError(f"unknown case {row['case_number']!r}")
+        person_id = self.people.get(str(row["person_id"]))
+        if person_id is None:
+            raise ImportRowError(f"unknown person {row['person_id']!r}")
+        role = row["role"]
+        if role not in CasePerson.Role.values:
+            raise ImportRowError(f"unknown role {role!r}")
+        key = (case_id, person_id, role)
+        if key in self.existing:
+            raise ImportRowError("link already exists")
+        self.existing.add(key)
+        return CasePerson(case_id=case_id, person_id=person_id, role=role)
+
+    def after_insert(self, created):
+        # bulk_create skips CaseCountedModel.save, so bump counters here.
+        for case_id, n in Counter(cp.case_id for cp in created).items():
+            CaseSummary.bump(case_id, people_count=n)
+
+
+IMPORTERS = {
+    importer.kind: importer
+    for importer in (IncidentImporter, PersonImporter, CasePersonImporter)
+}
@@ -0,0 +1,97 @@
+import json
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from crimes import audit_store
+from crimes.models import AuditArchive
+
+
+def _month(value):
+    try:
+        year, month = value.split("-")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        raise CommandError(f"--month must be YYYY-MM, got {value!r}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain the monthly AuditLog partitions and their archives: create or "
+        "roll partitions and archive expired months (maintain), list partitions "
+        "and archives (list), query archives (search) or load a month back "
+        "(restore)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "operation", choices=["maintain", "list", "search", "restore"]
+        )
+        parser.add_argument(
+            "--retention",
+            type=int,
+            help="Months kept in the database (default AUDIT_LOG_RETENTION_MONTHS).",
+        )
+        parser.add_argument("--month", help="YYYY-MM, for restore.")
+        parser.add_argument("--start", help="First day to search, YYYY-MM-DD.")
+        parser.add_argument("--end", help="Last day to search, YYYY-MM-DD.")
+        for name in audit_store.FILTERS:
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int if name == "user_id" else str,
+                help="Search for this exact value.",
+            )
+
+    def handle(self, *args, **options):
+        getattr(self, f"_{options['operation']}")(options)
+
+    def _maintain(self, options):
+        changed, archived = audit_store.maintain(retention=options["retention"])
+        for month in changed:
+            self.stdout.write(f"partitioned {month:%Y-%m}")
+        for month, rows in archived.items():
+            self.stdout.write(f"archived {month:%Y-%m}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS("Audit log partitions are up to date"))
+
+    def _list(self, options):
+        for month, table in audit_store.partitions().items():
+            self.stdout.write(f"{month:%Y-%m}  {table}")
+        for archived in AuditArchive.objects.all():
+            self.stdout.write(
+                f"{archived.month:%Y-%m}  archived, {archived.rows} rows: "
+                f"{archived.path}"
+            )
+
+    def _search(self, options):
+        filters = {
+            name: options[name]
+            for name in audit_store.FILTERS
+            if options[name] is not None
+        }
+        days = {}
+        for name in ("start", "end"):
+            if options[name]:
+                days[name] = parse_date(options[name])
+                if days[name] is None:
+                    raise CommandError(f"--{name} must be YYYY-MM-DD")
+        start = end = None
+        if "start" in days:
+            start = datetime.combine(days["start"], dt_time.min, tzinfo=dt_timezone.utc)
+        if "end" in days:
+            end = datetime.combine(
+                days["end"] + timedelta(days=1), dt_time.min, tzinfo=dt_timezone.utc
+            )
+        for entry in audit_store.search(start, end, **filters):
+            entry["timestamp"] = entry["timestamp"].isoformat()
+            self.stdout.write(json.dumps(entry))
+
+    def _restore(self, options):
+        if not options["month"]:
+            raise CommandError("restore needs --month YYYY-MM")
+        month = _month(options["month"])
+        try:
+            rows = audit_store.restore(month)
+        except AuditArchive.DoesNotExist:
+            raise CommandError(f"No archive for {month:%Y-%m}")
+        self.stdout.write(self.style.SUCCESS(f"Restored {rows} rows of {month:%Y-%m}"))
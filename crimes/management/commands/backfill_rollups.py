@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from crimes import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the hourly and daily activity rollups from the raw tables, "
+        "for every day or for --start..--end (inclusive)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day, YYYY-MM-DD.")
+        parser.add_argument("--end", help="Last day, YYYY-MM-DD.")
+        parser.add_argument(
+            "--metric",
+            action="append",
+            choices=sorted(rollups.METRICS),
+            help="Only this metric (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        days = {}
+        for name in ("start", "end"):
+            if options[name]:
+                days[name] = parse_date(options[name])
+                if days[name] is None:
+                    raise CommandError(f"--{name} must be YYYY-MM-DD")
+        start = end = None
+        if "start" in days:
+            start = rollups.day_range(days["start"], days["start"])[0]
+        if "end" in days:
+            end = rollups.day_range(days["end"], days["end"])[1]
+        written = rollups.backfill(start, end, metrics=options["metric"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from crimes.case_summary import find_drift, repair
+
+
+class Command(BaseCommand):
+    help = "Verify the incrementally maintained case_summary table, or rebuild drifted rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["verify", "rebuild"])
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        rebuild = options["action"] == "rebuild"
+        drifted = 0
+        for case_id, stored, actual in find_drift(chunk_size=options["chunk_size"]):
+            drifted += 1
+            self.stdout.write(f"case {case_id}: stored={stored} actual={actual}")
+            if rebuild:
+                repair(case_id)
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("case_summary is consistent"))
+        elif rebuild:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {drifted} case summaries"))
+        else:
+            raise CommandError(f"{drifted} case summaries drifted; run 'rebuild'")
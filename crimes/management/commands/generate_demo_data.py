@@ -1,26 +1,73 @@
-from django.core.management.base import BaseCommand
+import os
+
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from faker import Faker
+from crimes import dashboard, name_matching, response_cache, rollups, search
 from crimes.models import Incident, Person
+from crimes.synthetic import generate, parse_scale
 
 
 class Command(BaseCommand):
-    help = "Generate demo data: incidents and persons."
+    help = (
+        "Generate demo data: incidents and persons. With --scale, build a "
+        "reproducible production-sized graph for load and benchmark work."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument("--incidents", type=int, default=5)
         parser.add_argument("--people", type=int, default=10)
+        parser.add_argument(
+            "--scale",
+            help="Number of incidents for the full graph, e.g. 50k or 1m",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes (SQLite always uses one)",
+        )
+        parser.add_argument("--shard-size", type=int, default=10_000)
+        parser.add_argument(
+            "--years", type=int, default=3, help="History window for timestamps"
+        )
 
     def handle(self, *args, **options):
+        if options["scale"]:
+            try:
+                scale = parse_scale(options["scale"])
+            except ValueError as e:
+                raise CommandError(str(e))
+            totals = generate(
+                scale,
+                seed=options["seed"],
+                workers=options["workers"],
+                shard_size=options["shard_size"],
+                years=options["years"],
+                log=self.stdout.write,
+            )
+            summary = ", ".join(f"{k}={v}" for k, v in sorted(totals.items()))
+            self.stdout.write(self.style.SUCCESS(f"Synthetic data generated: {summary}"))
+            return
         fake = Faker()
         User = get_user_model()
         reporter = User.objects.first()
-        for _ in range(options["incidents"]):
-            Incident.objects.create(
+        incidents = Incident.objects.bulk_create(
+            Incident(
                 title=fake.sentence(), description=fake.text(), reported_by=reporter
             )
-        for _ in range(options["people"]):
-            Person.objects.create(
-                first_name=fake.first_name(), last_name=fake.last_name()
+            for _ in range(options["incidents"])
+        )
+        rollups.record(incidents)
+        search.index_objects(incidents)
+        people = Person.objects.bulk_create(
+            name_matching.apply_keys(
+                Person(first_name=fake.first_name(), last_name=fake.last_name())
             )
+            for _ in range(options["people"])
+        )
+        name_matching.index_people(people)
+        dashboard.invalidate()
+        response_cache.bump(Incident, Person)
         self.stdout.write(self.style.SUCCESS("Demo data generated"))
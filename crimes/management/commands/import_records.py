@@ -0,0 +1,75 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from crimes.importers import IMPORTERS, CheckpointError
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream CSV/NDJSON files of incidents, people and case-person links into "
+        "the database in chunks, resuming from the last committed chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--incidents",
+            help="Incidents file: id,title,description,status,reported_by,created_at",
+        )
+        parser.add_argument(
+            "--people",
+            help="People file: id,first_name,last_name,date_of_birth,created_at",
+        )
+        parser.add_argument(
+            "--links",
+            help="Case-person links file: case_number,person_id,role,created_at",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="Override format detection by file extension",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--state-dir",
+            default=".import_state",
+            help="Directory holding source-id maps between runs",
+        )
+        parser.add_argument(
+            "--resume", action="store_true", help="Continue from the stored checkpoint"
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore any stored checkpoint and source-id map",
+        )
+
+    def handle(self, *args, **options):
+        if not any(options[kind] for kind in IMPORTERS):
+            raise CommandError("Pass at least one of --incidents, --people, --links")
+        os.makedirs(options["state_dir"], exist_ok=True)
+        id_maps = {}
+        # Order matters: links resolve people through the id map.
+        for kind, importer_cls in IMPORTERS.items():
+            importer = importer_cls(options["state_dir"], id_maps)
+            path = options[kind]
+            if not path:
+                continue
+            inserted = failed = 0
+            try:
+                for done, n, errors in importer.run(
+                    path,
+                    fmt=options["format"],
+                    chunk_size=options["chunk_size"],
+                    resume=options["resume"],
+                    restart=options["restart"],
+                ):
+                    inserted += n
+                    failed += len(errors)
+                    for line, message in errors:
+                        self.stderr.write(f"{kind} row {line}: {message}")
+                    self.stdout.write(f"{kind}: {done} rows processed")
+            except CheckpointError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(
+                self.style.SUCCESS(f"{kind}: inserted {inserted}, skipped {failed}")
+            )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from crimes.models import Incident, Case, Evidence
+from crimes import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-index incidents, cases and evidence into the full-text search table "
+        "and drop entries whose row no longer exists."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        chunk = options["chunk_size"]
+        for model in (Incident, Case, Evidence):
+            last_pk, total = 0, 0
+            fields = ["pk", "title", "description"]
+            if model is Case:
+                fields.append("case_number")
+            if model is Evidence:
+                fields = ["pk", "code", "description"]
+            while True:
+                objs = list(
+                    model.objects.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .only(*fields)[:chunk]
+                )
+                if not objs:
+                    break
+                search.index_objects(objs)
+                last_pk = objs[-1].pk
+                total += len(objs)
+            removed = search.remove_orphans(model)
+            self.stdout.write(f"{model.__name__}: {total} indexed, {removed} removed")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
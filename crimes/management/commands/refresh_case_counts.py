@@ -1,24 +1,65 @@
-from django.core.management.base import BaseCommand
-from django.db import connection
-
-MATERIALIZED_VIEW = "mv_case_counts"
+import time
 
-SQL_CREATE = f"""
-CREATE TABLE IF NOT EXISTS {MATERIALIZED_VIEW} (status TEXT PRIMARY KEY, count INTEGER NOT NULL);
-"""
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
 
-SQL_REFRESH = f"""
-DELETE FROM {MATERIALIZED_VIEW};
-INSERT INTO {MATERIALIZED_VIEW}(status, count)
-SELECT status, COUNT(1) FROM crimes_case GROUP BY status;
-"""
+from crimes import case_counts
 
 
 class Command(BaseCommand):
-    help = "Refresh materialized view mv_case_counts (simulated table for SQLite)."
+    help = (
+        "Refresh the mv_case_counts table incrementally from case status "
+        "history, or recount it with --full."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Recount every case.")
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep refreshing every --interval seconds until interrupted.",
+        )
+        parser.add_argument("--interval", type=float, default=30)
+        parser.add_argument(
+            "--full-every",
+            type=int,
+            default=120,
+            help="With --watch, recount every N cycles to pick up deleted "
+            "cases (0 to never).",
+        )
 
     def handle(self, *args, **options):
-        with connection.cursor() as cur:
-            cur.execute(SQL_CREATE)
-            cur.execute(SQL_REFRESH)
-        self.stdout.write(self.style.SUCCESS("mv_case_counts refreshed"))
+        if not options["watch"]:
+            self._refresh(options["full"])
+            return
+        cycle = 0
+        try:
+            while True:
+                full_every = options["full_every"]
+                self._refresh(
+                    (options["full"] and cycle == 0)
+                    or bool(full_every and cycle and cycle % full_every == 0)
+                )
+                cycle += 1
+                time.sleep(options["interval"])
+                close_old_connections()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
+
+    def _refresh(self, full):
+        if full:
+            case_counts.full_refresh()
+            self.stdout.write(self.style.SUCCESS("mv_case_counts recounted"))
+            return
+        delta = case_counts.refresh()
+        if delta is None:
+            self.stdout.write(
+                "mv_case_counts: no changes applied (concurrent refresh or rebuild)"
+            )
+        elif delta:
+            changes = ", ".join(f"{s} {n:+d}" for s, n in sorted(delta.items()))
+            self.stdout.write(
+                self.style.SUCCESS(f"mv_case_counts refreshed: {changes}")
+            )
+        else:
+            self.stdout.write("mv_case_counts up to date")
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from crimes import matviews
+
+
+class Command(BaseCommand):
+    """Refresh the views registered in ``crimes.matviews``.
+
+    ``mv_case_summary`` is a native materialized view on PostgreSQL. The one
+    exception is ``mv_case_counts``: it stays a plain table on every backend,
+    and refreshing it folds in the status changes since the last run (see
+    ``crimes/case_counts.py``). Those changes are a few rows, whereas
+    ``REFRESH MATERIALIZED VIEW`` would recount every case each time, so the
+    table is kept deliberately. It still goes through ``refresh()`` and
+    ``due()`` like the others.
+    """
+
+    help = (
+        "Refresh the materialized views that are past their refresh interval "
+        "(or the named ones, or all with --all)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Views to refresh.")
+        parser.add_argument("--all", action="store_true", help="Refresh every view.")
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep refreshing due views every --interval seconds.",
+        )
+        parser.add_argument("--interval", type=float, default=10)
+        parser.add_argument(
+            "--list", action="store_true", help="Show when each view was refreshed."
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["names"]) - set(matviews.VIEWS)
+        if unknown:
+            raise CommandError(f"Unknown views: {', '.join(sorted(unknown))}")
+        if options["list"]:
+            for view in matviews.VIEWS.values():
+                state = "stale" if view.is_stale() else "fresh"
+                self.stdout.write(
+                    f"{view.name}: {view.last_refreshed() or 'never'} ({state}, "
+                    f"every {view.refresh_interval}s)"
+                )
+            return
+        if not options["watch"]:
+            self._refresh(options)
+            return
+        try:
+            while True:
+                self._refresh(options)
+                time.sleep(options["interval"])
+                close_old_connections()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
+
+    def _refresh(self, options):
+        if options["names"]:
+            views = [matviews.VIEWS[name] for name in options["names"]]
+        elif options["all"]:
+            views = list(matviews.VIEWS.values())
+        else:
+            views = matviews.due()
+        for view in views:
+            started = time.perf_counter()
+            view.refresh()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{view.name} refreshed in {time.perf_counter() - started:.2f}s"
+                )
+            )
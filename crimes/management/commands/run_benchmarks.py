@@ -0,0 +1,54 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from crimes import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark API and HTML endpoints against seeded datasets; record p50/p95 "
+        "latency, query count and peak memory, and compare with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="1k,10k", help="Comma separated dataset sizes"
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="benchmarks/results.json")
+        parser.add_argument("--baseline", default="benchmarks/baseline.json")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed relative p95 latency growth before failing",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Write the results as the new baseline instead of comparing",
+        )
+
+    def handle(self, *args, **options):
+        sizes = [s.strip() for s in options["sizes"].split(",") if s.strip()]
+        report = benchmarks.run_suite(
+            sizes, repeat=options["repeat"], seed=options["seed"], log=self.stdout.write
+        )
+        target = options["baseline"] if options["save_baseline"] else options["output"]
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        benchmarks.dump(report, target)
+        self.stdout.write(f"Results written to {target}")
+        if options["save_baseline"]:
+            return
+        if not os.path.exists(options["baseline"]):
+            self.stdout.write("No baseline found; rerun with --save-baseline to store one")
+            return
+        problems = benchmarks.compare(
+            report, benchmarks.load(options["baseline"]), options["threshold"]
+        )
+        if problems:
+            for line in problems:
+                self.stderr.write(line)
+            raise CommandError(f"{len(problems)} benchmark regressions")
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
@@ -0,0 +1,199 @@
+"""Materialized views, refreshed on a schedule behind one API.
+
+``MaterializedView`` stores the result of a query:
+
+* on PostgreSQL as a native ``MATERIALIZED VIEW`` with a unique index,
+  refreshed with ``REFRESH MATERIALIZED VIEW CONCURRENTLY``. Readers keep
+  reading the previous contents and writers to the base tables are never
+  blocked; only a second refresh of the same view waits;
+* elsewhere (SQLite) as a plain table. A refresh builds the new contents
+  under a temporary name and swaps it in with ``DROP`` and ``RENAME`` in one
+  short transaction.
+
+Each refresh is recorded in ``MaterializedViewRefresh``, so callers can ask
+when a view was last refreshed (``last_refreshed``) and whether it is older
+than its ``refresh_interval`` (``is_stale``). ``manage.py refresh_views``
+refreshes the views that are due, once or with ``--watch``; the container
+populates every view before it starts serving and docker-compose runs the
+watcher. Readers go through ``ensure_populated``, which also starts one
+background refresh when it finds a view stale, so a missed schedule costs
+staleness rather than a blocking refresh on the request path.
+
+``mv_case_counts`` is registered too, but keeps the incremental refresh of
+``case_counts.py``: folding in the changes since the last run is cheaper
+than recounting, concurrently or not.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import case_counts
+from .models import MaterializedViewRefresh
+
+
+class BaseView:
+    def __init__(self, name, refresh_interval):
+        self.name = name
+        self.refresh_interval = refresh_interval
+
+    def last_refreshed(self, using="default"):
+        """When the current contents were computed, or None if never."""
+        raise NotImplementedError
+
+    def refresh(self, using="default"):
+        raise NotImplementedError
+
+    def is_stale(self, using="default"):
+        refreshed = self.last_refreshed(using)
+        if refreshed is None:
+            return True
+        age = (timezone.now() - refreshed).total_seconds()
+        return age >= self.refresh_interval
+
+
+class MaterializedView(BaseView):
+    def __init__(self, name, query, unique, indexes=(), refresh_interval=300):
+        super().__init__(name, refresh_interval)
+        self.query = query
+        self.unique = tuple(unique)
+        self.indexes = tuple(tuple(cols) for cols in indexes)
+
+    def _index_sql(self, table):
+        statements = [
+            f"CREATE UNIQUE INDEX {table}_uniq ON {table} ({', '.join(self.unique)})"
+        ]
+        for cols in self.indexes:
+            statements.append(
+                f"CREATE INDEX {table}_{'_'.join(cols)}_idx "
+                f"ON {table} ({', '.join(cols)})"
+            )
+        return statements
+
+    def last_refreshed(self, using="default"):
+        return (
+            MaterializedViewRefresh.objects.using(using)
+            .filter(name=self.name)
+            .values_list("refreshed_at", flat=True)
+            .first()
+        )
+
+    def refresh(self, using="default"):
+        connection = connections[using]
+        started = timezone.now()
+        clock = time.perf_counter()
+        if connection.vendor == "postgresql":
+            self._refresh_postgresql(connection)
+        else:
+            self._refresh_swap(connection, using)
+        MaterializedViewRefresh.objects.using(using).update_or_create(
+            name=self.name,
+            defaults={
+                "refreshed_at": started,
+                "duration": time.perf_counter() - clock,
+            },
+        )
+        return started
+
+    def _refresh_postgresql(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT ispopulated FROM pg_matviews WHERE matviewname = %s",
+                [self.name],
+            )
+            (populated,) = cursor.fetchone()
+            # CONCURRENTLY needs existing contents to diff against.
+            mode = "CONCURRENTLY " if populated else ""
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {mode}{self.name}")
+
+    def _refresh_swap(self, connection, using):
+        staging = f"{self.name}__new"
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+            cursor.execute(f"CREATE TABLE {staging} AS {self.query}")
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.name}")
+            cursor.execute(f"ALTER TABLE {staging} RENAME TO {self.name}")
+            for sql in self._index_sql(self.name):
+                cursor.execute(sql)
+
+
+class CaseCountsView(BaseView):
+    """``mv_case_counts``, maintained incrementally by ``case_counts``."""
+
+    def last_refreshed(self, using="default"):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT refreshed_at FROM {case_counts.STATE_TABLE} WHERE id = 1"
+            )
+            row = cursor.fetchone()
+        if not row or not row[0]:
+            return None
+        return datetime.fromtimestamp(row[0], tz=dt_timezone.utc)
+
+    def refresh(self, using="default"):
+        case_counts.refresh(using)
+        return self.last_refreshed(using)
+
+
+CASE_SUMMARY = MaterializedView(
+    "mv_case_summary",
+    "SELECT case_id, case_number, status, evidence_count, people_count, "
+    "assignment_count, history_count FROM view_case_summary",
+    unique=("case_id",),
+    indexes=(("case_number",),),
+    refresh_interval=300,
+)
+CASE_COUNTS = CaseCountsView(case_counts.TABLE, refresh_interval=30)
+
+VIEWS = {view.name: view for view in (CASE_SUMMARY, CASE_COUNTS)}
+
+
+def _refresh_locked(view, using, lock_key, in_thread):
+    try:
+        view.refresh(using)
+    finally:
+        cache.delete(lock_key)
+        if in_thread:
+            connections[using].close()
+
+
+def _schedule_refresh(view, using):
+    lock_key = f"matviews:refreshing:{view.name}"
+    lock_timeout = getattr(settings, "MATVIEW_REFRESH_LOCK_TIMEOUT", 300)
+    if not cache.add(lock_key, True, timeout=lock_timeout):
+        return  # already being refreshed
+    if getattr(settings, "MATVIEW_REFRESH_BACKGROUND", True):
+        threading.Thread(
+            target=_refresh_locked,
+            args=(view, using, lock_key, True),
+            name=f"refresh-{view.name}",
+            daemon=True,
+        ).start()
+    else:
+        _refresh_locked(view, using, lock_key, False)
+
+
+def ensure_populated(name, using="default"):
+    """When the contents of ``name`` were computed, refreshing it if needed.
+
+    A view that was never refreshed has nothing to serve and is refreshed
+    inline; a stale one is served as is while a background refresh runs.
+    """
+    view = VIEWS[name]
+    refreshed = view.last_refreshed(using)
+    if refreshed is None:
+        return view.refresh(using)
+    if (timezone.now() - refreshed).total_seconds() >= view.refresh_interval:
+        _schedule_refresh(view, using)
+    return refreshed
+
+
+def due(using="default"):
+    """Views older than their refresh interval."""
+    return [view for view in VIEWS.values() if view.is_stale(using)]
@@ -0,0 +1,241 @@
+"""Per-route request metrics with Prometheus text exposition.
+
+Each process keeps plain in-memory histograms keyed by ``(route, method)``.
+When ``settings.METRICS_DIR`` is set, every process also snapshots its
+registry to ``<METRICS_DIR>/metrics-<pid>.json`` (at most every
+``METRICS_FLUSH_INTERVAL`` seconds, atomically via rename). ``/metrics``
+then merges all snapshots, which is how numbers from separate gunicorn
+workers are summed, in the same way as Prometheus' multiprocess mode.
+A snapshot whose process has exited is still merged for
+``METRICS_SNAPSHOT_MAX_AGE`` seconds after its last write, then deleted.
+Without ``METRICS_DIR`` only the serving process is reported.
+"""
+
+import atexit
+import glob
+import ipaddress
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from . import response_cache
+
+HISTOGRAMS = {
+    "http_request_duration_seconds": (
+        "Request latency by route",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ),
+    "http_request_db_queries": (
+        "SQL queries per request by route",
+        (0, 1, 2, 5, 10, 20, 50, 100, 250),
+    ),
+    "http_request_db_duration_seconds": (
+        "Time spent in SQL per request by route",
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+    ),
+    "http_response_size_bytes": (
+        "Response body size by route (non-streaming responses)",
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    ),
+}
+
+
+class RouteStats:
+    __slots__ = ("counts", "sums", "statuses")
+
+    def __init__(self):
+        # One cumulative bucket list per histogram, plus the +Inf total.
+        self.counts = {name: [0] * (len(b) + 1) for name, (_, b) in HISTOGRAMS.items()}
+        self.sums = dict.fromkeys(HISTOGRAMS, 0.0)
+        self.statuses = {}
+
+    def observe(self, name, value):
+        buckets = HISTOGRAMS[name][1]
+        counts = self.counts[name]
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-1] += 1
+        self.sums[name] += value
+
+    def merge(self, data):
+        for name, counts in data["counts"].items():
+            mine = self.counts.get(name)
+            if mine is None or len(mine) != len(counts):
+                continue  # bucket layout changed between deploys; skip
+            for i, n in enumerate(counts):
+                mine[i] += n
+            self.sums[name] += data["sums"][name]
+        for status, n in data["statuses"].items():
+            self.statuses[status] = self.statuses.get(status, 0) + n
+
+    def to_dict(self):
+        return {"counts": self.counts, "sums": self.sums, "statuses": self.statuses}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.last_flush = time.monotonic()
+
+    def observe_request(self, route, method, status, duration, queries, db_time, size):
+        with self.lock:
+            stats = self.routes.get((route, method))
+            if stats is None:
+                stats = self.routes[(route, method)] = RouteStats()
+            stats.observe("http_request_duration_seconds", duration)
+            stats.observe("http_request_db_queries", queries)
+            stats.observe("http_request_db_duration_seconds", db_time)
+            if size is not None:
+                stats.observe("http_response_size_bytes", size)
+            key = str(status)
+            stats.statuses[key] = stats.statuses.get(key, 0) + 1
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                {"route": route, "method": method, **stats.to_dict()}
+                for (route, method), stats in self.routes.items()
+            ]
+
+    def maybe_flush(self, force=False):
+        directory = getattr(settings, "METRICS_DIR", None)
+        if not directory:
+            return
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 5)
+        now = time.monotonic()
+        if not force and now - self.last_flush < interval:
+            return
+        self.last_flush = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        # Threads of one process may flush at once; each needs its own file.
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp, path)
+
+    def reset(self):
+        with self.lock:
+            self.routes.clear()
+
+
+registry = Registry()
+atexit.register(registry.maybe_flush, force=True)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OverflowError):
+        return True
+    return True
+
+
+def _expired(path):
+    """Whether ``path`` is the stale snapshot of a process that has exited."""
+    max_age = getattr(settings, "METRICS_SNAPSHOT_MAX_AGE", 300)
+    try:
+        pid = int(os.path.basename(path)[len("metrics-") : -len(".json")])
+        age = time.time() - os.path.getmtime(path)
+    except (OSError, ValueError):
+        return False
+    return age > max_age and not _alive(pid)
+
+
+def scrape_allowed(request):
+    """Staff users, or clients whose address is in ``METRICS_ALLOWED_IPS``."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+    try:
+        addr = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        addr in ipaddress.ip_network(net, strict=False)
+        for net in getattr(settings, "METRICS_ALLOWED_IPS", ())
+    )
+
+
+def collect():
+    """Merge this process's live stats with every other worker's snapshot."""
+    merged = {}
+
+    def add(entries):
+        for entry in entries:
+            key = (entry["route"], entry["method"])
+            merged.setdefault(key, RouteStats()).merge(entry)
+
+    add(registry.snapshot())
+    directory = getattr(settings, "METRICS_DIR", None)
+    if directory:
+        own = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            if path == own:
+                continue  # live numbers already included
+            if _expired(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    add(json.load(fh))
+            except (OSError, ValueError):
+                continue
+    return merged
+
+
+def _labels(**labels):
+    inner = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in labels.items()
+    )
+    return "{" + inner + "}"
+
+
+def render(merged=None):
+    """Render metrics in the Prometheus text exposition format (0.0.4)."""
+    merged = collect() if merged is None else merged
+    items = sorted(merged.items())
+    lines = [
+        "# HELP http_requests_total Requests by route, method and status",
+        "# TYPE http_requests_total counter",
+    ]
+    for (route, method), stats in items:
+        for status, n in sorted(stats.statuses.items()):
+            labels = _labels(route=route, method=method, status=status)
+            lines.append(f"http_requests_total{labels} {n}")
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (route, method), stats in items:
+            counts = stats.counts[name]
+            if not counts[-1]:
+                continue
+            for bound, n in zip(buckets, counts):
+                labels = _labels(route=route, method=method, le=bound)
+                lines.append(f"{name}_bucket{labels} {n}")
+            base = _labels(route=route, method=method)
+            labels = _labels(route=route, method=method, le="+Inf")
+            lines.append(f"{name}_bucket{labels} {counts[-1]}")
+            lines.append(f"{name}_sum{base} {stats.sums[name]}")
+            lines.append(f"{name}_count{base} {counts[-1]}")
+    # Response cache counters are per process (not merged across workers).
+    lines.append("# HELP response_cache_requests_total Response cache lookups by view")
+    lines.append("# TYPE response_cache_requests_total counter")
+    for view, counts in response_cache.stats().items():
+        for result, key in (("hit", "hits"), ("miss", "misses")):
+            labels = _labels(view=view, result=result)
+            lines.append(f"response_cache_requests_total{labels} {counts[key]}")
+    return "\n".join(lines) + "\n"
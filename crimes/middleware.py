@@ -0,0 +1,50 @@
+import time
+
+from django.db import connection
+
+from .metrics import registry
+
+
+class _QueryTimer:
+    """``connection.execute_wrapper`` hook counting queries and DB time."""
+
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+class MetricsMiddleware:
+    """Record latency, SQL count/time and response size per resolved URL name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        match = getattr(request, "resolver_match", None)
+        route = (match.view_name or match.route) if match else "<unresolved>"
+        size = None if response.streaming else len(response.content)
+        registry.observe_request(
+            route,
+            request.method,
+            response.status_code,
+            duration,
+            timer.queries,
+            timer.seconds,
+            size,
+        )
+        return response
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-17 17:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_SQL = """
+INSERT INTO case_summary (case_id, evidence_count, people_count, assignment_count, history_count, updated_at)
+SELECT c.id,
+       (SELECT COUNT(1) FROM crimes_evidence e WHERE e.case_id = c.id),
+       (SELECT COUNT(1) FROM crimes_caseperson cp WHERE cp.case_id = c.id),
+       (SELECT COUNT(1) FROM crimes_caseassignment ca WHERE ca.case_id = c.id),
+       (SELECT COUNT(1) FROM crimes_casestatushistory h WHERE h.case_id = c.id),
+       CURRENT_TIMESTAMP
+FROM crimes_case c;
+"""
+
+DROP_VIEW_SQL = "DROP VIEW IF EXISTS view_case_summary;"
+
+VIEW_SQL = """
+CREATE VIEW view_case_summary AS
+SELECT c.id AS case_id,
+       c.case_number,
+       c.status,
+       COALESCE(s.evidence_count, 0) AS evidence_count,
+       COALESCE(s.people_count, 0) AS people_count,
+       COALESCE(s.assignment_count, 0) AS assignment_count,
+       COALESCE(s.history_count, 0) AS history_count
+FROM crimes_case c
+LEFT JOIN case_summary s ON s.case_id = c.id;
+"""
+
+OLD_VIEW_SQL = """
+CREATE VIEW view_case_summary AS
+SELECT c.id as case_id,
+       c.case_number,
+       c.status,
+       (SELECT COUNT(1) FROM crimes_evidence e WHERE e.case_id = c.id) AS evidence_count,
+       (SELECT COUNT(1) FROM crimes_caseperson cp WHERE cp.case_id = c.id) AS people_count
+FROM crimes_case c;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crimes', '0004_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseSummary',
+            fields=[
+                ('case', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='crimes.case')),
+                ('evidence_count', models.IntegerField(default=0)),
+                ('people_count', models.IntegerField(default=0)),
+                ('assignment_count', models.IntegerField(default=0)),
+                ('history_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'case_summary',
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=""),
+        migrations.RunSQL(DROP_VIEW_SQL, reverse_sql=OLD_VIEW_SQL),
+        migrations.RunSQL(VIEW_SQL, reverse_sql=DROP_VIEW_SQL),
+    ]
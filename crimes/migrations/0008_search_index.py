@@ -0,0 +1,52 @@
+from django.db import migrations
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE search_fts USING fts5(title, body, tokenize='porter unicode61');",
+    "INSERT INTO search_fts (rowid, title, body) SELECT id * 4 + 1, title, description FROM crimes_incident;",
+    "INSERT INTO search_fts (rowid, title, body) SELECT id * 4 + 2, case_number || ' ' || title, description FROM crimes_case;",
+    "INSERT INTO search_fts (rowid, title, body) SELECT id * 4 + 3, code, description FROM crimes_evidence;",
+]
+
+POSTGRES_CREATE = [
+    """
+    CREATE TABLE search_fts (
+        doc_id bigint PRIMARY KEY,
+        title text NOT NULL,
+        body text NOT NULL,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', title), 'A') ||
+            setweight(to_tsvector('english', body), 'B')
+        ) STORED
+    );
+    """,
+    "CREATE INDEX search_fts_document_idx ON search_fts USING GIN (document);",
+    "INSERT INTO search_fts (doc_id, title, body) SELECT id * 4 + 1, title, description FROM crimes_incident;",
+    "INSERT INTO search_fts (doc_id, title, body) SELECT id * 4 + 2, case_number || ' ' || title, description FROM crimes_case;",
+    "INSERT INTO search_fts (doc_id, title, body) SELECT id * 4 + 3, code, description FROM crimes_evidence;",
+]
+
+DROP = "DROP TABLE IF EXISTS search_fts;"
+
+
+def create_search_index(apps, schema_editor):
+    statements = (
+        POSTGRES_CREATE
+        if schema_editor.connection.vendor == "postgresql"
+        else SQLITE_CREATE
+    )
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    schema_editor.execute(DROP)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("crimes", "0007_import_checkpoint"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,285 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:04
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The match-key helpers as they were when this migration was written, so the
+# backfill keeps producing these keys however crimes.name_matching changes.
+KEY_FIELDS = (
+    "name_normalized",
+    "first_name_phonetic",
+    "first_name_phonetic_alt",
+    "last_name_phonetic",
+    "last_name_phonetic_alt",
+)
+PHONETIC_LENGTH = 4
+
+_NON_ALPHA_RE = re.compile(r"[^a-z]+")
+_VOWELS = set("AEIOUY")
+
+
+def normalize(name):
+    """Lowercase ASCII letters only, words separated by single spaces."""
+    folded = unicodedata.normalize("NFKD", name or "")
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return _NON_ALPHA_RE.sub(" ", folded.lower()).strip()
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: each word padded with two leading spaces and one trailing."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def phonetic(word):
+    """(primary, alternate) phonetic codes for a single word.
+
+    Both codes are the same unless the spelling is ambiguous (e.g. "TH" may be
+    θ or T, "CH" may be X or K), in which case ``alternate`` holds the second
+    reading. An empty word gives two empty codes.
+    """
+    w = normalize(word).replace(" ", "").upper()
+    if not w:
+        return "", ""
+    primary, alternate = [], []
+
+    def add(p, a=None):
+        primary.append(p)
+        alternate.append(p if a is None else a)
+
+    def at(i, *subs):
+        return any(w.startswith(s, i) for s in subs)
+
+    def vowel(i):
+        return 0 <= i < len(w) and w[i] in _VOWELS
+
+    i = 0
+    if at(0, "GN", "KN", "PN", "WR", "PS"):
+        i = 1
+    elif w[0] == "X":
+        add("S")
+        i = 1
+    elif w[0] in _VOWELS:
+        add("A")
+        i = 1
+    while i < len(w) and len(primary) < PHONETIC_LENGTH * 2:
+        c = w[i]
+        if c in _VOWELS:
+            i += 1
+        elif c == "B":
+            add("P")
+            i += 2 if at(i + 1, "B") else 1
+        elif c == "C":
+            if at(i, "CHR") or at(i, "CHL"):
+                add("K")
+                i += 2
+            elif at(i, "CH"):
+                add("X", "K")
+                i += 2
+            elif at(i, "CIA"):
+                add("X")
+                i += 3
+            elif at(i + 1, "I", "E", "Y"):
+                add("S")
+                i += 2
+            else:
+                add("K")
+                i += 2 if at(i + 1, "K", "C", "Q", "G") else 1
+        elif c == "D":
+            if at(i, "DGE", "DGI", "DGY"):
+                add("J")
+                i += 3
+            else:
+                add("T")
+                i += 2 if at(i + 1, "T", "D") else 1
+        elif c == "G":
+            if at(i, "GH"):
+                if i > 0 and not vowel(i - 1):
+                    add("K")
+                i += 2
+            elif at(i, "GN"):
+                add("N", "KN")
+                i += 2
+            elif at(i + 1, "E", "I", "Y"):
+                add("J", "K")
+                i += 2
+            else:
+                add("K")
+                i += 2 if at(i + 1, "G") else 1
+        elif c == "H":
+            if (i == 0 or vowel(i - 1)) and vowel(i + 1):
+                add("H")
+            i += 1
+        elif c == "J":
+            if at(i, "JOSE"):
+                add("H", "J")
+            else:
+                add("J")
+            i += 2 if at(i + 1, "J") else 1
+        elif c == "P":
+            if at(i, "PH"):
+                add("F")
+                i += 2
+            elif i > 0 and w[i - 1] == "M" and at(i + 1, "S", "T"):
+                i += 1  # silent in Thompson, Simpson
+            else:
+                add("P")
+                i += 2 if at(i + 1, "P", "B") else 1
+        elif c == "Q":
+            add("K")
+            i += 2 if at(i + 1, "Q") else 1
+        elif c == "S":
+            if at(i, "SCH"):
+                add("X", "SK")
+                i += 3
+            elif at(i, "SH"):
+                add("X")
+                i += 2
+            elif at(i, "SIO", "SIA"):
+                add("S", "X")
+                i += 3
+            elif at(i, "SC") and at(i + 2, "E", "I", "Y"):
+                add("S")
+                i += 3
+            else:
+                add("S")
+                i += 2 if at(i + 1, "S", "Z") else 1
+        elif c == "T":
+            if at(i, "TION", "TIA", "TCH"):
+                add("X")
+                i += 3
+            elif at(i, "TH"):
+                # Thomas, Thompson: a plain T before "om"/"am".
+                add("T" if at(i + 2, "OM", "AM") else "0", "T")
+                i += 2
+            else:
+                add("T")
+                i += 2 if at(i + 1, "T", "D") else 1
+        elif c == "V":
+            add("F")
+            i += 2 if at(i + 1, "V") else 1
+        elif c == "W":
+            if i == 0 and vowel(1):
+                add("A", "F")
+            elif at(i, "WICZ", "WITZ"):
+                add("TS", "FX")
+                i += 3
+            i += 1
+        elif c == "X":
+            add("KS")
+            i += 2 if at(i + 1, "C", "X") else 1
+        elif c == "Z":
+            add("J" if at(i, "ZH") else "S", None if at(i, "ZH") else "TS")
+            i += 2 if at(i + 1, "Z", "H") else 1
+        else:  # F K L M N R and anything unlisted map to themselves
+            add(c)
+            i += 2 if at(i + 1, c) else 1
+    return (
+        "".join(primary)[:PHONETIC_LENGTH],
+        "".join(alternate)[:PHONETIC_LENGTH],
+    )
+
+
+def apply_keys(person):
+    person.name_normalized = normalize(f"{person.first_name} {person.last_name}")
+    first = normalize(person.first_name).split()
+    last = normalize(person.last_name).split()
+    person.first_name_phonetic, person.first_name_phonetic_alt = phonetic(
+        first[0] if first else ""
+    )
+    person.last_name_phonetic, person.last_name_phonetic_alt = phonetic(
+        last[-1] if last else ""
+    )
+
+
+def backfill_match_keys(apps, schema_editor):
+    Person = apps.get_model("crimes", "Person")
+    PersonTrigram = apps.get_model("crimes", "PersonTrigram")
+    last_pk = 0
+    while True:
+        batch = list(Person.objects.filter(pk__gt=last_pk).order_by("pk")[:2000])
+        if not batch:
+            break
+        for person in batch:
+            apply_keys(person)
+        Person.objects.bulk_update(batch, KEY_FIELDS)
+        PersonTrigram.objects.bulk_create(
+            PersonTrigram(person_id=p.pk, trigram=gram)
+            for p in batch
+            for gram in sorted(trigrams(p.name_normalized))
+        )
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crimes', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='first_name_phonetic',
+            field=models.CharField(blank=True, editable=False, max_length=8),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='first_name_phonetic_alt',
+            field=models.CharField(blank=True, editable=False, max_length=8),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='last_name_phonetic',
+            field=models.CharField(blank=True, editable=False, max_length=8),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='last_name_phonetic_alt',
+            field=models.CharField(blank=True, editable=False, max_length=8),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='name_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=201),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['last_name_phonetic'], name='person_last_ph_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['last_name_phonetic_alt'], name='person_last_ph_alt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['first_name_phonetic'], name='person_first_ph_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['first_name_phonetic_alt'], name='person_first_ph_alt_idx'),
+        ),
+        migrations.AddField(
+            model_name='persontrigram',
+            name='person',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_trigrams', to='crimes.person'),
+        ),
+        migrations.AddIndex(
+            model_name='persontrigram',
+            index=models.Index(fields=['trigram', 'person'], name='person_trigram_idx'),
+        ),
+        migrations.RunPython(backfill_match_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:12
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+_NON_ALPHA_RE = re.compile(r"[^a-z]+")
+
+
+def normalize(name):
+    # crimes.name_matching.normalize as of this migration, frozen here.
+    folded = unicodedata.normalize("NFKD", name or "")
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return _NON_ALPHA_RE.sub(" ", folded.lower()).strip()
+
+
+def backfill_name_reversed(apps, schema_editor):
+    Person = apps.get_model("crimes", "Person")
+    last_pk = 0
+    while True:
+        batch = list(Person.objects.filter(pk__gt=last_pk).order_by("pk")[:2000])
+        if not batch:
+            break
+        for person in batch:
+            person.name_reversed = normalize(f"{person.last_name} {person.first_name}")
+        Person.objects.bulk_update(batch, ["name_reversed"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crimes', '0009_person_match_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='name_reversed',
+            field=models.CharField(blank=True, editable=False, max_length=201),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['name_normalized', 'id'], name='person_name_norm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['name_reversed', 'id'], name='person_name_rev_idx'),
+        ),
+        migrations.RunPython(backfill_name_reversed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS mv_case_counts (status TEXT PRIMARY KEY, count INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS mv_case_counts_state (
+    id INTEGER PRIMARY KEY,
+    last_history_id BIGINT NOT NULL,
+    last_case_id BIGINT NOT NULL,
+    refreshed_at BIGINT NOT NULL
+);
+"""
+
+POPULATE_SQL = """
+DELETE FROM mv_case_counts;
+INSERT INTO mv_case_counts(status, count)
+SELECT status, COUNT(1) FROM crimes_case GROUP BY status;
+DELETE FROM mv_case_counts_state;
+INSERT INTO mv_case_counts_state(id, last_history_id, last_case_id, refreshed_at)
+SELECT 1,
+       COALESCE((SELECT MAX(id) FROM crimes_casestatushistory), 0),
+       COALESCE((SELECT MAX(id) FROM crimes_case), 0),
+       0;
+"""
+
+DROP_SQL = "DROP TABLE IF EXISTS mv_case_counts_state;"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("crimes", "0010_person_prefix_keys"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, reverse_sql=DROP_SQL),
+        migrations.RunSQL(POPULATE_SQL, reverse_sql=""),
+    ]
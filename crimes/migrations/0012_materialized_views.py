@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:27
+
+from django.db import migrations, models
+
+QUERY = """
+SELECT case_id, case_number, status, evidence_count, people_count,
+       assignment_count, history_count
+FROM view_case_summary
+"""
+
+INDEXES = [
+    "CREATE UNIQUE INDEX mv_case_summary_uniq ON mv_case_summary (case_id)",
+    "CREATE INDEX mv_case_summary_case_number_idx ON mv_case_summary (case_number)",
+]
+
+
+def create_case_summary(apps, schema_editor):
+    # Created empty; the first read or refresh_views populates it.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE MATERIALIZED VIEW mv_case_summary AS {QUERY} WITH NO DATA"
+        )
+    else:
+        schema_editor.execute(
+            f"CREATE TABLE mv_case_summary AS SELECT * FROM ({QUERY}) WHERE 0"
+        )
+    for sql in INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_case_summary(apps, schema_editor):
+    kind = (
+        "MATERIALIZED VIEW"
+        if schema_editor.connection.vendor == "postgresql"
+        else "TABLE"
+    )
+    schema_editor.execute(f"DROP {kind} IF EXISTS mv_case_summary")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crimes', '0011_case_counts_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterializedViewRefresh',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('refreshed_at', models.DateTimeField()),
+                ('duration', models.FloatField(help_text='Seconds')),
+            ],
+        ),
+        migrations.RunPython(create_case_summary, drop_case_summary),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:31
+
+from datetime import timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncHour
+
+# crimes.rollups.METRICS as of this migration, frozen here:
+# metric -> (model, timestamp field, status field or None, row filters).
+METRICS = {
+    "incidents_reported": ("Incident", "created_at", None, {}),
+    "cases_opened": ("Case", "created_at", None, {}),
+    "status_transitions": (
+        "CaseStatusHistory",
+        "changed_at",
+        "new_status",
+        {"old_status__isnull": False},
+    ),
+    "evidence_collected": ("Evidence", "created_at", None, {}),
+}
+
+
+def backfill_rollups(apps, schema_editor):
+    # Counts the rows that predate the rollups, like rollups.backfill().
+    ActivityRollup = apps.get_model("crimes", "ActivityRollup")
+    for metric, (model_name, ts_field, status_field, filters) in METRICS.items():
+        raw = apps.get_model("crimes", model_name).objects.filter(**filters)
+        for granularity, trunc in (("hour", TruncHour), ("day", TruncDay)):
+            grouped = (
+                raw.annotate(bucket=trunc(ts_field, tzinfo=dt_timezone.utc))
+                .values("bucket", *([status_field] if status_field else []))
+                .annotate(n=Count("pk"))
+                .order_by()
+            )
+            ActivityRollup.objects.bulk_create(
+                [
+                    ActivityRollup(
+                        granularity=granularity,
+                        metric=metric,
+                        status=row[status_field] if status_field else "",
+                        bucket=row["bucket"],
+                        count=row["n"],
+                    )
+                    for row in grouped.iterator(chunk_size=2000)
+                ],
+                batch_size=2000,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crimes', '0012_materialized_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('metric', models.CharField(max_length=30)),
+                ('status', models.CharField(blank=True, default='', max_length=20)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('metric', 'granularity', 'bucket', 'status'), name='uniq_activity_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crimes', '0013_activity_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='casestatushistory',
+            index=models.Index(fields=['case', 'changed_at', 'id'], name='history_case_changed_idx'),
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:41
+
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Months to create partitions for beyond the current one; afterwards
+# ``manage.py audit_log maintain`` keeps them ahead.
+MONTHS_AHEAD = 2
+
+
+def _add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc).isoformat()
+
+
+def partition_auditlog(apps, schema_editor):
+    """Rebuild ``crimes_auditlog`` as a table partitioned by month (PostgreSQL).
+
+    A partitioned table's primary key must include the partition key, so it
+    becomes ``(id, timestamp)``; ids still come from one sequence. Existing
+    rows are copied into their months' partitions.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    users = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    execute = schema_editor.execute
+    execute("ALTER TABLE crimes_auditlog RENAME TO crimes_auditlog_unpartitioned")
+    execute("CREATE SEQUENCE crimes_auditlog_partitioned_id_seq")
+    execute(
+        f"""
+        CREATE TABLE crimes_auditlog (
+            id bigint NOT NULL DEFAULT nextval('crimes_auditlog_partitioned_id_seq'),
+            action varchar(100) NOT NULL,
+            entity_type varchar(100) NOT NULL,
+            entity_id varchar(50) NOT NULL,
+            "timestamp" timestamp with time zone NOT NULL,
+            details text NOT NULL,
+            user_id bigint NULL
+                REFERENCES {users} (id) DEFERRABLE INITIALLY DEFERRED,
+            PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+        """
+    )
+    execute(
+        "CREATE TABLE crimes_auditlog_default PARTITION OF crimes_auditlog DEFAULT"
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT MIN("timestamp") FROM crimes_auditlog_unpartitioned')
+        (oldest,) = cursor.fetchone()
+    today = datetime.now(dt_timezone.utc).date()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        execute(
+            f"CREATE TABLE crimes_auditlog_p{month:%Y%m} PARTITION OF crimes_auditlog "
+            f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(_add_months(month, 1))}')"
+        )
+        month = _add_months(month, 1)
+    columns = 'id, action, entity_type, entity_id, "timestamp", details, user_id'
+    execute(
+        f"INSERT INTO crimes_auditlog ({columns}) "
+        f"SELECT {columns} FROM crimes_auditlog_unpartitioned"
+    )
+    execute(
+        "SELECT setval('crimes_auditlog_partitioned_id_seq', "
+        "COALESCE((SELECT MAX(id) FROM crimes_auditlog), 0) + 1, false)"
+    )
+    execute(
+        "ALTER SEQUENCE crimes_auditlog_partitioned_id_seq "
+        "OWNED BY crimes_auditlog.id"
+    )
+    execute("DROP TABLE crimes_auditlog_unpartitioned")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crimes', '0014_history_timeline_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month', unique=True)),
+                ('path', models.CharField(max_length=500)),
+                ('rows', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['month'],
+            },
+        ),
+        # Indexes added to the partitioned table cascade to every partition.
+        # Going back leaves the table partitioned, which the model still fits.
+        migrations.RunPython(partition_auditlog, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['timestamp', 'id'], name='auditlog_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['entity_type', 'entity_id', 'timestamp'], name='auditlog_entity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['user', 'timestamp'], name='auditlog_user_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:45
+
+from django.db import migrations, models
+
+# The view itself is created after every migrate (and dropped before it) by
+# crimes.audit_store.create_view, so later migrations can remake
+# crimes_auditlog on SQLite.
+
+
+def drop_view(apps, schema_editor):
+    schema_editor.execute("DROP VIEW IF EXISTS crimes_auditlog_all")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crimes', '0015_audit_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditTrail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(max_length=100)),
+                ('entity_type', models.CharField(max_length=100)),
+                ('entity_id', models.CharField(max_length=50)),
+                ('timestamp', models.DateTimeField()),
+                ('details', models.TextField(blank=True)),
+            ],
+            options={
+                'db_table': 'crimes_auditlog_all',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(migrations.RunPython.noop, drop_view),
+    ]
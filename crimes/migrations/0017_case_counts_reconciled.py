@@ -0,0 +1,37 @@
+import time
+
+from django.db import migrations
+
+
+def add_reconciled_at(apps, schema_editor):
+    # Recount while adding the column, so the first reconcile is due one
+    # interval after this migration rather than on the next dashboard read.
+    schema_editor.execute(
+        "ALTER TABLE mv_case_counts_state "
+        "ADD COLUMN reconciled_at BIGINT NOT NULL DEFAULT 0"
+    )
+    schema_editor.execute("DELETE FROM mv_case_counts")
+    schema_editor.execute(
+        "INSERT INTO mv_case_counts(status, count) "
+        "SELECT status, COUNT(1) FROM crimes_case GROUP BY status"
+    )
+    schema_editor.execute(
+        "UPDATE mv_case_counts_state SET reconciled_at = %s, last_history_id = "
+        "COALESCE((SELECT MAX(id) FROM crimes_casestatushistory), 0), "
+        "last_case_id = COALESCE((SELECT MAX(id) FROM crimes_case), 0)",
+        [int(time.time())],
+    )
+
+
+def drop_reconciled_at(apps, schema_editor):
+    schema_editor.execute("ALTER TABLE mv_case_counts_state DROP COLUMN reconciled_at")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("crimes", "0016_audit_trail_view"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_reconciled_at, drop_reconciled_at),
+    ]
@@ -1,5 +1,19 @@
-from django.db import models
+import logging
+
+from django.db import (
+    IntegrityError,
+    NotSupportedError,
+    connections,
+    models,
+    transaction,
+)
+from django.db.models import F
+from django.db.models.sql import Query
+from django.db.models.sql.datastructures import BaseTable
 from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
 
 
 class TimeStampedModel(models.Model):
@@ -10,6 +24,29 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
+class CaseCountedModel(models.Model):
+    """Keeps a ``CaseSummary`` counter in step with inserts of this model.
+
+    The insert and the counter bump share one transaction. Deletes are
+    handled by the ``post_delete`` receivers in ``signals.py`` (which run
+    inside the deletion collector's transaction, so they also cover
+    ``QuerySet.delete()``). ``bulk_create`` bypasses this; callers must use
+    ``CaseSummary.bump`` themselves.
+    """
+
+    summary_counter = None
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if creating:
+                CaseSummary.bump(self.case_id, **{self.summary_counter: 1})
+
+
 class Incident(TimeStampedModel):
     class Status(models.TextChoices):
         DRAFT = "draft", "Draft"
@@ -31,6 +68,52 @@ class Incident(TimeStampedModel):
     def __str__(self):
         return f"Incident #{self.pk} {self.title} ({self.status})"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="incident_created_id_idx"),
+        ]
+
+
+class CaseQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        if "status" in kwargs:
+            return self.update_status(kwargs.pop("status"), **kwargs)
+        return super().update(**kwargs)
+
+    def update_status(self, new_status, changed_by=None, **fields):
+        """Bulk status change that writes the same history rows as ``Case.save``.
+
+        One SELECT of the current statuses, one UPDATE, one history INSERT and
+        one summary-counter UPDATE, whatever the number of rows.
+        """
+        fields.setdefault("updated_at", timezone.now())
+        with transaction.atomic(using=self.db):
+            old = dict(self.select_for_update().values_list("pk", "status"))
+            if not old:
+                return 0
+            count = super().update(status=new_status, **fields)
+            changed = [pk for pk, status in old.items() if status != new_status]
+            history = CaseStatusHistory.objects.using(self.db).bulk_create(
+                CaseStatusHistory(
+                    case_id=pk,
+                    old_status=old[pk],
+                    new_status=new_status,
+                    changed_by=changed_by,
+                )
+                for pk in changed
+            )
+            CaseSummary.objects.using(self.db).filter(case_id__in=changed).update(
+                history_count=F("history_count") + 1, updated_at=fields["updated_at"]
+            )
+            # No post_save for QuerySet.update or bulk_create: tell the caches
+            # and rollups directly.
+            from . import dashboard, response_cache, rollups
+
+            rollups.record(history)
+            dashboard.invalidate()
+            response_cache.bump(Case)
+        return count
+
 
 class Case(TimeStampedModel):
     class Status(models.TextChoices):
@@ -61,43 +144,160 @@ class Case(TimeStampedModel):
         related_name="lead_cases",
     )
 
+    objects = CaseQuerySet.as_manager()
+
+    # Fields whose values as loaded are remembered, for changed_fields().
+    tracked_fields = ("status", "lead_investigator_id")
+
     def __str__(self):
         return f"Case {self.case_number} ({self.status})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded()
+        return instance
+
+    def _remember_loaded(self, fields=None):
+        """Snapshot the tracked fields, or only those among ``fields``."""
+        deferred = self.get_deferred_fields()
+        if fields is None:
+            self._loaded_values = {}
+        else:
+            fields = {self._meta.get_field(name).attname for name in fields}
+        loaded = getattr(self, "_loaded_values", {})
+        for name in self.tracked_fields:
+            if name not in deferred and (fields is None or name in fields):
+                loaded[name] = getattr(self, name)
+        self._loaded_values = loaded
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        self._remember_loaded(fields)
+
+    def changed_fields(self):
+        """``{field: (old, new)}`` for tracked fields changed since loading.
+
+        Tracked fields that were deferred or never loaded are not reported.
+        """
+        loaded = getattr(self, "_loaded_values", {})
+        return {
+            name: (old, getattr(self, name))
+            for name, old in loaded.items()
+            if getattr(self, name) != old
+        }
+
+    def _original_status(self):
+        loaded = getattr(self, "_loaded_values", {})
+        if "status" in loaded:
+            return loaded["status"]
+        # Built by hand or loaded with status deferred: nothing to compare
+        # against, so fall back to reading the stored value once.
+        return (
+            Case.objects.filter(pk=self.pk).values_list("status", flat=True).first()
+        )
+
     def save(self, *args, **kwargs):
-        creating = self.pk is None
+        creating = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        status_saved = update_fields is None or "status" in update_fields
         old_status = None
-        if not creating:
-            try:
-                old_status = Case.objects.only("status").get(pk=self.pk).status
-            except Case.DoesNotExist:
-                old_status = None
-        super().save(*args, **kwargs)
-        # Log status change AFTER saving (and not on initial create)
-        if not creating and old_status != self.status:
-            CaseStatusHistory.objects.create(
-                case=self,
-                old_status=old_status,
-                new_status=self.status,
-                changed_by=getattr(self, "_status_changed_by", None),
-            )
+        if not creating and status_saved:
+            old_status = self._original_status()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if creating:
+                CaseSummary.objects.create(case=self)
+            # Log status change AFTER saving (and not on initial create)
+            elif status_saved and old_status != self.status:
+                CaseStatusHistory.objects.create(
+                    case=self,
+                    old_status=old_status,
+                    new_status=self.status,
+                    changed_by=getattr(self, "_status_changed_by", None),
+                )
+        # Fields left out of update_fields still differ from the database.
+        self._remember_loaded(update_fields)
 
     class Meta:
         indexes = [
             models.Index(fields=["status"], name="case_status_idx"),
+            models.Index(fields=["created_at", "id"], name="case_created_id_idx"),
         ]
 
 
+class CaseNumberSequence(models.Model):
+    """Per-year case number counter (used where native sequences are unavailable)."""
+
+    year = models.PositiveIntegerField(primary_key=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_value}"
+
+
 class Person(TimeStampedModel):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     date_of_birth = models.DateField(null=True, blank=True)
+    # Match keys, maintained by crimes.name_matching.
+    name_normalized = models.CharField(max_length=201, blank=True, editable=False)
+    name_reversed = models.CharField(max_length=201, blank=True, editable=False)
+    first_name_phonetic = models.CharField(max_length=8, blank=True, editable=False)
+    first_name_phonetic_alt = models.CharField(
+        max_length=8, blank=True, editable=False
+    )
+    last_name_phonetic = models.CharField(max_length=8, blank=True, editable=False)
+    last_name_phonetic_alt = models.CharField(max_length=8, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}".strip()
 
+    def save(self, *args, **kwargs):
+        from .name_matching import KEY_FIELDS, NAME_FIELDS
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and NAME_FIELDS & set(update_fields):
+            # The pre_save receiver recomputes the keys; write them as well.
+            kwargs["update_fields"] = {*update_fields, *KEY_FIELDS}
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["last_name", "first_name", "id"], name="person_name_id_idx"
+            ),
+            models.Index(fields=["last_name_phonetic"], name="person_last_ph_idx"),
+            models.Index(
+                fields=["last_name_phonetic_alt"], name="person_last_ph_alt_idx"
+            ),
+            models.Index(fields=["first_name_phonetic"], name="person_first_ph_idx"),
+            models.Index(
+                fields=["first_name_phonetic_alt"], name="person_first_ph_alt_idx"
+            ),
+            # Prefix (typeahead) lookups by "first last" and "last first".
+            models.Index(fields=["name_normalized", "id"], name="person_name_norm_idx"),
+            models.Index(fields=["name_reversed", "id"], name="person_name_rev_idx"),
+        ]
+
+
+class PersonTrigram(models.Model):
+    """One row per trigram of a person's normalized name (a posting list)."""
+
+    person = models.ForeignKey(
+        Person, on_delete=models.CASCADE, related_name="name_trigrams"
+    )
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["trigram", "person"], name="person_trigram_idx"),
+        ]
+
+
+class CasePerson(CaseCountedModel, TimeStampedModel):
+    summary_counter = "people_count"
 
-class CasePerson(TimeStampedModel):
     class Role(models.TextChoices):
         SUSPECT = "suspect", "Suspect"
         VICTIM = "victim", "Victim"
@@ -120,7 +320,9 @@ class CasePerson(TimeStampedModel):
         return f"{self.person} as {self.role} in {self.case.case_number}"
 
 
-class Evidence(TimeStampedModel):
+class Evidence(CaseCountedModel, TimeStampedModel):
+    summary_counter = "evidence_count"
+
     code = models.CharField(max_length=50, unique=True)
     case = models.ForeignKey(
         Case, on_delete=models.CASCADE, related_name="evidence_items"
@@ -143,7 +345,9 @@ class Evidence(TimeStampedModel):
         ]
 
 
-class CaseStatusHistory(models.Model):
+class CaseStatusHistory(CaseCountedModel):
+    summary_counter = "history_count"
+
     case = models.ForeignKey(
         Case, on_delete=models.CASCADE, related_name="status_history"
     )
@@ -161,8 +365,18 @@ class CaseStatusHistory(models.Model):
     def __str__(self):
         return f"{self.case.case_number}: {self.old_status} -> {self.new_status} at {self.changed_at:%Y-%m-%d %H:%M:%S}"
 
+    class Meta:
+        indexes = [
+            # Per-case timelines in order (lifecycle analytics).
+            models.Index(
+                fields=["case", "changed_at", "id"], name="history_case_changed_idx"
+            ),
+        ]
+
+
+class CaseAssignment(CaseCountedModel, TimeStampedModel):
+    summary_counter = "assignment_count"
 
-class CaseAssignment(TimeStampedModel):
     class Role(models.TextChoices):
         LEAD = "lead", "Lead"
         INVESTIGATOR = "investigator", "Investigator"
@@ -183,6 +397,105 @@ class CaseAssignment(TimeStampedModel):
         return f"{self.user} -> {self.case.case_number} ({self.role})"
 
 
+class CaseSummary(models.Model):
+    """Per-case related-row counters, maintained incrementally on write.
+
+    Replaces the correlated ``COUNT`` subqueries that ``view_case_summary``
+    used to run per case; the view now joins this table on its primary key.
+    Drift can be checked and repaired with ``manage.py case_summary``.
+    """
+
+    COUNTERS = ("evidence_count", "people_count", "assignment_count", "history_count")
+
+    case = models.OneToOneField(
+        Case, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    evidence_count = models.IntegerField(default=0)
+    people_count = models.IntegerField(default=0)
+    assignment_count = models.IntegerField(default=0)
+    history_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "case_summary"
+
+    def __str__(self):
+        return f"Summary for case #{self.case_id}"
+
+    @classmethod
+    def bump(cls, case_id, **deltas):
+        """Apply counter deltas atomically in SQL (``col = col + delta``).
+
+        A missing row is logged and recreated from a recount, which already
+        includes the change being counted.
+        """
+        changes = {name: F(name) + delta for name, delta in deltas.items() if delta}
+        if not changes:
+            return
+        rows = cls.objects.filter(case_id=case_id)
+        if rows.update(updated_at=timezone.now(), **changes):
+            return
+        if not Case.objects.filter(pk=case_id).exists():
+            return
+        logger.warning("case_summary row for case %s was missing; recounting", case_id)
+        from .case_summary import actual_counts
+
+        try:
+            with transaction.atomic():
+                cls.objects.create(case_id=case_id, **actual_counts([case_id])[case_id])
+        except IntegrityError:
+            # Recreated concurrently, from a recount that cannot see this change.
+            rows.update(updated_at=timezone.now(), **changes)
+
+
+class AuditLogQuery(Query):
+    """Selects ``AuditLog`` rows through ``crimes_auditlog_all`` on SQLite.
+
+    There ``crimes_auditlog`` only holds the current month (see
+    ``crimes.audit_store``), so reads use the view of every month under the
+    table's alias. UPDATE and DELETE queries still target the table, and
+    ``AuditLogQuerySet`` refuses them when they match rolled rows.
+    """
+
+    def get_compiler(self, using=None, connection=None, elide_empty=True):
+        if connection is None:
+            connection = connections[using]
+        query = self
+        if connection.vendor == "sqlite":
+            query = self.clone()
+            alias = query.get_initial_alias()
+            query.alias_map[alias] = BaseTable(AuditTrail._meta.db_table, alias)
+            query.unref_alias(alias)
+        return super(AuditLogQuery, query).get_compiler(
+            using, connection, elide_empty
+        )
+
+
+class AuditLogQuerySet(models.QuerySet):
+    def __init__(self, model=None, query=None, using=None, hints=None):
+        if query is None:
+            query = AuditLogQuery(model)
+        super().__init__(model, query, using, hints)
+
+    def check_writable(self):
+        """Raise ``NotSupportedError`` if any row is in a rolled SQLite month."""
+        if connections[self.db].vendor != "sqlite":
+            return
+        live = self.model._base_manager.using(self.db).values("pk")
+        if self.exclude(pk__in=live).exists():
+            raise NotSupportedError(
+                "Audit rows of rolled months are read-only (see crimes.audit_store)"
+            )
+
+    def update(self, **kwargs):
+        self.check_writable()
+        return super().update(**kwargs)
+
+    def delete(self):
+        self.check_writable()
+        return super().delete()
+
+
 class AuditLog(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -197,5 +510,122 @@ class AuditLog(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     details = models.TextField(blank=True)
 
+    objects = AuditLogQuerySet.as_manager()
+
+    class Meta:
+        # On PostgreSQL the table is partitioned by month of ``timestamp``
+        # (see ``crimes.audit_store``); these indexes exist on every partition.
+        indexes = [
+            models.Index(fields=["timestamp", "id"], name="auditlog_time_idx"),
+            models.Index(
+                fields=["entity_type", "entity_id", "timestamp"],
+                name="auditlog_entity_idx",
+            ),
+            models.Index(fields=["user", "timestamp"], name="auditlog_user_idx"),
+        ]
+
     def __str__(self):
         return f"Audit[{self.timestamp:%Y-%m-%d %H:%M:%S}] {self.action} {self.entity_type}#{self.entity_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            AuditLog.objects.using(self._state.db).filter(pk=self.pk).check_writable()
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        AuditLog.objects.using(self._state.db).filter(pk=self.pk).check_writable()
+        return super().delete(*args, **kwargs)
+
+
+class AuditTrail(models.Model):
+    """Read-only ``AuditLog`` rows from every partition (``crimes_auditlog_all``).
+
+    A view maintained by ``crimes.audit_store``: the partitioned table itself
+    on PostgreSQL, and the current table plus the rolled monthly tables on
+    SQLite.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    action = models.CharField(max_length=100)
+    entity_type = models.CharField(max_length=100)
+    entity_id = models.CharField(max_length=50)
+    timestamp = models.DateTimeField()
+    details = models.TextField(blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "crimes_auditlog_all"
+
+    def __str__(self):
+        return f"{self.action} {self.entity_type}#{self.entity_id}"
+
+
+class ActivityRollup(models.Model):
+    """Events per hour or day bucket, maintained by ``crimes.rollups``."""
+
+    class Granularity(models.TextChoices):
+        HOUR = "hour", "Hour"
+        DAY = "day", "Day"
+
+    granularity = models.CharField(max_length=4, choices=Granularity.choices)
+    metric = models.CharField(max_length=30)
+    # New status for status_transitions; empty for the other metrics.
+    status = models.CharField(max_length=20, blank=True, default="")
+    bucket = models.DateTimeField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["metric", "granularity", "bucket", "status"],
+                name="uniq_activity_rollup",
+            ),
+        ]
+
+    def __str__(self):
+        label = f"{self.metric}[{self.status}]" if self.status else self.metric
+        return f"{label} {self.granularity} {self.bucket:%Y-%m-%d %H:%M}: {self.count}"
+
+
+class MaterializedViewRefresh(models.Model):
+    """When a view in ``crimes.matviews`` was last refreshed, and how long it took."""
+
+    name = models.CharField(max_length=100, primary_key=True)
+    refreshed_at = models.DateTimeField()
+    duration = models.FloatField(help_text="Seconds")
+
+    def __str__(self):
+        return f"{self.name} refreshed at {self.refreshed_at:%Y-%m-%d %H:%M:%S}"
+
+
+class AuditArchive(models.Model):
+    """A month of ``AuditLog`` rows moved to a compressed file by ``crimes.audit_store``."""
+
+    month = models.DateField(unique=True, help_text="First day of the month")
+    path = models.CharField(max_length=500)
+    rows = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    archived_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["month"]
+
+    def __str__(self):
+        return f"Audit archive {self.month:%Y-%m}: {self.rows} rows"
+
+
+class ImportCheckpoint(models.Model):
+    """Rows of a source file committed by ``import_records`` (for resume)."""
+
+    source = models.CharField(max_length=500, unique=True)
+    rows_done = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}: {self.rows_done} rows"
@@ -0,0 +1,360 @@
+"""Fuzzy and phonetic person-name matching.
+
+Every ``Person`` carries precomputed match keys: an accent-folded, lowercased
+``name_normalized`` (and ``name_reversed``, used for prefix lookups by
+surname) and primary/alternate phonetic codes for the first and
+last name (a compact Double Metaphone variant covering the common English,
+Germanic and Romance spellings). The trigrams of the normalized name live in
+``PersonTrigram`` with an index on ``(trigram, person)``.
+
+A lookup never scans the registry. Candidates come from two index probes: an
+equality match on the phonetic codes, and the trigram posting lists of the
+query. Each probe ranks its rows in SQL (phonetic matches by the number of
+matching keys, then shared trigrams) before keeping the best
+``MAX_CANDIDATES``. Only those candidates are scored, word by word, on
+trigram or phonetic similarity and, optionally, date of birth agreement.
+
+Keys are maintained by the ``pre_save``/``post_save`` receivers in
+``signals.py``. Bulk inserts call ``apply_keys`` before ``bulk_create`` and
+``index_people`` afterwards.
+"""
+
+import re
+import unicodedata
+
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models import Case as CaseWhen
+from django.db.models.functions import Coalesce
+
+from .models import Person, PersonTrigram
+
+NAME_FIELDS = {"first_name", "last_name"}
+PHONETIC_FIELDS = (
+    "first_name_phonetic",
+    "first_name_phonetic_alt",
+    "last_name_phonetic",
+    "last_name_phonetic_alt",
+)
+KEY_FIELDS = ("name_normalized", "name_reversed", *PHONETIC_FIELDS)
+PHONETIC_LENGTH = 4
+
+# Candidate pool per probe, and the lowest score worth returning.
+MAX_CANDIDATES = 500
+MIN_SCORE = 0.4
+PHONETIC_MATCH = 0.8
+DOB_EXACT_BONUS = 0.3
+DOB_YEAR_BONUS = 0.1
+DOB_MISMATCH_PENALTY = 0.2
+
+_NON_ALPHA_RE = re.compile(r"[^a-z]+")
+_VOWELS = set("AEIOUY")
+
+
+def normalize(name):
+    """Lowercase ASCII letters only, words separated by single spaces."""
+    folded = unicodedata.normalize("NFKD", name or "")
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return _NON_ALPHA_RE.sub(" ", folded.lower()).strip()
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: each word padded with two leading spaces and one trailing."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def phonetic(word):
+    """(primary, alternate) phonetic codes for a single word.
+
+    Both codes are the same unless the spelling is ambiguous (e.g. "TH" may be
+    θ or T, "CH" may be X or K), in which case ``alternate`` holds the second
+    reading. An empty word gives two empty codes.
+    """
+    w = normalize(word).replace(" ", "").upper()
+    if not w:
+        return "", ""
+    primary, alternate = [], []
+
+    def add(p, a=None):
+        primary.append(p)
+        alternate.append(p if a is None else a)
+
+    def at(i, *subs):
+        return any(w.startswith(s, i) for s in subs)
+
+    def vowel(i):
+        return 0 <= i < len(w) and w[i] in _VOWELS
+
+    i = 0
+    if at(0, "GN", "KN", "PN", "WR", "PS"):
+        i = 1
+    elif w[0] == "X":
+        add("S")
+        i = 1
+    elif w[0] in _VOWELS:
+        add("A")
+        i = 1
+    while i < len(w) and len(primary) < PHONETIC_LENGTH * 2:
+        c = w[i]
+        if c in _VOWELS:
+            i += 1
+        elif c == "B":
+            add("P")
+            i += 2 if at(i + 1, "B") else 1
+        elif c == "C":
+            if at(i, "CHR") or at(i, "CHL"):
+                add("K")
+                i += 2
+            elif at(i, "CH"):
+                add("X", "K")
+                i += 2
+            elif at(i, "CIA"):
+                add("X")
+                i += 3
+            elif at(i + 1, "I", "E", "Y"):
+                add("S")
+                i += 2
+            else:
+                add("K")
+                i += 2 if at(i + 1, "K", "C", "Q", "G") else 1
+        elif c == "D":
+            if at(i, "DGE", "DGI", "DGY"):
+                add("J")
+                i += 3
+            else:
+                add("T")
+                i += 2 if at(i + 1, "T", "D") else 1
+        elif c == "G":
+            if at(i, "GH"):
+                if i > 0 and not vowel(i - 1):
+                    add("K")
+                i += 2
+            elif at(i, "GN"):
+                add("N", "KN")
+                i += 2
+            elif at(i + 1, "E", "I", "Y"):
+                add("J", "K")
+                i += 2
+            else:
+                add("K")
+                i += 2 if at(i + 1, "G") else 1
+        elif c == "H":
+            if (i == 0 or vowel(i - 1)) and vowel(i + 1):
+                add("H")
+            i += 1
+        elif c == "J":
+            if at(i, "JOSE"):
+                add("H", "J")
+            else:
+                add("J")
+            i += 2 if at(i + 1, "J") else 1
+        elif c == "P":
+            if at(i, "PH"):
+                add("F")
+                i += 2
+            elif i > 0 and w[i - 1] == "M" and at(i + 1, "S", "T"):
+                i += 1  # silent in Thompson, Simpson
+            else:
+                add("P")
+                i += 2 if at(i + 1, "P", "B") else 1
+        elif c == "Q":
+            add("K")
+            i += 2 if at(i + 1, "Q") else 1
+        elif c == "S":
+            if at(i, "SCH"):
+                add("X", "SK")
+                i += 3
+            elif at(i, "SH"):
+                add("X")
+                i += 2
+            elif at(i, "SIO", "SIA"):
+                add("S", "X")
+                i += 3
+            elif at(i, "SC") and at(i + 2, "E", "I", "Y"):
+                add("S")
+                i += 3
+            else:
+                add("S")
+                i += 2 if at(i + 1, "S", "Z") else 1
+        elif c == "T":
+            if at(i, "TION", "TIA", "TCH"):
+                add("X")
+                i += 3
+            elif at(i, "TH"):
+                # Thomas, Thompson: a plain T before "om"/"am".
+                add("T" if at(i + 2, "OM", "AM") else "0", "T")
+                i += 2
+            else:
+                add("T")
+                i += 2 if at(i + 1, "T", "D") else 1
+        elif c == "V":
+            add("F")
+            i += 2 if at(i + 1, "V") else 1
+        elif c == "W":
+            if i == 0 and vowel(1):
+                add("A", "F")
+            elif at(i, "WICZ", "WITZ"):
+                add("TS", "FX")
+                i += 3
+            i += 1
+        elif c == "X":
+            add("KS")
+            i += 2 if at(i + 1, "C", "X") else 1
+        elif c == "Z":
+            add("J" if at(i, "ZH") else "S", None if at(i, "ZH") else "TS")
+            i += 2 if at(i + 1, "Z", "H") else 1
+        else:  # F K L M N R and anything unlisted map to themselves
+            add(c)
+            i += 2 if at(i + 1, c) else 1
+    return (
+        "".join(primary)[:PHONETIC_LENGTH],
+        "".join(alternate)[:PHONETIC_LENGTH],
+    )
+
+
+def apply_keys(person):
+    """Fill in the match-key fields of ``person`` (does not save)."""
+    person.name_normalized = normalize(f"{person.first_name} {person.last_name}")
+    person.name_reversed = normalize(f"{person.last_name} {person.first_name}")
+    first = normalize(person.first_name).split()
+    last = normalize(person.last_name).split()
+    # Multi-word names are keyed on their first given name and final surname.
+    person.first_name_phonetic, person.first_name_phonetic_alt = phonetic(
+        first[0] if first else ""
+    )
+    person.last_name_phonetic, person.last_name_phonetic_alt = phonetic(
+        last[-1] if last else ""
+    )
+    return person
+
+
+def index_people(people):
+    """Rewrite the trigram rows for ``people`` (which must have keys applied)."""
+    people = [p for p in people if p.pk is not None]
+    if not people:
+        return
+    PersonTrigram.objects.filter(person__in=[p.pk for p in people]).delete()
+    PersonTrigram.objects.bulk_create(
+        (
+            PersonTrigram(person_id=p.pk, trigram=gram)
+            for p in people
+            for gram in sorted(trigrams(p.name_normalized))
+        ),
+        batch_size=2000,
+    )
+
+
+def _phonetic_candidates(tokens, grams):
+    codes = set()
+    for token in tokens:
+        codes.update(code for code in phonetic(token) if code)
+    if not codes:
+        return []
+    # A common surname key can match thousands of rows; rank them before the
+    # cut so the best-sounding names are not lost behind low primary keys.
+    key_matches = sum(
+        (
+            CaseWhen(
+                When(**{f"{name}__in": codes}, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for name in PHONETIC_FIELDS
+        ),
+        Value(0),
+    )
+    shared = (
+        PersonTrigram.objects.filter(person=OuterRef("pk"), trigram__in=grams)
+        .values("person")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    return list(
+        Person.objects.filter(
+            Q(last_name_phonetic__in=codes)
+            | Q(last_name_phonetic_alt__in=codes)
+            | Q(first_name_phonetic__in=codes)
+            | Q(first_name_phonetic_alt__in=codes)
+        )
+        .annotate(
+            key_matches=key_matches,
+            shared=Coalesce(Subquery(shared), 0),
+        )
+        .order_by("-key_matches", "-shared", "pk")
+        .values_list("pk", flat=True)[:MAX_CANDIDATES]
+    )
+
+
+def _trigram_candidates(grams):
+    if not grams:
+        return []
+    # Demand a share of the query's trigrams so one common gram ("  s") does
+    # not pull in every Smith, Scott and Sanchez.
+    needed = max(1, len(grams) // 3)
+    return list(
+        PersonTrigram.objects.filter(trigram__in=grams)
+        .values("person_id")
+        .annotate(shared=Count("id"))
+        .filter(shared__gte=needed)
+        .order_by("-shared", "person_id")
+        .values_list("person_id", flat=True)[:MAX_CANDIDATES]
+    )
+
+
+def _word_keys(word):
+    return trigrams(word), set(phonetic(word)) - {""}
+
+
+def score(person, query_words, date_of_birth=None):
+    """Name similarity in [0, 1], adjusted by date of birth agreement.
+
+    Each query word is compared with the best-matching word of the person's
+    name: trigram similarity, or ``PHONETIC_MATCH`` if they sound alike,
+    whichever is higher. The name score is the mean over query words, so word
+    order and extra middle names do not matter.
+    """
+    person_words = [_word_keys(w) for w in person.name_normalized.split()]
+    if not person_words:
+        return 0.0
+    total = 0.0
+    for grams, codes in query_words:
+        total += max(
+            max(similarity(grams, p_grams), PHONETIC_MATCH if codes & p_codes else 0)
+            for p_grams, p_codes in person_words
+        )
+    value = total / len(query_words)
+    if date_of_birth and person.date_of_birth:
+        if person.date_of_birth == date_of_birth:
+            value += DOB_EXACT_BONUS
+        elif person.date_of_birth.year == date_of_birth.year:
+            value += DOB_YEAR_BONUS
+        else:
+            value -= DOB_MISMATCH_PENALTY
+    return round(value, 4)
+
+
+def find_people(q, date_of_birth=None, limit=20):
+    """People matching ``q`` best-first, each with a ``match_score`` attribute."""
+    query = normalize(q)
+    tokens = query.split()
+    if not tokens:
+        return []
+    query_words = [_word_keys(t) for t in tokens]
+    grams = trigrams(query)
+    ids = set(_phonetic_candidates(tokens, grams)) | set(_trigram_candidates(grams))
+    matches = []
+    for person in Person.objects.filter(pk__in=ids):
+        person.match_score = score(person, query_words, date_of_birth)
+        if person.match_score >= MIN_SCORE:
+            matches.append(person)
+    matches.sort(key=lambda p: (-p.match_score, p.last_name, p.first_name, p.pk))
+    return matches[:limit]
@@ -0,0 +1,184 @@
+import base64
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Opaque cursor pagination over a composite, unique ordering key.
+
+    Unlike DRF's ``CursorPagination`` (which keys on the first ordering field
+    and falls back to an offset for ties) the cursor stores every column of
+    ``ordering``; the next page is fetched with a row-value style ``WHERE``
+    so page N costs the same index range scan as page 1. No ``COUNT(*)`` is
+    ever issued. The last ordering field must be unique (normally ``id``).
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request, queryset.model)
+
+        order = _flip(self.ordering) if self.reverse else self.ordering
+        queryset = queryset.order_by(*order)
+        if position is not None:
+            queryset = queryset.filter(self._after_position(order, position))
+
+        # Fetch one extra row to learn whether another page exists.
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                size = int(raw)
+            except ValueError:
+                size = 0
+            if size > 0:
+                return min(size, self.max_page_size)
+        return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+    # ---- cursor encoding ----
+    def decode_cursor(self, request, model):
+        """``(position, reverse)`` from the request's cursor.
+
+        Each position value is converted with its ordering field's
+        ``to_python``, so a tampered cursor is a 404 rather than a bad query.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            position = payload["p"]
+            reverse = bool(payload.get("r", False))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        values = []
+        for name, value in zip(self.ordering, position):
+            if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+                raise NotFound(self.invalid_cursor_message)
+            field = model._meta.get_field(name.lstrip("-"))
+            try:
+                value = field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values, reverse
+
+    def encode_cursor(self, position, reverse):
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = True
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        token = base64.urlsafe_b64encode(raw).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def _link(self, obj, reverse):
+        position = [_key_value(obj, f.lstrip("-")) for f in self.ordering]
+        return self.encode_cursor(position, reverse)
+
+    @staticmethod
+    def _after_position(order, position):
+        """Expand ``(a, b, c) > (x, y, z)`` into an OR of equality prefixes.
+
+        Written out rather than as a row-value comparison so that mixed
+        ASC/DESC orderings work. The redundant ``a >= x`` in front gives the
+        planner a range on the leading column, so the index scan starts at
+        the cursor instead of filtering every row before it.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(order, position):
+            name = field.lstrip("-")
+            op = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{op}": value})
+            equal &= Q(**{name: value})
+        first = order[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": position[0]}) & condition
+
+
+class CreatedAtKeysetPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class PersonKeysetPagination(KeysetPagination):
+    ordering = ("last_name", "first_name", "id")
+
+
+class AuditKeysetPagination(KeysetPagination):
+    ordering = ("-timestamp", "-id")
+
+
+def _flip(ordering):
+    return tuple(f[1:] if f.startswith("-") else f"-{f}" for f in ordering)
+
+
+def _key_value(obj, name):
+    value = getattr(obj, name)
+    # Keep full microsecond precision; DjangoJSONEncoder would truncate it.
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
@@ -1,6 +1,7 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 from django.contrib.auth import get_user_model
 from .models import Case, Incident
+from . import authz
 
 User = get_user_model()
 
@@ -22,8 +23,10 @@ class RolePermission(BasePermission):
         if user.role == "viewer":
             return request.method in SAFE_METHODS
         if user.role == "officer":
-            # allow creating incidents and reading
-            if view.basename == "incident" and request.method == "POST":
+            # allow creating incidents and reading; plain APIViews have no
+            # router basename
+            basename = getattr(view, "basename", None)
+            if basename == "incident" and request.method == "POST":
                 return True
             return request.method in SAFE_METHODS
         if user.role == "investigator":
@@ -44,14 +47,20 @@ class RolePermission(BasePermission):
         if isinstance(obj, Case):
             if request.method in SAFE_METHODS:
                 return True
-            if user.role == "officer":
-                return False
-            if user.role == "investigator":
-                lead_id = getattr(obj, "lead_investigator_id", None)
-                if lead_id == user.id:
-                    return True
-                assignments = getattr(obj, "assignments", None)
-                if assignments is not None:
-                    return assignments.filter(user=user).exists()
-                return False
+            return authz.for_request(request).can_modify_case(obj)
         return False
+
+
+class AuditTrailPermission(BasePermission):
+    """Audit trail reads: investigators and compliance (``admin``) only."""
+
+    roles = ("admin", "investigator")
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user
+            and user.is_authenticated
+            and user.role in self.roles
+            and request.method in SAFE_METHODS
+        )
@@ -0,0 +1,79 @@
+import csv
+import json
+
+from django.db import connection
+from django.http import StreamingHttpResponse
+
+CASE_SUMMARY_COLUMNS = (
+    "case_id",
+    "case_number",
+    "status",
+    "evidence_count",
+    "people_count",
+    "assignment_count",
+    "history_count",
+)
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Materialized copy of ``view_case_summary`` (see ``matviews.py``); callers
+# make sure it is populated with ``matviews.ensure_populated``.
+CASE_SUMMARY_SOURCE = "mv_case_summary"
+
+
+def iter_case_summary(
+    columns=CASE_SUMMARY_COLUMNS, order_by=None, chunk_size=DEFAULT_CHUNK_SIZE
+):
+    """Yield case summary rows as tuples, ``chunk_size`` rows at a time.
+
+    Reads the materialized ``CASE_SUMMARY_SOURCE``, so rows are as of its
+    last refresh. Uses ``connection.chunked_cursor()`` which is a
+    server-side (named) cursor on Postgres, so neither the DB driver nor
+    Python ever holds more than one chunk of the result set.
+    """
+    sql = f"SELECT {', '.join(columns)} FROM {CASE_SUMMARY_SOURCE}"
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+    with connection.chunked_cursor() as cur:
+        cur.execute(sql)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+
+
+class _Echo:
+    """Pseudo-buffer for csv.writer: return each line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), default=str) + "\n"
+
+
+def stream_case_summary(fmt, columns=CASE_SUMMARY_COLUMNS, order_by=None):
+    """Return a StreamingHttpResponse exporting the case summary as csv/ndjson."""
+    rows = iter_case_summary(columns, order_by=order_by)
+    if fmt == "csv":
+        body = _csv_lines(columns, rows)
+    else:
+        body = _ndjson_lines(columns, rows)
+    response = StreamingHttpResponse(body, content_type=EXPORT_CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="case_summary.{fmt}"'
+    return response
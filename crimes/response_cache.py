@@ -0,0 +1,381 @@
+"""Generation-keyed cache for rendered API list responses.
+
+Every cached model has a generation counter. It is bumped by the
+save/delete receivers in ``signals.py`` and by the bulk write paths
+(``bump()``), once at the write and again on commit, so a response rendered
+from pre-commit data cannot outlive the commit. A response is stored under a
+key made of:
+
+* the view and action,
+* the sorted query parameters,
+* the caller's role and the negotiated format,
+* the current generation of every model the view depends on.
+
+Any write therefore makes the old entries unreachable; they are never
+purged explicitly and age out of the size-bounded LRU.
+
+Backends are pluggable through ``settings.RESPONSE_CACHE``:
+
+    RESPONSE_CACHE = {
+        "BACKEND": "locmem" | "file" | None,  # None disables caching
+        "LOCATION": "/var/cache/crimesdb",    # file backend only
+        "MAX_BYTES": 64 * 1024 * 1024,
+        "TIMEOUT": 300,                      # upper bound on staleness
+    }
+
+``locmem`` is per process. ``file`` is shared by every worker on the host.
+Generations must reach every worker whatever the backend, so they live in
+the Django cache only when that is shared between processes (Redis, for
+instance); with the default per-process cache they are kept as small files
+in ``LOCATION/generations`` (the file backend's directory by default).
+Hit and miss counts are kept per view in the serving process and exposed on
+``/metrics``.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+GENERATION_PREFIX = "response-cache:generation:"
+DEFAULTS = {"BACKEND": "locmem", "MAX_BYTES": 64 * 1024 * 1024, "TIMEOUT": 300}
+
+
+def _default_location():
+    return os.path.join(tempfile.gettempdir(), "crimesdb-response-cache")
+
+
+class LocMemBackend:
+    """In-process LRU bounded by the total size of stored bodies."""
+
+    def __init__(self, max_bytes, **options):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value, _ = entry
+            if expires < time.time():
+                self._pop(key)
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout, size):
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._pop(key)
+            self.entries[key] = (time.time() + timeout, value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._pop(next(iter(self.entries)))
+
+    def _pop(self, key):
+        _, _, size = self.entries.pop(key)
+        self.size -= size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class FileBackend:
+    """One file per entry; LRU by mtime, which a hit refreshes.
+
+    Each process tracks an estimate of the directory size and rescans it
+    (evicting the oldest files down to 90% of ``max_bytes``) once the
+    estimate passes the limit.
+    """
+
+    suffix = ".cache"
+
+    def __init__(self, max_bytes, location=None, **options):
+        self.max_bytes = max_bytes
+        self.location = location or _default_location()
+        os.makedirs(self.location, exist_ok=True)
+        self.lock = threading.Lock()
+        self.size = sum(size for _, _, size in self._scan())
+
+    def _path(self, key):
+        return os.path.join(self.location, key + self.suffix)
+
+    def _scan(self):
+        for entry in os.scandir(self.location):
+            if entry.name.endswith(self.suffix):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, entry.path, stat.st_size
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                expires, value = pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires < time.time():
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value, timeout, size):
+        if size > self.max_bytes:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.location, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump((time.time() + timeout, value), fh, pickle.HIGHEST_PROTOCOL)
+            written = fh.tell()
+        os.replace(tmp, self._path(key))
+        with self.lock:
+            self.size += written
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        files = sorted(self._scan())
+        total = sum(size for _, _, size in files)
+        target = self.max_bytes * 0.9
+        for _, path, size in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self.size = total
+
+    def clear(self):
+        with self.lock:
+            for _, path, _ in list(self._scan()):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self.size = 0
+
+
+BACKENDS = {"locmem": LocMemBackend, "file": FileBackend}
+
+
+class CacheGenerations:
+    """Generation counters in the Django cache, when it is shared."""
+
+    def get_many(self, keys):
+        found = cache.get_many(keys)
+        for key in keys:
+            if key not in found:
+                # Start from the clock, not 0, so a cleared or evicted counter
+                # cannot come back to a value old entries were stored under.
+                cache.add(key, time.time_ns(), timeout=None)
+                found[key] = cache.get(key)
+        return [found[key] for key in keys]
+
+    def bump(self, key):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+class FileGenerations:
+    """One small file per counter, shared by every process on the host."""
+
+    def __init__(self, location):
+        self.location = location
+        os.makedirs(location, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.location, key.replace(":", "_"))
+
+    def _read(self, path):
+        try:
+            with open(path, encoding="ascii") as fh:
+                return int(fh.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path, value):
+        fd, tmp = tempfile.mkstemp(dir=self.location, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="ascii") as fh:
+            fh.write(str(value))
+        os.replace(tmp, path)
+        return value
+
+    def get_many(self, keys):
+        values = []
+        for key in keys:
+            path = self._path(key)
+            value = self._read(path)
+            values.append(value if value is not None else self.bump(key))
+        return values
+
+    def bump(self, key):
+        # Clock-based and strictly increasing, so concurrent bumpers never
+        # hand out a value that entries were already stored under.
+        path = self._path(key)
+        return self._write(path, max(time.time_ns(), (self._read(path) or 0) + 1))
+
+
+hits = Counter()
+misses = Counter()
+_backend = None
+_backend_config = None
+_backend_lock = threading.Lock()
+_generations = None
+_generations_config = None
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, "RESPONSE_CACHE", {})}
+
+
+def get_backend():
+    """The configured backend, or None when caching is disabled."""
+    global _backend, _backend_config
+    config = _config()
+    if not config["BACKEND"]:
+        return None
+    with _backend_lock:
+        if _backend is None or _backend_config != config:
+            _backend = BACKENDS[config["BACKEND"]](
+                max_bytes=config["MAX_BYTES"], location=config.get("LOCATION")
+            )
+            _backend_config = config
+        return _backend
+
+
+def get_generations():
+    """The generation store every worker can see (see the module docstring)."""
+    global _generations, _generations_config
+    if isinstance(caches["default"], (LocMemCache, DummyCache)):
+        location = _config().get("LOCATION") or _default_location()
+        config = os.path.join(location, "generations")
+    else:
+        config = None
+    with _backend_lock:
+        if _generations is None or _generations_config != config:
+            if config is None:
+                _generations = CacheGenerations()
+            else:
+                _generations = FileGenerations(config)
+            _generations_config = config
+        return _generations
+
+
+def _generation_key(model):
+    return f"{GENERATION_PREFIX}{model._meta.label_lower}"
+
+
+def generations(models):
+    return get_generations().get_many([_generation_key(m) for m in models])
+
+
+def _bump_now(models):
+    store = get_generations()
+    for model in models:
+        store.bump(_generation_key(model))
+
+
+def bump(*models):
+    """Invalidate cached responses built from ``models`` now and on commit."""
+    _bump_now(models)
+    transaction.on_commit(lambda: _bump_now(models))
+
+
+def make_key(view_name, request, models):
+    role = getattr(request.user, "role", "")
+    fmt = getattr(request.accepted_renderer, "format", "")
+    params = sorted(request.query_params.lists())
+    raw = repr((view_name, role, fmt, params, generations(models)))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class CachedListMixin:
+    """Serve ``list`` from the response cache.
+
+    Views set ``cache_models`` to every model their list output is built
+    from. Placed before ``ConditionalGetMixin`` so a hit still answers
+    If-None-Match with a 304.
+    """
+
+    cache_models = ()
+
+    def _response_cache_name(self):
+        return f"{self.basename}-list"
+
+    def list(self, request, *args, **kwargs):
+        backend = get_backend()
+        if backend is None:
+            return super().list(request, *args, **kwargs)
+        name = self._response_cache_name()
+        key = make_key(name, request, self.cache_models)
+        cached = backend.get(key)
+        if cached is not None:
+            hits[name] += 1
+            content, headers = cached
+            etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+            not_modified = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=parse_http_date_safe(last_modified or ""),
+            )
+            response = not_modified or HttpResponse(content)
+            for header, value in headers.items():
+                if not_modified is None or header != "Content-Type":
+                    response[header] = value
+            return response
+        misses[name] += 1
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            self._response_cache_store = (backend, key)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        store = getattr(self, "_response_cache_store", None)
+        if store is not None and hasattr(response, "render"):
+            backend, key = store
+            response.render()
+            headers = {
+                header: response[header]
+                for header in ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+                if response.has_header(header)
+            }
+            backend.set(
+                key,
+                (response.content, headers),
+                timeout=_config()["TIMEOUT"],
+                size=len(response.content),
+            )
+        return response
+
+
+def stats():
+    names = sorted(set(hits) | set(misses))
+    return {name: {"hits": hits[name], "misses": misses[name]} for name in names}
@@ -0,0 +1,208 @@
+"""Hourly and daily activity rollups.
+
+``ActivityRollup`` holds one counter per ``(granularity, metric, status,
+bucket)``:
+
+* ``incidents_reported``: ``Incident.created_at``;
+* ``cases_opened``: ``Case.created_at``;
+* ``status_transitions``: ``CaseStatusHistory.changed_at`` by ``new_status``
+  (the row written when a case is opened is not a transition);
+* ``evidence_collected``: ``Evidence.created_at``.
+
+Buckets are UTC hour and day starts. Counters are bumped as rows are
+inserted: by the ``post_save`` receivers in ``signals.py``, and by the bulk
+paths, which call ``record`` with the created objects. The bump runs once the
+insert commits, in its own short transaction, so concurrent writers queue on
+the current hour's rows only briefly (and rolled-back inserts are never
+counted). Rollups count events, so deleting a row does not decrement them;
+``manage.py backfill_rollups`` recomputes any range from the raw tables,
+including increments lost to a crash between commit and bump.
+
+``series`` answers range queries from the rollups alone: hour and day
+directly, week, month and year by summing day rows (365 per metric and
+year).
+"""
+
+from collections import Counter
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import (
+    TruncDay,
+    TruncHour,
+    TruncMonth,
+    TruncWeek,
+    TruncYear,
+)
+
+from .models import ActivityRollup, Case, CaseStatusHistory, Evidence, Incident
+
+HOUR = ActivityRollup.Granularity.HOUR
+DAY = ActivityRollup.Granularity.DAY
+
+# metric -> (model, timestamp field, status field or None, row filters)
+METRICS = {
+    "incidents_reported": (Incident, "created_at", None, {}),
+    "cases_opened": (Case, "created_at", None, {}),
+    "status_transitions": (
+        CaseStatusHistory,
+        "changed_at",
+        "new_status",
+        {"old_status__isnull": False},
+    ),
+    "evidence_collected": (Evidence, "created_at", None, {}),
+}
+
+INTERVALS = {
+    "hour": (HOUR, None),
+    "day": (DAY, None),
+    "week": (DAY, TruncWeek),
+    "month": (DAY, TruncMonth),
+    "year": (DAY, TruncYear),
+}
+TRUNC = {HOUR: TruncHour, DAY: TruncDay}
+
+
+def bucket_start(ts, granularity):
+    ts = ts.astimezone(dt_timezone.utc)
+    if granularity == HOUR:
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _matches(obj, filters):
+    """Evaluate ``METRICS`` row filters (exact or ``isnull``) on an instance."""
+    for lookup, value in filters.items():
+        field, _, op = lookup.partition("__")
+        if op == "isnull":
+            if (getattr(obj, field) is None) != value:
+                return False
+        elif getattr(obj, field) != value:
+            return False
+    return True
+
+
+def _increments(objs):
+    counts = Counter()
+    for obj in objs:
+        for metric, (model, ts_field, status_field, filters) in METRICS.items():
+            if not isinstance(obj, model) or not _matches(obj, filters):
+                continue
+            ts = getattr(obj, ts_field)
+            if ts is None:
+                continue
+            status = getattr(obj, status_field) if status_field else ""
+            for granularity in (HOUR, DAY):
+                key = (granularity, metric, status, bucket_start(ts, granularity))
+                counts[key] += 1
+    return counts
+
+
+def _bump(granularity, metric, status, bucket, n):
+    rows = ActivityRollup.objects.filter(
+        granularity=granularity, metric=metric, status=status, bucket=bucket
+    )
+    if rows.update(count=F("count") + n):
+        return
+    try:
+        with transaction.atomic():
+            ActivityRollup.objects.create(
+                granularity=granularity,
+                metric=metric,
+                status=status,
+                bucket=bucket,
+                count=n,
+            )
+    except IntegrityError:
+        # A concurrent insert created the bucket first.
+        rows.update(count=F("count") + n)
+
+
+def _apply(counts):
+    with transaction.atomic():
+        # Sorted, so concurrent bumps lock rows in the same order.
+        for key, n in sorted(counts.items()):
+            _bump(*key, n)
+
+
+def record(objs):
+    """Count newly inserted ``objs`` (of any tracked model) once this commits."""
+    counts = _increments(objs)
+    if counts:
+        transaction.on_commit(lambda: _apply(counts))
+
+
+def backfill(start=None, end=None, metrics=None):
+    """Recompute rollups for buckets in ``[start, end)`` from the raw tables.
+
+    ``start`` and ``end`` are truncated to day starts, and either may be None
+    for an open range. Returns the number of rollup rows written.
+    """
+    start = start and bucket_start(start, DAY)
+    end = end and bucket_start(end, DAY)
+    written = 0
+    for metric in metrics or METRICS:
+        model, ts_field, status_field, filters = METRICS[metric]
+        raw = model.objects.filter(**filters)
+        stored = ActivityRollup.objects.filter(metric=metric)
+        if start is not None:
+            raw = raw.filter(**{f"{ts_field}__gte": start})
+            stored = stored.filter(bucket__gte=start)
+        if end is not None:
+            raw = raw.filter(**{f"{ts_field}__lt": end})
+            stored = stored.filter(bucket__lt=end)
+        with transaction.atomic():
+            stored.delete()
+            for granularity, trunc in TRUNC.items():
+                grouped = (
+                    raw.annotate(bucket=trunc(ts_field, tzinfo=dt_timezone.utc))
+                    .values("bucket", *([status_field] if status_field else []))
+                    .annotate(n=Count("pk"))
+                    .order_by()
+                )
+                rows = [
+                    ActivityRollup(
+                        granularity=granularity,
+                        metric=metric,
+                        status=row[status_field] if status_field else "",
+                        bucket=row["bucket"],
+                        count=row["n"],
+                    )
+                    for row in grouped.iterator(chunk_size=2000)
+                ]
+                ActivityRollup.objects.bulk_create(rows, batch_size=2000)
+                written += len(rows)
+    return written
+
+
+def series(metric, interval, start, end, status=None):
+    """``[{"bucket": datetime, "status": str, "count": int}]`` for ``[start, end)``.
+
+    Only buckets with activity are returned. ``status`` filters
+    ``status_transitions`` by new status.
+    """
+    granularity, trunc = INTERVALS[interval]
+    rows = ActivityRollup.objects.filter(
+        granularity=granularity, metric=metric, bucket__gte=start, bucket__lt=end
+    )
+    if status:
+        rows = rows.filter(status=status)
+    if trunc is not None:
+        rows = rows.annotate(period=trunc("bucket", tzinfo=dt_timezone.utc))
+    else:
+        rows = rows.annotate(period=F("bucket"))
+    return [
+        {"bucket": row["period"], "status": row["status"], "count": row["total"]}
+        for row in rows.values("period", "status")
+        .annotate(total=Sum("count"))
+        .order_by("period", "status")
+    ]
+
+
+def day_range(first, last):
+    """``[start, end)`` datetimes covering the dates ``first`` to ``last``."""
+    return (
+        datetime.combine(first, dt_time.min, tzinfo=dt_timezone.utc),
+        datetime.combine(last + timedelta(days=1), dt_time.min, tzinfo=dt_timezone.utc),
+    )
@@ -0,0 +1,178 @@
+"""Full-text search over incidents, cases and evidence.
+
+All three live in one ``search_fts`` index: an FTS5 virtual table on SQLite,
+or a table with a weighted, generated ``tsvector`` column and a GIN index on
+Postgres (see migration ``0008_search_index``). The document id packs the
+entity type into the low bits of the primary key (``pk * 4 + code``), so
+every update or delete is a rowid/primary-key lookup rather than a scan.
+
+Rows are kept in sync by the ``post_save``/``post_delete`` receivers in
+``signals.py``; bulk inserts call ``index_objects`` themselves.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Case, Evidence, Incident
+
+ENTITY_CODES = {"incident": 1, "case": 2, "evidence": 3}
+ENTITY_TYPES = {code: name for name, code in ENTITY_CODES.items()}
+MODEL_TYPES = {Incident: "incident", Case: "case", Evidence: "evidence"}
+INDEXED_FIELDS = {"title", "description", "code", "case_number"}
+
+# Title matches count ten times as much as description matches.
+TITLE_WEIGHT = 10.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def doc_id(entity_type, pk):
+    return int(pk) * 4 + ENTITY_CODES[entity_type]
+
+
+def document_for(obj):
+    entity_type = MODEL_TYPES[type(obj)]
+    if entity_type == "case":
+        title = f"{obj.case_number} {obj.title}"
+    elif entity_type == "evidence":
+        title = obj.code
+    else:
+        title = obj.title
+    return doc_id(entity_type, obj.pk), title, obj.description or ""
+
+
+def index_objects(objs):
+    """Insert or refresh the search documents for ``objs``."""
+    rows = [document_for(obj) for obj in objs]
+    if not rows:
+        return
+    if connection.vendor == "postgresql":
+        sql = (
+            "INSERT INTO search_fts (doc_id, title, body) VALUES (%s, %s, %s) "
+            "ON CONFLICT (doc_id) DO UPDATE "
+            "SET title = EXCLUDED.title, body = EXCLUDED.body"
+        )
+    else:
+        sql = "INSERT OR REPLACE INTO search_fts (rowid, title, body) VALUES (%s, %s, %s)"
+    with connection.cursor() as cur:
+        cur.executemany(sql, rows)
+
+
+def remove_objects(objs):
+    ids = [doc_id(MODEL_TYPES[type(obj)], obj.pk) for obj in objs]
+    if not ids:
+        return
+    column = "doc_id" if connection.vendor == "postgresql" else "rowid"
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cur:
+        cur.execute(f"DELETE FROM search_fts WHERE {column} IN ({placeholders})", ids)
+
+
+def remove_orphans(model):
+    """Delete ``model`` documents whose row no longer exists; returns the count."""
+    code = ENTITY_CODES[MODEL_TYPES[model]]
+    column = "doc_id" if connection.vendor == "postgresql" else "rowid"
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    # No params, so ``%`` is passed through to the database as-is.
+    sql = (
+        f"DELETE FROM search_fts WHERE {column} % 4 = {code} AND NOT EXISTS "
+        f"(SELECT 1 FROM {table} WHERE {table}.{pk} = search_fts.{column} / 4)"
+    )
+    with connection.cursor() as cur:
+        cur.execute(sql)
+        return cur.rowcount
+
+
+def _fts5_query(q):
+    """Turn free text into a safe FTS5 query: AND of quoted terms, last one prefix."""
+    tokens = _TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    quoted = [f'"{t}"' for t in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _match_clause(q):
+    """(where-sql, params, doc-id column) matching ``q``, or None for an empty query."""
+    if connection.vendor == "postgresql":
+        if not _TOKEN_RE.search(q):
+            return None
+        return "document @@ websearch_to_tsquery('english', %s)", [q], "doc_id"
+    match = _fts5_query(q)
+    if match is None:
+        return None
+    return "search_fts MATCH %s", [match], "rowid"
+
+
+def matching_ids(q, entity_type):
+    """RawSQL subquery of primary keys of ``entity_type`` rows matching ``q``.
+
+    For use as ``Model.objects.filter(pk__in=matching_ids(...))`` so callers
+    can keep their own ordering and keyset pagination.
+    """
+    clause = _match_clause(q)
+    if clause is None:
+        return None
+    where, params, column = clause
+    code = ENTITY_CODES[entity_type]
+    return RawSQL(
+        f"SELECT {column} / 4 FROM search_fts WHERE {where} AND {column} %% 4 = {code}",
+        params,
+    )
+
+
+def search(q, types=None, limit=20, offset=0):
+    """Ranked matches as dicts with ``type``, ``id``, ``title``, ``snippet``, ``rank``.
+
+    Fetches ``limit + 1`` rows so callers can tell whether another page exists
+    without counting.
+    """
+    clause = _match_clause(q)
+    if clause is None:
+        return []
+    where, params, column = clause
+    if types:
+        codes = ", ".join(str(ENTITY_CODES[t]) for t in types)
+        where += f" AND {column} %% 4 IN ({codes})"
+    if connection.vendor == "postgresql":
+        sql = f"""
+            SELECT m.doc_id, m.title,
+                   ts_headline('english', m.body, websearch_to_tsquery('english', %s),
+                               'MaxFragments=1, MaxWords=12, MinWords=4'),
+                   m.rank
+            FROM (
+                SELECT doc_id, title, body,
+                       ts_rank_cd(document, websearch_to_tsquery('english', %s)) AS rank
+                FROM search_fts WHERE {where}
+                ORDER BY rank DESC, doc_id
+                LIMIT %s OFFSET %s
+            ) m
+            ORDER BY m.rank DESC, m.doc_id
+        """
+        params = [q, q, *params, limit + 1, offset]
+    else:
+        sql = f"""
+            SELECT rowid, title, snippet(search_fts, 1, '[', ']', '…', 12),
+                   -bm25(search_fts, {TITLE_WEIGHT}, 1.0) AS rank
+            FROM search_fts WHERE {where}
+            ORDER BY bm25(search_fts, {TITLE_WEIGHT}, 1.0), rowid
+            LIMIT %s OFFSET %s
+        """
+        params = [*params, limit + 1, offset]
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    return [
+        {
+            "type": ENTITY_TYPES[doc % 4],
+            "id": doc // 4,
+            "title": title,
+            "snippet": snippet,
+            "rank": round(float(rank), 4),
+        }
+        for doc, title, snippet, rank in rows
+    ]
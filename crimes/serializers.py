@@ -1,6 +1,14 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Incident, Case, Person, CasePerson, Evidence, CaseStatusHistory
+from .models import (
+    Incident,
+    Case,
+    Person,
+    CasePerson,
+    Evidence,
+    CaseStatusHistory,
+    AuditTrail,
+)
 
 User = get_user_model()
 
@@ -27,6 +35,13 @@ class PersonSerializer(serializers.ModelSerializer):
         fields = ["id", "first_name", "last_name", "date_of_birth"]
 
 
+class PersonMatchSerializer(PersonSerializer):
+    score = serializers.FloatField(source="match_score", read_only=True)
+
+    class Meta(PersonSerializer.Meta):
+        fields = PersonSerializer.Meta.fields + ["score"]
+
+
 class PersonCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Person
@@ -89,3 +104,21 @@ class CaseAddEvidenceSerializer(serializers.Serializer):
 
 class EscalateIncidentSerializer(serializers.Serializer):
     lead_investigator_user_id = serializers.IntegerField()
+
+
+class AuditTrailSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source="user.username", read_only=True)
+
+    class Meta:
+        model = AuditTrail
+        fields = [
+            "id",
+            "timestamp",
+            "user",
+            "username",
+            "action",
+            "entity_type",
+            "entity_id",
+            "details",
+        ]
+        read_only_fields = fields
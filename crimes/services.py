@@ -1,40 +1,24 @@
-from django.db import transaction
-from django.utils import timezone
+from django.db import IntegrityError
 from django.conf import settings
-from .models import Incident, Case, CaseStatusHistory, AuditLog
+from .models import Incident, Case, CaseStatusHistory, CaseSummary, Evidence
+from . import audit, dashboard, response_cache, rollups, search
+from .case_numbers import allocate_case_numbers
 
 
 def log_action(user, entity, action, details: str = ""):
-    AuditLog.objects.create(
-        user=user,
-        action=action,
-        entity_type=entity.__class__.__name__,
-        entity_id=str(getattr(entity, "pk", "")),
-        details=details,
-    )
+    """Record an audit entry; written in bulk before the transaction commits."""
+    audit.record(audit.build_entry(user, entity, action, details))
 
 
 def _generate_case_number():
     """Generate sequential case number CASE-YYYY-XXXX where XXXX is zero-padded sequence per year."""
-    year = timezone.now().year
-    prefix = f"CASE-{year}-"
-    from django.db.models import Max
-
-    latest = Case.objects.filter(case_number__startswith=prefix).aggregate(
-        m=Max("case_number")
-    )["m"]
-    if latest:
-        try:
-            seq = int(latest.split("-")[-1]) + 1
-        except ValueError:
-            seq = 1
-    else:
-        seq = 1
-    return f"{prefix}{seq:04d}"
+    return allocate_case_numbers(1)[0]
 
 
-@transaction.atomic
-def escalate_incident(incident_id: int, lead_investigator_user_id: int):
+@audit.atomic()
+def escalate_incident(
+    incident_id: int, lead_investigator_user_id: int, case_number: str | None = None
+):
     incident = Incident.objects.select_for_update().get(pk=incident_id)
     if incident.status == Incident.Status.ESCALATED:
         return Case.objects.get(incident=incident)
@@ -42,9 +26,9 @@ def escalate_incident(incident_id: int, lead_investigator_user_id: int):
     # Ensure submitted status first
     if incident.status != Incident.Status.SUBMITTED:
         incident.status = Incident.Status.SUBMITTED
-        incident.save(update_fields=["status"])
+        incident.save(update_fields=["status", "updated_at"])
 
-    case_number = _generate_case_number()
+    case_number = case_number or _generate_case_number()
     Case_model = Case  # local alias
     lead_user = settings.AUTH_USER_MODEL and Case_model._meta.apps.get_model(
         settings.AUTH_USER_MODEL
@@ -68,7 +52,7 @@ def escalate_incident(incident_id: int, lead_investigator_user_id: int):
     )
 
     incident.status = Incident.Status.ESCALATED
-    incident.save(update_fields=["status"])
+    incident.save(update_fields=["status", "updated_at"])
 
     log_action(
         lead,
@@ -79,7 +63,17 @@ def escalate_incident(incident_id: int, lead_investigator_user_id: int):
     return case
 
 
-@transaction.atomic
+@audit.atomic()
+def escalate_incidents(incident_ids, lead_investigator_user_id: int):
+    """Escalate several incidents, reserving all case numbers in one block."""
+    numbers = allocate_case_numbers(len(incident_ids))
+    return [
+        escalate_incident(incident_id, lead_investigator_user_id, case_number=number)
+        for incident_id, number in zip(incident_ids, numbers)
+    ]
+
+
+@audit.atomic()
 def close_case(case_id: int, user_id: int, reason: str = ""):
     """Transition a case to CLOSED status if allowed.
 
@@ -103,7 +97,7 @@ ALLOWED_CASE_STATUS_TRANSITIONS = {
 }
 
 
-@transaction.atomic
+@audit.atomic()
 def change_case_status(case_id: int, user_id: int, new_status: str, reason: str = ""):
     case = Case.objects.select_for_update().get(pk=case_id)
     if new_status == case.status:
@@ -123,3 +117,62 @@ def change_case_status(case_id: int, user_id: int, new_status: str, reason: str
     case.save(update_fields=["status", "updated_at"])
     log_action(user, case, "change_status", f"{old} -> {new_status}. {reason}")
     return case
+
+
+MAX_BULK_EVIDENCE = 1000
+
+
+def add_evidence_bulk(case, items, user):
+    """Insert many evidence items for ``case`` with a handful of queries.
+
+    ``items`` is a list of ``(index, validated_data)`` pairs. Codes that
+    already exist (or repeat within the batch) are reported per index
+    instead of failing the whole batch. Returns ``(created, errors)``.
+    The per-row ``post_save`` signals do not fire for ``bulk_create``, so
+    audit entries, the case counter and search documents are written here.
+    """
+    for attempt in range(2):
+        errors = []
+        to_create = []
+        codes = [data["code"] for _, data in items]
+        existing = set(
+            Evidence.objects.filter(code__in=codes).values_list("code", flat=True)
+        )
+        seen = set()
+        for index, data in items:
+            code = data["code"]
+            if code in existing or code in seen:
+                errors.append({"index": index, "errors": {"code": ["already exists"]}})
+                continue
+            seen.add(code)
+            to_create.append(
+                Evidence(
+                    case=case,
+                    code=code,
+                    description=data.get("description", ""),
+                    collected_by=user,
+                )
+            )
+        try:
+            with audit.atomic():
+                created = Evidence.objects.bulk_create(to_create)
+                CaseSummary.bump(case.pk, evidence_count=len(created))
+                search.index_objects(created)
+                rollups.record(created)
+                dashboard.invalidate()
+                response_cache.bump(Evidence)
+                audit.record_many(
+                    [
+                        audit.build_entry(
+                            user, ev, "create_evidence", details=f"Code={ev.code}"
+                        )
+                        for ev in created
+                    ]
+                )
+            return created, errors
+        except IntegrityError:
+            # A concurrent upload claimed one of the codes between the
+            # existence check and the insert; re-check once, then let the
+            # caller report the conflict.
+            if attempt:
+                raise
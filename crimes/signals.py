@@ -1,7 +1,30 @@
-from django.db.models.signals import post_save
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
-from .models import Evidence
+from .models import (
+    Incident,
+    Case,
+    Evidence,
+    CasePerson,
+    CaseAssignment,
+    CaseStatusHistory,
+    CaseSummary,
+    Person,
+)
 from .services import log_action
+from . import (
+    audit_store,
+    authz,
+    case_counts,
+    dashboard,
+    name_matching,
+    response_cache,
+    rollups,
+    search,
+    typeahead,
+)
 
 
 @receiver(post_save, sender=Evidence)
@@ -9,3 +32,146 @@ def evidence_created(sender, instance: Evidence, created, **kwargs):
     if created:
         user = instance.collected_by
         log_action(user, instance, "create_evidence", details=f"Code={instance.code}")
+
+
+# The deletion collector sends pre_delete for every row it is about to
+# remove before the first post_delete, so the rows are gathered on the
+# deletion's origin (the instance or queryset being deleted) and the first
+# post_delete applies them: one UPDATE per case rather than one per row.
+# Keyed by row, so a retried deletion does not count a row twice.
+PENDING_ATTR = "_case_counted_rows"
+
+
+@receiver(pre_delete, sender=Case)
+@receiver(pre_delete, sender=Evidence)
+@receiver(pre_delete, sender=CasePerson)
+@receiver(pre_delete, sender=CaseAssignment)
+@receiver(pre_delete, sender=CaseStatusHistory)
+def case_counted_deleting(sender, instance, origin=None, **kwargs):
+    if origin is None:
+        return
+    if not hasattr(origin, PENDING_ATTR):
+        setattr(origin, PENDING_ATTR, {})
+    # A deleted case takes its summary row with it; nothing to decrement.
+    counter = None if sender is Case else sender.summary_counter
+    case_id = instance.pk if sender is Case else instance.case_id
+    getattr(origin, PENDING_ATTR)[(sender, instance.pk)] = (case_id, counter)
+
+
+@receiver(post_delete, sender=Evidence)
+@receiver(post_delete, sender=CasePerson)
+@receiver(post_delete, sender=CaseAssignment)
+@receiver(post_delete, sender=CaseStatusHistory)
+def case_counted_deleted(sender, instance, origin=None, **kwargs):
+    # Sent inside the deletion collector's transaction, so the decrements
+    # commit or roll back together with the DELETE.
+    pending = getattr(origin, PENDING_ATTR, None)
+    if pending is None:
+        CaseSummary.bump(instance.case_id, **{sender.summary_counter: -1})
+        return
+    setattr(origin, PENDING_ATTR, {})
+    deleted_cases = {case_id for case_id, counter in pending.values() if not counter}
+    deltas = defaultdict(Counter)
+    for case_id, counter in pending.values():
+        if counter and case_id not in deleted_cases:
+            deltas[case_id][counter] -= 1
+    for case_id, changes in sorted(deltas.items()):
+        CaseSummary.bump(case_id, **changes)
+
+
+@receiver(post_save, sender=Incident)
+@receiver(post_save, sender=Case)
+@receiver(post_save, sender=CaseStatusHistory)
+@receiver(post_save, sender=Evidence)
+def activity_created(sender, instance, created, **kwargs):
+    if created:
+        rollups.record([instance])
+
+
+@receiver(post_save, sender=Incident)
+@receiver(post_save, sender=Case)
+@receiver(post_save, sender=Evidence)
+def searchable_saved(sender, instance, update_fields=None, **kwargs):
+    # Status-only saves (the common case) leave the search document alone.
+    if update_fields is not None and not search.INDEXED_FIELDS & set(update_fields):
+        return
+    search.index_objects([instance])
+
+
+@receiver(post_delete, sender=Incident)
+@receiver(post_delete, sender=Case)
+@receiver(post_delete, sender=Evidence)
+def searchable_deleted(sender, instance, **kwargs):
+    search.remove_objects([instance])
+
+
+@receiver(post_delete, sender=Case)
+def case_deleted(sender, **kwargs):
+    # Deletes leave no history row for the incremental refresh to fold in.
+    case_counts.invalidate(kwargs.get("using", "default"))
+
+
+def _names_changed(update_fields):
+    return update_fields is None or bool(name_matching.NAME_FIELDS & set(update_fields))
+
+
+@receiver(pre_save, sender=Person)
+def person_match_keys(sender, instance, update_fields=None, **kwargs):
+    if _names_changed(update_fields):
+        name_matching.apply_keys(instance)
+
+
+@receiver(post_save, sender=Person)
+def person_trigrams(sender, instance, update_fields=None, **kwargs):
+    if _names_changed(update_fields):
+        name_matching.index_people([instance])
+
+
+@receiver(post_save, sender=Incident)
+@receiver(post_save, sender=Case)
+@receiver(post_save, sender=Evidence)
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Incident)
+@receiver(post_delete, sender=Case)
+@receiver(post_delete, sender=Evidence)
+@receiver(post_delete, sender=Person)
+def cached_model_changed(sender, **kwargs):
+    dashboard.invalidate()
+    response_cache.bump(sender)
+
+
+@receiver(post_save, sender=CaseAssignment)
+@receiver(post_delete, sender=CaseAssignment)
+def assignment_changed(sender, instance, **kwargs):
+    authz.forget_user(instance.user_id)
+
+
+@receiver(post_save, sender=Case)
+def case_lead_changed(sender, instance, created, update_fields=None, **kwargs):
+    if not (
+        created
+        or update_fields is None
+        or {"lead_investigator", "lead_investigator_id"} & set(update_fields)
+    ):
+        return
+    authz.forget_user(instance.lead_investigator_id)
+    # Case.save re-snapshots loaded values after post_save, so this still
+    # sees the lead the case had before the save.
+    change = instance.changed_fields().get("lead_investigator_id")
+    if change:
+        authz.forget_user(change[0])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the candidate index does not use.
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    typeahead.investigators_changed()
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleting(sender, instance, using, **kwargs):
+    # SET_NULL on AuditLog.user only reaches the current SQLite month.
+    audit_store.forget_users([instance.pk], using=using)
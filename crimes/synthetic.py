@@ -0,0 +1,416 @@
+"""Reproducible, production-shaped data set behind ``generate_demo_data --scale``.
+
+Builds the whole graph -- incidents, escalated cases with status-history
+trails, case-person links, evidence, assignments, audit rows and the
+``case_summary`` counters -- with skewed distributions (a few repeat
+offenders and busy investigators, long-tailed evidence counts). Incidents
+are generated in shards; each shard has its own RNG seeded from
+``(seed, shard)`` and case numbers are reserved up front in one serial pass
+in shard order, so output does not depend on how shards are spread over
+the process pool.
+"""
+
+import math
+import multiprocessing
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from faker import Faker
+
+from . import audit_store, dashboard, name_matching, response_cache, rollups, search
+from .case_numbers import allocate_case_numbers
+from .models import (
+    AuditLog,
+    Case,
+    CaseAssignment,
+    CasePerson,
+    CaseStatusHistory,
+    CaseSummary,
+    Evidence,
+    Incident,
+    Person,
+)
+
+BATCH_SIZE = 2000
+ESCALATION_RATE = 0.4
+SCALE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+CASE_STATUS_WEIGHTS = {
+    Case.Status.OPEN: 20,
+    Case.Status.INVESTIGATING: 30,
+    Case.Status.CLOSED: 40,
+    Case.Status.ARCHIVED: 10,
+}
+STATUS_TRAILS = {
+    Case.Status.OPEN: [Case.Status.OPEN],
+    Case.Status.INVESTIGATING: [Case.Status.OPEN, Case.Status.INVESTIGATING],
+    Case.Status.CLOSED: [
+        Case.Status.OPEN,
+        Case.Status.INVESTIGATING,
+        Case.Status.CLOSED,
+    ],
+    Case.Status.ARCHIVED: [
+        Case.Status.OPEN,
+        Case.Status.INVESTIGATING,
+        Case.Status.CLOSED,
+        Case.Status.ARCHIVED,
+    ],
+}
+
+
+def parse_scale(value):
+    """``"250k"`` -> 250000, ``"1m"`` -> 1000000, ``"500"`` -> 500."""
+    value = str(value).strip().lower()
+    multiplier = SCALE_SUFFIXES.get(value[-1:], 1)
+    number = value[:-1] if value[-1:] in SCALE_SUFFIXES else value
+    scale = int(float(number) * multiplier)
+    if scale < 1:
+        raise ValueError(f"invalid scale {value!r}")
+    return scale
+
+
+@dataclass
+class GeneratorContext:
+    seed: int
+    now: object
+    span_seconds: float
+    first_names: list
+    last_names: list
+    titles: list
+    sentences: list
+    officer_ids: list = field(default_factory=list)
+    investigator_ids: list = field(default_factory=list)
+    people_ids: list = field(default_factory=list)
+
+
+# Set in the parent before the pool forks so workers inherit it for free.
+_context = None
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let generated rows keep their historical created/changed timestamps."""
+    fields = [
+        f
+        for model in (
+            Incident,
+            Case,
+            Person,
+            CasePerson,
+            Evidence,
+            CaseStatusHistory,
+            CaseAssignment,
+            CaseSummary,
+            AuditLog,
+        )
+        for f in model._meta.concrete_fields
+        if getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False)
+    ]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def skewed_choice(rng, items, power=3.0):
+    """Pick from ``items`` with a heavy bias towards the front of the list."""
+    return items[min(int(len(items) * rng.random() ** power), len(items) - 1)]
+
+
+def generate(scale, seed=0, workers=1, shard_size=10_000, years=3, log=None):
+    """Generate ``scale`` incidents and everything hanging off them."""
+    global _context
+    log = log or (lambda msg: None)
+    fake = Faker()
+    fake.seed_instance(seed)
+    ctx = GeneratorContext(
+        seed=seed,
+        now=timezone.now(),
+        span_seconds=years * 365 * 86400,
+        first_names=[fake.first_name() for _ in range(500)],
+        last_names=[fake.last_name() for _ in range(1500)],
+        titles=[fake.sentence(nb_words=6) for _ in range(500)],
+        sentences=[fake.text(max_nb_chars=200) for _ in range(500)],
+    )
+    ctx.officer_ids, ctx.investigator_ids = _ensure_staff(scale)
+    ctx.people_ids = _generate_people(ctx, max(scale // 2, 10))
+    log(f"people: {len(ctx.people_ids)}")
+    _context = ctx
+
+    shards = [
+        (shard, min(shard_size, scale - shard * shard_size))
+        for shard in range(math.ceil(scale / shard_size))
+    ]
+    numbers = [_reserve_case_numbers(ctx, shard, count) for shard, count in shards]
+    shards = [(shard, count, nums) for (shard, count), nums in zip(shards, numbers)]
+    totals = Counter()
+    if workers <= 1 or connection.vendor == "sqlite":
+        results = (_generate_shard(*args) for args in shards)
+        for result in results:
+            totals.update(result)
+            log(f"incidents: {totals['incidents']}/{scale}")
+    else:
+        # Children must not share the parent's DB socket.
+        connections.close_all()
+        mp = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp) as pool:
+            for result in pool.map(_generate_shard, *zip(*shards)):
+                totals.update(result)
+                log(f"incidents: {totals['incidents']}/{scale}")
+    totals["people"] = len(ctx.people_ids)
+    # Shards insert with explicit timestamps spread over the years; recount
+    # the rollups from the raw tables once rather than per shard.
+    rollups.backfill()
+    # Historical audit rows belong in their months' partitions.
+    audit_store.partition()
+    dashboard.invalidate()
+    response_cache.bump(Incident, Case, Person, Evidence)
+    return totals
+
+
+def _ensure_staff(scale):
+    User = get_user_model()
+    password = make_password(None)
+    n_investigators = max(5, min(500, scale // 2000))
+    n_officers = max(5, min(2000, scale // 500))
+    wanted = [
+        User(
+            username=f"synthetic_investigator_{i:04d}",
+            role="investigator",
+            is_staff=True,
+            password=password,
+        )
+        for i in range(n_investigators)
+    ] + [
+        User(username=f"synthetic_officer_{i:04d}", role="officer", password=password)
+        for i in range(n_officers)
+    ]
+    User.objects.bulk_create(wanted, ignore_conflicts=True, batch_size=BATCH_SIZE)
+    ids = User.objects.filter(username__startswith="synthetic_").order_by("username")
+    officers = list(
+        ids.filter(role="officer").values_list("pk", flat=True)[:n_officers]
+    )
+    investigators = list(
+        ids.filter(role="investigator").values_list("pk", flat=True)[:n_investigators]
+    )
+    return officers, investigators
+
+
+def _generate_people(ctx, count):
+    rng = random.Random(f"{ctx.seed}:people")
+    last_pk = Person.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    with explicit_timestamps():
+        for start in range(0, count, BATCH_SIZE):
+            batch = []
+            for _ in range(min(BATCH_SIZE, count - start)):
+                created = ctx.now - timedelta(seconds=rng.random() * ctx.span_seconds)
+                dob = None
+                if rng.random() < 0.8:
+                    dob = date(1940, 1, 1) + timedelta(days=rng.randrange(70 * 365))
+                person = Person(
+                    first_name=skewed_choice(rng, ctx.first_names, 2),
+                    last_name=skewed_choice(rng, ctx.last_names, 2),
+                    date_of_birth=dob,
+                    created_at=created,
+                    updated_at=created,
+                )
+                batch.append(name_matching.apply_keys(person))
+            name_matching.index_people(Person.objects.bulk_create(batch))
+    return list(
+        Person.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)
+    )
+
+
+def _shard_incidents(ctx, rng, count):
+    """The shard's first ``count`` draws from ``rng``: its unsaved incidents."""
+    incidents = []
+    for _ in range(count):
+        created = ctx.now - timedelta(seconds=rng.random() * ctx.span_seconds)
+        escalated = rng.random() < ESCALATION_RATE
+        status = (
+            Incident.Status.ESCALATED
+            if escalated
+            else rng.choice([Incident.Status.DRAFT, Incident.Status.SUBMITTED])
+        )
+        incidents.append(
+            Incident(
+                title=rng.choice(ctx.titles),
+                description=rng.choice(ctx.sentences),
+                reported_by_id=skewed_choice(rng, ctx.officer_ids, 1.5),
+                status=status,
+                created_at=created,
+                updated_at=created,
+            )
+        )
+    return incidents
+
+
+def _reserve_case_numbers(ctx, shard, count):
+    """Replay the shard's incident draws and reserve its case numbers by year."""
+    rng = random.Random(f"{ctx.seed}:{shard}")
+    by_year = Counter(
+        i.created_at.year
+        for i in _shard_incidents(ctx, rng, count)
+        if i.status == Incident.Status.ESCALATED
+    )
+    return {
+        year: allocate_case_numbers(n, year=year)
+        for year, n in sorted(by_year.items())
+    }
+
+
+def _generate_shard(shard, count, case_numbers):
+    ctx = _context
+    rng = random.Random(f"{ctx.seed}:{shard}")
+    statuses = list(CASE_STATUS_WEIGHTS)
+    weights = list(CASE_STATUS_WEIGHTS.values())
+    roles = CasePerson.Role.values
+    totals = Counter()
+
+    incidents = _shard_incidents(ctx, rng, count)
+    with transaction.atomic(), explicit_timestamps():
+        Incident.objects.bulk_create(incidents, batch_size=BATCH_SIZE)
+        escalated = [i for i in incidents if i.status == Incident.Status.ESCALATED]
+        numbers = {year: iter(nums) for year, nums in case_numbers.items()}
+
+        cases = []
+        for inc in escalated:
+            opened = inc.created_at + timedelta(hours=rng.expovariate(1 / 12))
+            cases.append(
+                Case(
+                    case_number=next(numbers[inc.created_at.year]),
+                    title=inc.title,
+                    description=inc.description,
+                    incident_id=inc.pk,
+                    status=rng.choices(statuses, weights)[0],
+                    lead_investigator_id=skewed_choice(rng, ctx.investigator_ids),
+                    created_at=opened,
+                    updated_at=opened,
+                )
+            )
+        Case.objects.bulk_create(cases, batch_size=BATCH_SIZE)
+
+        history, links, evidence, assignments, audit, summaries = [], [], [], [], [], []
+        for case in cases:
+            changed = case.created_at
+            previous = None
+            for step in STATUS_TRAILS[case.status]:
+                history.append(
+                    CaseStatusHistory(
+                        case_id=case.pk,
+                        old_status=previous,
+                        new_status=step,
+                        changed_at=changed,
+                        changed_by_id=case.lead_investigator_id,
+                    )
+                )
+                audit.append(
+                    AuditLog(
+                        user_id=case.lead_investigator_id,
+                        action="change_status" if previous else "escalate_incident",
+                        entity_type="Case",
+                        entity_id=str(case.pk),
+                        timestamp=changed,
+                        details=f"{previous} -> {step}",
+                    )
+                )
+                previous = step
+                changed += timedelta(days=rng.expovariate(1 / 20))
+
+            # dict.fromkeys de-duplicates while keeping a seed-stable order.
+            people = dict.fromkeys(
+                (skewed_choice(rng, ctx.people_ids), rng.choice(roles))
+                for _ in range(1 + int(rng.expovariate(1 / 2)))
+            )
+            for person_id, role in people:
+                links.append(
+                    CasePerson(
+                        case_id=case.pk,
+                        person_id=person_id,
+                        role=role,
+                        created_at=case.created_at,
+                        updated_at=case.created_at,
+                    )
+                )
+
+            n_evidence = min(int(rng.paretovariate(1.2)) - 1, 200)
+            for j in range(n_evidence):
+                collected = case.created_at + timedelta(days=rng.expovariate(1 / 10))
+                evidence.append(
+                    Evidence(
+                        code=f"{case.case_number}-E{j + 1:03d}",
+                        case_id=case.pk,
+                        description=rng.choice(ctx.sentences),
+                        collected_by_id=case.lead_investigator_id,
+                        created_at=collected,
+                        updated_at=collected,
+                    )
+                )
+
+            assigned = dict.fromkeys(
+                [(case.lead_investigator_id, CaseAssignment.Role.LEAD)]
+                + [
+                    (
+                        skewed_choice(rng, ctx.investigator_ids, 1.5),
+                        CaseAssignment.Role.INVESTIGATOR,
+                    )
+                    for _ in range(int(rng.expovariate(1)))
+                ]
+            )
+            for user_id, role in assigned:
+                assignments.append(
+                    CaseAssignment(
+                        case_id=case.pk,
+                        user_id=user_id,
+                        role=role,
+                        created_at=case.created_at,
+                        updated_at=case.created_at,
+                    )
+                )
+
+            summaries.append(
+                CaseSummary(
+                    case_id=case.pk,
+                    evidence_count=n_evidence,
+                    people_count=len(people),
+                    assignment_count=len(assigned),
+                    history_count=len(STATUS_TRAILS[case.status]),
+                    updated_at=changed,
+                )
+            )
+
+        for model, rows in (
+            (CaseStatusHistory, history),
+            (CasePerson, links),
+            (Evidence, evidence),
+            (CaseAssignment, assignments),
+            (AuditLog, audit),
+            (CaseSummary, summaries),
+        ):
+            model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        search.index_objects(incidents)
+        search.index_objects(cases)
+        search.index_objects(evidence)
+
+    totals.update(
+        incidents=len(incidents),
+        cases=len(cases),
+        history=len(history),
+        links=len(links),
+        evidence=len(evidence),
+        assignments=len(assignments),
+        audit=len(audit),
+    )
+    return totals
@@ -1,8 +1,70 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import (
+    IntegrityError,
+    NotSupportedError,
+    connection,
+    connections,
+    transaction,
+)
+from django.db.models import Count
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
-from .models import Incident, Evidence, AuditLog, CaseStatusHistory, Person
-from .services import escalate_incident
+from .models import (
+    Incident,
+    Case,
+    Evidence,
+    AuditLog,
+    CaseStatusHistory,
+    Person,
+    CasePerson,
+    CaseSummary,
+    CaseAssignment,
+    MaterializedViewRefresh,
+    ActivityRollup,
+    AuditArchive,
+    AuditTrail,
+)
+from .services import escalate_incident, log_action
+from .case_numbers import allocate_case_numbers
+from . import (
+    audit,
+    audit_store,
+    authz,
+    benchmarks,
+    case_counts,
+    case_numbers,
+    dashboard,
+    matviews,
+    metrics,
+    lifecycle,
+    name_matching,
+    response_cache,
+    rollups,
+    search,
+    typeahead,
+)
 
 User = get_user_model()
 
@@ -46,9 +108,10 @@ class CoreFlowTests(TestCase):
             title="Test Inc3", description="Desc", reported_by=self.reporter
         )
         case = escalate_incident(inc.id, self.user.id)
-        Evidence.objects.create(
-            code="E1", case=case, description="Item", collected_by=self.user
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Evidence.objects.create(
+                code="E1", case=case, description="Item", collected_by=self.user
+            )
         self.assertTrue(AuditLog.objects.filter(action="create_evidence").exists())
 
     def test_api_incident_create_and_escalate_and_add_person_and_evidence(self):
@@ -130,3 +193,1704 @@ class CoreFlowTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         case.refresh_from_db()
         self.assertEqual(case.status, case.Status.CLOSED)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="viewer", password="pw", role="viewer"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _walk(self, url):
+        # Repeat pages may be served from the response cache as plain bytes.
+        seen = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            seen.extend(row["id"] for row in resp.json()["results"])
+            url = resp.json()["next"]
+        return seen
+
+    def test_people_pages_cover_all_rows_with_tied_names(self):
+        for i in range(7):
+            Person.objects.create(first_name="Sam", last_name="Smith")
+            Person.objects.create(first_name=f"A{i}", last_name="Jones")
+        seen = self._walk("/api/people/?page_size=3")
+        expected = list(
+            Person.objects.order_by("last_name", "first_name", "id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+
+    def test_incident_list_is_paginated_without_count(self):
+        for i in range(5):
+            Incident.objects.create(title=f"Inc {i}")
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/api/incidents/?page_size=2")
+        self.assertEqual(len(resp.json()["results"]), 2)
+        self.assertIsNotNone(resp.json()["next"])
+        self.assertFalse(any("COUNT(" in q["sql"].upper() for q in ctx.captured_queries))
+        seen = self._walk("/api/incidents/?page_size=2")
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+        # Walk back from the last page via the previous link.
+        resp = self.client.get(resp.json()["next"])
+        prev = self.client.get(resp.json()["previous"])
+        self.assertEqual([r["id"] for r in prev.json()["results"]], seen[:2])
+
+    def test_invalid_cursor_returns_404(self):
+        resp = self.client.get("/api/cases/?cursor=not-a-cursor")
+        self.assertEqual(resp.status_code, 404)
+
+    def test_tampered_cursor_returns_404(self):
+        for position in (
+            ["notadate", "x"],
+            [{"a": 1}, 1],
+            [None, None],
+            ["2024-01-01T00:00:00Z", "abc"],
+        ):
+            raw = json.dumps({"p": position}).encode()
+            token = base64.urlsafe_b64encode(raw).decode()
+            resp = self.client.get("/api/cases/", {"cursor": token})
+            self.assertEqual(resp.status_code, 404, position)
+
+
+class CaseSummaryExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="lead", password="pw", role="investigator"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            inc = Incident.objects.create(title=f"Inc {i}")
+            case = escalate_incident(inc.id, self.user.id)
+        Evidence.objects.create(code="EXP1", case=case, collected_by=self.user)
+
+    def test_ndjson_export_streams_one_object_per_line(self):
+        resp = self.client.get("/api/reports/case-summary?format=ndjson")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(sum(r["evidence_count"] for r in rows), 1)
+
+    def test_csv_export_has_header_and_rows(self):
+        resp = self.client.get("/api/reports/case-summary?format=csv")
+        self.assertEqual(resp["Content-Type"], "text/csv; charset=utf-8")
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[0], "case_id")
+        self.assertEqual(len(lines), 4)
+
+    def test_json_report_unchanged(self):
+        resp = self.client.get("/api/reports/case-summary")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data), 3)
+
+
+class CaseSummaryTableTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="lead", password="pw", role="investigator"
+        )
+        inc = Incident.objects.create(title="Summary")
+        self.case = escalate_incident(inc.id, self.user.id)
+
+    def test_counters_follow_inserts_and_deletes(self):
+        ev = Evidence.objects.create(code="S1", case=self.case)
+        Evidence.objects.create(code="S2", case=self.case)
+        person = Person.objects.create(first_name="A", last_name="B")
+        CasePerson.objects.create(case=self.case, person=person, role="witness")
+        ev.delete()
+        summary = CaseSummary.objects.get(case=self.case)
+        self.assertEqual(summary.evidence_count, 1)
+        self.assertEqual(summary.people_count, 1)
+        self.assertEqual(summary.history_count, 1)
+        Evidence.objects.filter(case=self.case).delete()
+        summary.refresh_from_db()
+        self.assertEqual(summary.evidence_count, 0)
+
+    def test_bulk_delete_updates_summary_once_per_case(self):
+        for i in range(5):
+            Evidence.objects.create(code=f"B{i}", case=self.case)
+        with CaptureQueriesContext(connection) as ctx:
+            Evidence.objects.filter(case=self.case).delete()
+        updates = [
+            q
+            for q in ctx.captured_queries
+            if q["sql"].startswith('UPDATE "case_summary"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(CaseSummary.objects.get(case=self.case).evidence_count, 0)
+
+    def test_missing_summary_row_is_recreated(self):
+        Evidence.objects.create(code="M1", case=self.case)
+        CaseSummary.objects.filter(case=self.case).delete()
+        with self.assertLogs("crimes.models", "WARNING"):
+            Evidence.objects.create(code="M2", case=self.case)
+        self.assertEqual(CaseSummary.objects.get(case=self.case).evidence_count, 2)
+
+    def test_deleting_case_does_not_recreate_its_summary(self):
+        Evidence.objects.create(code="D1", case=self.case)
+        self.case.delete()
+        self.assertFalse(CaseSummary.objects.exists())
+
+    def test_rebuild_command_fixes_drift(self):
+        CaseSummary.objects.filter(case=self.case).update(evidence_count=42)
+        with self.assertRaises(CommandError):
+            call_command("case_summary", "verify", stdout=io.StringIO())
+        call_command("case_summary", "rebuild", stdout=io.StringIO())
+        self.assertEqual(CaseSummary.objects.get(case=self.case).evidence_count, 0)
+        call_command("case_summary", "verify", stdout=io.StringIO())
+
+
+class CaseNumberAllocationTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="lead", password="pw", role="investigator"
+        )
+
+    def test_block_reservation_is_contiguous(self):
+        first = allocate_case_numbers(3, year=2030)
+        second = allocate_case_numbers(1, year=2030)
+        self.assertEqual(
+            first + second,
+            ["CASE-2030-0001", "CASE-2030-0002", "CASE-2030-0003", "CASE-2030-0004"],
+        )
+
+    def test_new_year_counter_is_seeded_from_existing_cases(self):
+        Case.objects.create(case_number="CASE-2031-0007", title="Legacy")
+        self.assertEqual(allocate_case_numbers(1, year=2031), ["CASE-2031-0008"])
+
+    # SQLite's shared-cache test database rejects concurrent writers outright
+    # ("table is locked"), so this only runs against a real server backend.
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_parallel_escalations_get_unique_numbers(self):
+        incidents = [Incident.objects.create(title=f"P{i}") for i in range(20)]
+
+        def escalate(incident_id):
+            try:
+                return escalate_incident(incident_id, self.user.id).case_number
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            numbers = list(pool.map(escalate, [i.id for i in incidents]))
+        self.assertEqual(len(set(numbers)), 20)
+        self.assertEqual(Case.objects.count(), 20)
+
+    @skipUnless(connection.vendor == "sqlite", "exercises the SQLite counter row")
+    def test_parallel_counter_bumps_on_sqlite_file(self):
+        # The in-memory test database rejects concurrent writers, so copy it
+        # to a file and point the worker threads' connections there.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "counter.sqlite3")
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+        options = {**connections.settings["default"]["OPTIONS"], "timeout": 30}
+        patched = mock.patch.dict(
+            connections.settings["default"], {"NAME": path, "OPTIONS": options}
+        )
+        patched.start()
+        self.addCleanup(patched.stop)
+
+        def bump(count):
+            try:
+                last = case_numbers._bump_counter(2040, count)
+                return list(range(last - count + 1, last + 1))
+            finally:
+                connections.close_all()
+
+        counts = [1 + i % 3 for i in range(60)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            blocks = list(pool.map(bump, counts))
+        numbers = sorted(n for block in blocks for n in block)
+        self.assertEqual(numbers, list(range(1, sum(counts) + 1)))
+
+
+class BufferedAuditLogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="lead", password="pw", role="investigator"
+        )
+        self.incident = Incident.objects.create(title="Audit")
+
+    def test_entries_are_bulk_written_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for i in range(5):
+                    log_action(self.user, self.incident, "touch", str(i))
+                self.assertFalse(AuditLog.objects.exists())
+        self.assertEqual(AuditLog.objects.filter(action="touch").count(), 5)
+
+    def test_single_insert_for_whole_transaction(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for i in range(5):
+                        log_action(self.user, self.incident, "touch", str(i))
+        inserts = [q for q in ctx.captured_queries if "crimes_auditlog" in q["sql"]]
+        self.assertEqual(len(inserts), 1)
+
+    def test_entries_are_written_inside_the_transaction(self):
+        with audit.atomic():
+            with audit.atomic():
+                log_action(self.user, self.incident, "touch")
+            self.assertFalse(AuditLog.objects.exists())
+            log_action(self.user, self.incident, "touch")
+        # No on-commit hook needed: the rows committed with the transaction.
+        self.assertEqual(AuditLog.objects.filter(action="touch").count(), 2)
+
+    def test_failed_write_rolls_back_the_change(self):
+        with mock.patch.object(audit, "_write", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                escalate_incident(self.incident.pk, self.user.pk)
+        self.assertFalse(Case.objects.exists())
+
+    def test_background_writer_retries_until_written(self):
+        writer = audit._BackgroundWriter.__new__(audit._BackgroundWriter)
+        writer.queue = mock.Mock()
+        entry = audit.build_entry(self.user, self.incident, "touch")
+        calls = []
+
+        def flaky(entries, using):
+            calls.append(len(entries))
+            if len(calls) < 8:
+                raise RuntimeError
+            AuditLog.objects.bulk_create(entries)
+
+        with mock.patch.object(audit, "_write", side_effect=flaky), mock.patch.object(
+            audit, "connections"
+        ), mock.patch.object(audit.time, "sleep"), self.assertLogs("crimes.audit"):
+            writer._write_batch([([entry], "default")])
+        self.assertEqual(len(calls), 8)
+        self.assertTrue(AuditLog.objects.filter(action="touch").exists())
+
+    def test_poison_batch_is_spooled_and_the_rest_written(self):
+        writer = audit._BackgroundWriter.__new__(audit._BackgroundWriter)
+        writer.queue = mock.Mock()
+        good = audit.build_entry(self.user, self.incident, "good")
+        bad = audit.build_entry(self.user, self.incident, "bad")
+
+        def poisoned(entries, using):
+            if any(entry.action == "bad" for entry in entries):
+                raise RuntimeError
+            AuditLog.objects.bulk_create(entries)
+
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        with override_settings(
+            AUDIT_LOG_WRITE_ATTEMPTS=3, AUDIT_LOG_SPOOL_DIR=spool.name
+        ), mock.patch.object(audit, "_write", side_effect=poisoned), mock.patch.object(
+            audit, "connections"
+        ), mock.patch.object(audit.time, "sleep") as sleep, self.assertLogs(
+            "crimes.audit"
+        ):
+            writer._write_batch([([good], "default"), ([bad], "default")])
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(
+            list(AuditLog.objects.values_list("action", flat=True)), ["good"]
+        )
+        (name,) = os.listdir(spool.name)
+        with open(os.path.join(spool.name, name)) as fh:
+            spooled = [json.loads(line) for line in fh]
+        self.assertEqual([entry["action"] for entry in spooled], ["bad"])
+
+    def test_full_queue_falls_back_to_a_synchronous_write(self):
+        writer = audit._BackgroundWriter.__new__(audit._BackgroundWriter)
+        writer.queue = queue.Queue(maxsize=1)
+        writer.queue.put(([], "default"))
+        writer.put_timeout = 0.01
+        writer.submit([audit.build_entry(self.user, self.incident, "sync")], "default")
+        self.assertTrue(AuditLog.objects.filter(action="sync").exists())
+
+    def test_rolled_back_savepoint_drops_its_entries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                log_action(self.user, self.incident, "kept")
+                try:
+                    with transaction.atomic():
+                        log_action(self.user, self.incident, "dropped")
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                log_action(self.user, self.incident, "kept")
+        actions = list(AuditLog.objects.values_list("action", flat=True))
+        self.assertEqual(actions, ["kept", "kept"])
+
+
+class AuditStoreTests(TestCase):
+    now = datetime(2026, 10, 17, 12, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="auditor", password="pw", role="admin"
+        )
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        overridden = override_settings(AUDIT_ARCHIVE_DIR=archive_dir.name)
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+
+    def _log(self, when, entity_id="1", action="touch"):
+        entry = AuditLog.objects.create(
+            user=self.user, action=action, entity_type="Case", entity_id=entity_id
+        )
+        AuditLog.objects.filter(pk=entry.pk).update(timestamp=when)
+        return entry.pk
+
+    def _rows(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id FROM {table} ORDER BY id")
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_partition_rolls_earlier_months_out_of_the_table(self):
+        aug = self._log(datetime(2026, 8, 10, tzinfo=dt_timezone.utc))
+        sep = [
+            self._log(datetime(2026, 9, 5, tzinfo=dt_timezone.utc)),
+            self._log(datetime(2026, 9, 30, 23, 59, tzinfo=dt_timezone.utc)),
+        ]
+        current = self._log(datetime(2026, 10, 1, tzinfo=dt_timezone.utc))
+        changed = audit_store.partition(now=self.now)
+        self.assertEqual(changed, [date(2026, 8, 1), date(2026, 9, 1)])
+        self.assertEqual(self._rows(audit_store.TABLE), [current])
+        # Reads still see every month.
+        self.assertEqual(
+            list(AuditLog.objects.order_by("pk").values_list("pk", flat=True)),
+            [aug, *sep, current],
+        )
+        self.assertEqual(self.user.audit_logs.count(), 4)
+        tables = audit_store.partitions()
+        self.assertEqual(list(tables), [date(2026, 8, 1), date(2026, 9, 1)])
+        self.assertEqual(self._rows(tables[date(2026, 8, 1)]), [aug])
+        self.assertEqual(self._rows(tables[date(2026, 9, 1)]), sep)
+        self.assertEqual(audit_store.partition(now=self.now), [])
+
+    @skipUnless(connection.vendor == "sqlite", "rolled tables are SQLite-only")
+    def test_rolled_months_keep_keys_and_follow_user_deletes(self):
+        aug = self._log(datetime(2026, 8, 10, tzinfo=dt_timezone.utc))
+        current = self._log(datetime(2026, 10, 1, tzinfo=dt_timezone.utc))
+        audit_store.partition(now=self.now)
+        rolled = audit_store.partitions()[date(2026, 8, 1)]
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA index_list({rolled})")
+            self.assertEqual(len(cursor.fetchall()), 4)
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                cursor.execute(f"INSERT INTO {rolled} SELECT * FROM {rolled}")
+        with self.assertRaises(NotSupportedError):
+            AuditLog.objects.filter(pk=aug).update(action="edited")
+        with self.assertRaises(NotSupportedError):
+            AuditLog.objects.get(pk=aug).delete()
+        AuditLog.objects.filter(pk=current).update(action="edited")
+
+        self.user.delete()
+        connection.check_constraints()
+        self.assertEqual(
+            list(
+                AuditLog.objects.filter(pk__in=[aug, current])
+                .order_by("pk")
+                .values_list("pk", "user_id")
+            ),
+            [(aug, None), (current, None)],
+        )
+
+    def test_view_is_out_of_the_way_while_migrating(self):
+        aug = self._log(datetime(2026, 8, 10, tzinfo=dt_timezone.utc))
+        current = self._log(datetime(2026, 10, 1, tzinfo=dt_timezone.utc))
+        audit_store.partition(now=self.now)
+        audit_store.drop_view()
+        # How the SQLite schema editor remakes a table.
+        table = audit_store.TABLE
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE new__{table} AS SELECT * FROM {table}")
+            cursor.execute(f"DROP TABLE {table}")
+            cursor.execute(f"ALTER TABLE new__{table} RENAME TO {table}")
+        audit_store.create_view()
+        self.assertEqual(
+            sorted(AuditTrail.objects.values_list("pk", flat=True)), [aug, current]
+        )
+
+    def test_expired_months_are_archived_and_searchable(self):
+        first = self._log(datetime(2025, 1, 15, tzinfo=dt_timezone.utc), "1")
+        second = self._log(datetime(2025, 1, 20, tzinfo=dt_timezone.utc), "2")
+        self._log(datetime(2026, 9, 1, tzinfo=dt_timezone.utc))
+        with self.captureOnCommitCallbacks(execute=True):
+            _, archived = audit_store.maintain(now=self.now, retention=12)
+        self.assertEqual(archived, {date(2025, 1, 1): 2})
+        self.assertEqual(list(audit_store.partitions()), [date(2026, 9, 1)])
+        record = AuditArchive.objects.get(month=date(2025, 1, 1))
+        self.assertEqual(record.rows, 2)
+        self.assertTrue(os.path.exists(record.path))
+
+        found = list(audit_store.search(entity_type="Case", entity_id=2))
+        self.assertEqual([entry["id"] for entry in found], [second])
+        self.assertEqual(
+            found[0]["timestamp"], datetime(2025, 1, 20, tzinfo=dt_timezone.utc)
+        )
+        later = datetime(2025, 1, 16, tzinfo=dt_timezone.utc)
+        self.assertEqual([e["id"] for e in audit_store.search(end=later)], [first])
+        self.assertEqual(list(audit_store.search(start=self.now)), [])
+
+        out = io.StringIO()
+        call_command("audit_log", "search", "--entity-id", "1", stdout=out)
+        self.assertEqual(json.loads(out.getvalue())["id"], first)
+
+    def test_rearchiving_merges_and_restore_loads_the_month_back(self):
+        january = date(2025, 1, 1)
+        ids = [self._log(datetime(2025, 1, d, tzinfo=dt_timezone.utc)) for d in (2, 3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            audit_store.maintain(now=self.now)
+        first = AuditArchive.objects.get(month=january)
+        # A row for an archived month turns up later and is archived again.
+        ids.append(self._log(datetime(2025, 1, 4, tzinfo=dt_timezone.utc)))
+        with self.captureOnCommitCallbacks() as callbacks:
+            _, archived = audit_store.maintain(now=self.now)
+        self.assertEqual(archived, {january: 1})
+        # The merged file replaces the old one only once the drop commits.
+        self.assertEqual(audit_store._sha256(first.path), first.sha256)
+        for callback in callbacks:
+            callback()
+        record = AuditArchive.objects.get(month=january)
+        self.assertEqual(record.rows, 3)
+        self.assertEqual(audit_store._sha256(record.path), record.sha256)
+        self.assertEqual(
+            os.listdir(os.path.dirname(record.path)), [os.path.basename(record.path)]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(audit_store.restore(january), 3)
+        self.assertEqual(self._rows(audit_store.partitions()[january]), ids)
+        self.assertFalse(AuditArchive.objects.exists())
+        self.assertFalse(os.path.exists(record.path))
+
+    def test_restore_rejects_a_modified_archive(self):
+        self._log(datetime(2025, 1, 2, tzinfo=dt_timezone.utc))
+        with self.captureOnCommitCallbacks(execute=True):
+            audit_store.maintain(now=self.now)
+        record = AuditArchive.objects.get()
+        with open(record.path, "ab") as fh:
+            fh.write(b"tampered")
+        with self.assertRaises(ValueError):
+            audit_store.restore(record.month)
+
+    def test_admin_search_uses_exact_lookups(self):
+        admin_user = User.objects.create_superuser(
+            username="root", password="pw", role="admin"
+        )
+        old = self._log(timezone.now() - timedelta(days=70), "12")
+        recent = self._log(timezone.now(), "12")
+        self._log(timezone.now(), "123")
+        audit_store.partition()
+        client = Client()
+        client.force_login(admin_user)
+        resp = client.get("/admin/crimes/auditlog/", {"q": "Case:12"})
+        self.assertEqual(resp.status_code, 200)
+        results = resp.context["cl"].result_list
+        self.assertEqual(sorted(entry.pk for entry in results), [old, recent])
+
+
+class AuditTrailApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="compliance", password="pw", role="admin"
+        )
+        self.other = User.objects.create_user(
+            username="other", password="pw", role="investigator"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.base = timezone.now() - timedelta(hours=1)
+
+    def _log(self, minutes, entity_id="7", user=None, action="touch"):
+        entry = AuditLog.objects.create(
+            user=user or self.other,
+            action=action,
+            entity_type="Case",
+            entity_id=entity_id,
+        )
+        when = self.base + timedelta(minutes=minutes)
+        AuditLog.objects.filter(pk=entry.pk).update(timestamp=when)
+        return entry.pk
+
+    def _walk(self, url, params):
+        ids, pages, queries = [], 0, []
+        resp = self.client.get(url, params)
+        while True:
+            self.assertEqual(resp.status_code, 200)
+            ids += [row["id"] for row in resp.data["results"]]
+            pages += 1
+            if not resp.data["next"]:
+                return ids, pages, queries
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(resp.data["next"])
+            queries.append([q["sql"] for q in ctx.captured_queries])
+
+    def test_entity_trail_is_newest_first_in_keyset_pages(self):
+        # Two entries share a timestamp; the id breaks the tie.
+        case7 = [self._log(m) for m in (1, 2, 3, 3, 5)]
+        self._log(4, entity_id="8")
+        ids, pages, queries = self._walk(
+            "/api/audit", {"entity_type": "Case", "entity_id": "7", "page_size": 2}
+        )
+        self.assertEqual(ids, case7[::-1])
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(queries[0]), len(queries[1]))
+        self.assertFalse(any("COUNT(" in sql for page in queries for sql in page))
+
+    def test_user_action_and_time_filters(self):
+        mine = self._log(1, user=self.user, action="export")
+        self._log(2, user=self.user, action="touch")
+        self._log(3)
+        resp = self.client.get("/api/audit", {"user": self.user.pk})
+        self.assertEqual(len(resp.data["results"]), 2)
+        self.assertEqual(resp.data["results"][0]["username"], "compliance")
+        resp = self.client.get("/api/audit", {"user": self.user.pk, "action": "export"})
+        self.assertEqual([row["id"] for row in resp.data["results"]], [mine])
+        start = (self.base + timedelta(minutes=2)).isoformat()
+        resp = self.client.get("/api/audit", {"start": start})
+        self.assertEqual(len(resp.data["results"]), 2)
+        tomorrow = (timezone.now() + timedelta(days=1)).date().isoformat()
+        resp = self.client.get("/api/audit", {"end": tomorrow})
+        self.assertEqual(len(resp.data["results"]), 3)
+
+    def test_rolled_months_are_still_served(self):
+        old = self._log(-60 * 24 * 70)
+        recent = self._log(1)
+        self.assertTrue(audit_store.partition())
+        self.assertEqual(
+            list(AuditLog._base_manager.values_list("pk", flat=True)), [recent]
+        )
+        resp = self.client.get("/api/audit", {"entity_type": "Case", "entity_id": 7})
+        self.assertEqual([row["id"] for row in resp.data["results"]], [recent, old])
+
+    def test_only_investigators_and_compliance_read_the_trail(self):
+        expected_status = {"viewer": 403, "officer": 403, "investigator": 200}
+        for role, expected in expected_status.items():
+            user = User.objects.create_user(username=role, password="pw", role=role)
+            self.client.force_authenticate(user)
+            self.assertEqual(self.client.get("/api/audit").status_code, expected)
+
+    def test_case_trail_includes_its_incident_and_evidence(self):
+        with audit.atomic():
+            case = escalate_incident(
+                Incident.objects.create(title="Burglary").id, self.other.id
+            )
+            Evidence.objects.create(code="AUD-1", case=case, collected_by=self.other)
+            other_case = escalate_incident(
+                Incident.objects.create(title="Fraud").id, self.other.id
+            )
+            Evidence.objects.create(code="AUD-2", case=other_case)
+        AuditLog.objects.create(
+            action="touch", entity_type="Incident", entity_id=str(case.incident_id)
+        )
+        resp = self.client.get("/api/audit", {"case": case.pk})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            sorted(row["action"] for row in resp.data["results"]),
+            ["create_evidence", "escalate_incident", "touch"],
+        )
+        self.assertEqual(self.client.get("/api/audit", {"case": "x"}).status_code, 400)
+
+    def test_invalid_filters_are_rejected(self):
+        for params in (
+            {"entity_id": "7"},
+            {"user": "someone"},
+            {"start": "yesterday"},
+            {"end": "2026-02-30"},
+        ):
+            resp = self.client.get("/api/audit", params)
+            self.assertEqual(resp.status_code, 400, params)
+
+    def test_case_page_links_its_audit_trail(self):
+        case = escalate_incident(Incident.objects.create(title="A").id, self.other.id)
+        html = Client()
+        html.force_login(self.user)
+        resp = html.get(f"/cases/{case.pk}/")
+        self.assertContains(resp, f"/api/audit?case={case.pk}")
+        html.force_login(
+            User.objects.create_user(username="viewer", password="pw", role="viewer")
+        )
+        resp = html.get(f"/cases/{case.pk}/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotContains(resp, "/api/audit")
+
+
+class BulkEvidenceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="lead", password="pw", role="investigator"
+        )
+        inc = Incident.objects.create(title="Bulk")
+        self.case = escalate_incident(inc.id, self.user.id)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f"/api/cases/{self.case.id}/evidence/bulk"
+
+    def test_bulk_upload_is_constant_queries(self):
+        items = [{"code": f"B{i}", "description": "x"} for i in range(200)]
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.post(self.url, items, format="json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(len(resp.data["created"]), 200)
+        self.assertLess(len(ctx.captured_queries), 20)
+        self.assertEqual(Evidence.objects.filter(case=self.case).count(), 200)
+        self.assertEqual(AuditLog.objects.filter(action="create_evidence").count(), 200)
+        self.assertEqual(CaseSummary.objects.get(case=self.case).evidence_count, 200)
+
+    def test_per_item_errors(self):
+        Evidence.objects.create(code="DUP", case=self.case)
+        items = [
+            {"code": "OK1"},
+            {"code": "DUP"},
+            {"description": "missing code"},
+            {"code": "OK1"},
+        ]
+        resp = self.client.post(self.url, {"items": items}, format="json")
+        self.assertEqual(resp.status_code, 207)
+        self.assertEqual([e["index"] for e in resp.data["errors"]], [1, 2, 3])
+        self.assertEqual([e["code"] for e in resp.data["created"]], ["OK1"])
+
+    def test_trailing_slash_route_still_works(self):
+        resp = self.client.post(self.url + "/", [{"code": "S1"}], format="json")
+        self.assertEqual(resp.status_code, 201)
+
+    def test_repeated_conflict_is_reported_as_409(self):
+        with mock.patch.object(
+            Evidence.objects, "bulk_create", side_effect=IntegrityError
+        ):
+            resp = self.client.post(self.url, [{"code": "C1"}], format="json")
+        self.assertEqual(resp.status_code, 409)
+
+
+class ImportRecordsTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.user = User.objects.create_user(
+            username="lead", password="pw", role="investigator"
+        )
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        return path
+
+    def _import(self, **files):
+        call_command(
+            "import_records",
+            state_dir=os.path.join(self.tmp.name, "state"),
+            chunk_size=2,
+            stdout=io.StringIO(),
+            stderr=io.StringIO(),
+            **files,
+        )
+
+    def test_people_and_links_resolve_source_ids(self):
+        case = escalate_incident(Incident.objects.create(title="I").id, self.user.id)
+        people = self._write(
+            "people.csv",
+            "id,first_name,last_name,date_of_birth\n"
+            "p1,Ann,Lee,1990-01-02\n"
+            "p2,Bo,Ray,\n"
+            "p3,,Missing,\n",
+        )
+        links = self._write(
+            "links.ndjson",
+            f'{{"case_number": "{case.case_number}", "person_id": "p2", "role": "suspect"}}\n'
+            f'{{"case_number": "{case.case_number}", "person_id": "p9", "role": "suspect"}}\n',
+        )
+        self._import(people=people, links=links)
+        self.assertEqual(Person.objects.count(), 2)
+        link = CasePerson.objects.get()
+        self.assertEqual(link.person.first_name, "Bo")
+        self.assertEqual(CaseSummary.objects.get(case=case).people_count, 1)
+
+    def test_malformed_ndjson_line_is_a_row_error(self):
+        path = self._write(
+            "incidents.ndjson",
+            '{"title": "A"}\n{"title": \n[1, 2]\n{"title": "B"}\n',
+        )
+        stderr = io.StringIO()
+        call_command(
+            "import_records",
+            incidents=path,
+            state_dir=os.path.join(self.tmp.name, "state"),
+            chunk_size=2,
+            stdout=io.StringIO(),
+            stderr=stderr,
+        )
+        self.assertEqual(
+            sorted(Incident.objects.values_list("title", flat=True)), ["A", "B"]
+        )
+        self.assertIn("row 2: invalid JSON", stderr.getvalue())
+        self.assertIn("row 3: expected a JSON object", stderr.getvalue())
+
+    def test_resume_continues_after_checkpoint(self):
+        path = self._write(
+            "incidents.csv", "id,title,description,status\n1,A,,\n2,B,,submitted\n"
+        )
+        self._import(incidents=path)
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write("3,C,,\n")
+        with self.assertRaises(CommandError):
+            self._import(incidents=path)
+        self._import(incidents=path, resume=True)
+        self.assertEqual(
+            sorted(Incident.objects.values_list("title", flat=True)), ["A", "B", "C"]
+        )
+
+    def test_source_created_at_is_kept(self):
+        path = self._write(
+            "incidents.csv",
+            "id,title,created_at\n"
+            "1,Old,2019-03-04T05:06:07+00:00\n"
+            "2,Day,2019-03-05\n"
+            "3,New,\n"
+            "4,Bad,yesterday\n",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self._import(incidents=path)
+        created = dict(Incident.objects.values_list("title", "created_at"))
+        self.assertEqual(
+            created["Old"], datetime(2019, 3, 4, 5, 6, 7, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(created["Day"].date(), date(2019, 3, 5))
+        self.assertEqual(created["New"].year, timezone.now().year)
+        self.assertNotIn("Bad", created)
+        day = datetime(2019, 3, 4, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            ActivityRollup.objects.get(
+                metric="incidents_reported", granularity="day", bucket=day
+            ).count,
+            1,
+        )
+
+    def test_restart_forgets_source_ids_of_the_aborted_run(self):
+        case = escalate_incident(Incident.objects.create(title="I").id, self.user.id)
+        people = self._write("people.csv", "id,first_name,last_name\np1,Ann,Lee\n")
+        self._import(people=people)
+        Person.objects.all().delete()
+        with open(people, "w", encoding="utf-8") as fh:
+            fh.write("id,first_name,last_name\np2,Bo,Ray\n")
+        links = self._write(
+            "links.csv",
+            f"case_number,person_id,role\n{case.case_number},p1,suspect\n",
+        )
+        self._import(people=people, links=links, restart=True)
+        self.assertFalse(CasePerson.objects.exists())
+
+
+class SyntheticDataTests(TestCase):
+    def test_scale_mode_builds_consistent_graph(self):
+        out = io.StringIO()
+        call_command(
+            "generate_demo_data",
+            scale="300",
+            seed=7,
+            workers=1,
+            shard_size=100,
+            stdout=out,
+        )
+        self.assertEqual(Incident.objects.count(), 300)
+        escalated = Incident.objects.filter(status=Incident.Status.ESCALATED).count()
+        self.assertEqual(Case.objects.count(), escalated)
+        self.assertTrue(Evidence.objects.exists())
+        self.assertTrue(CasePerson.objects.exists())
+        # Each case's history trail ends in its current status.
+        for case in Case.objects.all()[:20]:
+            last = case.status_history.order_by("-changed_at").first()
+            self.assertEqual(last.new_status, case.status)
+        # Bulk-inserted counters agree with the rows.
+        call_command("case_summary", "verify", stdout=io.StringIO())
+        # Case numbers are reserved in shard order, not per worker.
+        numbers = list(
+            Case.objects.filter(case_number__startswith=f"CASE-{timezone.now().year}-")
+            .order_by("pk")
+            .values_list("case_number", flat=True)
+        )
+        self.assertEqual(numbers, sorted(numbers))
+
+    def test_demo_incidents_are_searchable(self):
+        call_command("generate_demo_data", incidents=3, people=0, stdout=io.StringIO())
+        incident = Incident.objects.first()
+        hits = search.search(incident.title.split()[0], types=["incident"], limit=10)
+        self.assertIn(incident.pk, [hit["id"] for hit in hits])
+
+
+class BenchmarkTests(TestCase):
+    def test_measure_reports_latency_and_queries(self):
+        user = User.objects.create_user(username="b", password="pw", role="admin")
+        client = Client()
+        client.force_login(user)
+        result = benchmarks.measure(client, "/api/cases/", repeat=3)
+        self.assertEqual(result["status"], 200)
+        self.assertGreater(result["queries"], 0)
+        self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+
+    def test_compare_flags_query_growth_and_slowdowns(self):
+        base = {"results": {"1k": {"a": {"queries": 3, "p95_ms": 10.0}}}}
+        same = {"results": {"1k": {"a": {"queries": 3, "p95_ms": 11.0}}}}
+        worse = {"results": {"1k": {"a": {"queries": 40, "p95_ms": 30.0}}}}
+        self.assertEqual(benchmarks.compare(same, base), [])
+        self.assertEqual(len(benchmarks.compare(worse, base)), 2)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.user = User.objects.create_user(
+            username="m", password="pw", role="viewer"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_requests_are_labelled_by_url_name(self):
+        self.client.get("/api/cases/")
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn(
+            'http_requests_total{route="case-list",method="GET",status="200"} 1', body
+        )
+        self.assertIn('http_request_db_queries_count{route="case-list",method="GET"} 1', body)
+
+    def test_snapshots_from_other_workers_are_merged(self):
+        with tempfile.TemporaryDirectory() as tmp, self.settings(METRICS_DIR=tmp):
+            metrics.registry.observe_request("x", "GET", 200, 0.01, 2, 0.001, 100)
+            other = metrics.registry.snapshot()
+            with open(os.path.join(tmp, "metrics-999999.json"), "w") as fh:
+                json.dump(other, fh)
+            body = metrics.render()
+        self.assertIn('http_requests_total{route="x",method="GET",status="200"} 2', body)
+
+    def test_stale_snapshots_of_exited_workers_are_dropped(self):
+        with tempfile.TemporaryDirectory() as tmp, self.settings(METRICS_DIR=tmp):
+            metrics.registry.observe_request("x", "GET", 200, 0.01, 2, 0.001, 100)
+            path = os.path.join(tmp, "metrics-999999.json")
+            with open(path, "w") as fh:
+                json.dump(metrics.registry.snapshot(), fh)
+            old = time.time() - 3600
+            os.utime(path, (old, old))
+            body = metrics.render()
+            self.assertFalse(os.path.exists(path))
+        self.assertIn('http_requests_total{route="x",method="GET",status="200"} 1', body)
+
+    def test_concurrent_flushes_do_not_collide(self):
+        with tempfile.TemporaryDirectory() as tmp, self.settings(METRICS_DIR=tmp):
+            metrics.registry.observe_request("x", "GET", 200, 0.01, 2, 0.001, 100)
+            flush = metrics.registry.maybe_flush
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(lambda _: flush(force=True), range(40)))
+            self.assertEqual(os.listdir(tmp), [f"metrics-{os.getpid()}.json"])
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.0/8"])
+    def test_scrape_is_limited_to_staff_and_allowed_addresses(self):
+        client = Client()
+        self.assertEqual(client.get("/metrics").status_code, 403)
+        response = client.get("/metrics", REMOTE_ADDR="10.1.2.3")
+        self.assertEqual(response.status_code, 200)
+        staff = User.objects.create_user(username="ops", password="pw", is_staff=True)
+        client.force_login(staff)
+        self.assertEqual(client.get("/metrics").status_code, 200)
+
+
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="s", password="pw", role="investigator"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.burglary = Incident.objects.create(
+            title="Warehouse burglary", description="Forced entry at night"
+        )
+        Incident.objects.create(title="Traffic stop", description="Burglary tools found")
+        self.case = escalate_incident(self.burglary.id, self.user.id)
+        Evidence.objects.create(
+            code="CROWBAR-1", case=self.case, description="Crowbar near burglary scene"
+        )
+
+    def test_ranked_search_across_entities(self):
+        resp = self.client.get("/api/search", {"q": "burglar"})
+        self.assertEqual(resp.status_code, 200)
+        types = {(r["type"], r["id"]) for r in resp.data["results"]}
+        self.assertIn(("incident", self.burglary.id), types)
+        self.assertIn(("case", self.case.id), types)
+        self.assertIn("evidence", {t for t, _ in types})
+        # Title hits rank above description-only hits.
+        first = resp.data["results"][0]
+        self.assertIn("burglary", first["title"].lower())
+
+    def test_index_follows_updates_and_deletes(self):
+        self.burglary.title = "Arson"
+        self.burglary.save()
+        resp = self.client.get("/api/search", {"q": "arson", "type": "incident"})
+        self.assertEqual([r["id"] for r in resp.data["results"]], [self.burglary.id])
+        self.case.delete()
+        resp = self.client.get("/api/search", {"q": "crowbar"})
+        self.assertEqual(resp.data["results"], [])
+
+    def test_rebuild_drops_entries_of_vanished_rows(self):
+        bike = Incident.objects.create(title="Stolen bicycle")
+        table = Incident._meta.db_table
+        with connection.cursor() as cur:
+            # A raw delete skips the post_delete receiver.
+            cur.execute(f"DELETE FROM {table} WHERE id = %s", [bike.pk])
+        out = io.StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Incident: 2 indexed, 1 removed", out.getvalue())
+        resp = self.client.get("/api/search", {"q": "bicycle"})
+        self.assertEqual(resp.data["results"], [])
+        resp = self.client.get("/api/search", {"q": "crowbar"})
+        self.assertEqual(len(resp.data["results"]), 1)
+
+    def test_incident_search_action_uses_index(self):
+        resp = self.client.get("/api/incidents/search/", {"q": "warehouse"})
+        self.assertEqual([r["id"] for r in resp.data["results"]], [self.burglary.id])
+        resp = self.client.get("/api/incidents/search/", {"q": "!!"})
+        self.assertEqual(resp.data["results"], [])
+
+    def test_officers_can_search(self):
+        officer = User.objects.create_user(username="o", password="pw", role="officer")
+        self.client.force_authenticate(officer)
+        self.assertEqual(self.client.get("/api/search", {"q": "x"}).status_code, 200)
+        resp = self.client.post("/api/search", {"q": "x"})
+        self.assertEqual(resp.status_code, 403)
+
+
+class PersonMatchingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="pm", password="pw", role="investigator"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.smith = Person.objects.create(
+            first_name="Catherine", last_name="Smith", date_of_birth=date(1980, 5, 1)
+        )
+        self.smith_2 = Person.objects.create(
+            first_name="Katherine", last_name="Smyth", date_of_birth=date(1975, 2, 3)
+        )
+        Person.objects.create(first_name="Jon", last_name="Müller")
+        Person.objects.create(first_name="Amy", last_name="Adams")
+
+    def _search(self, **params):
+        resp = self.client.get("/api/people/", params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.data["results"]
+
+    def test_misspelled_and_phonetic_names_match(self):
+        ids = [r["id"] for r in self._search(search="Kathrine Smithe")]
+        self.assertEqual(set(ids), {self.smith.id, self.smith_2.id})
+        self.assertEqual(self._search(search="john mueller")[0]["last_name"], "Müller")
+        self.assertEqual(self._search(search="zzz"), [])
+
+    def test_date_of_birth_breaks_ties(self):
+        results = self._search(search="Catherine Smith", date_of_birth="1975-02-03")
+        self.assertEqual(results[0]["id"], self.smith_2.id)
+        self.assertGreater(results[0]["score"], results[1]["score"])
+
+    def test_keys_follow_renames(self):
+        self.smith.last_name = "Thompson"
+        self.smith.save()
+        self.assertEqual(self._search(search="Tomson")[0]["id"], self.smith.id)
+        self.assertNotIn(
+            self.smith.id, [r["id"] for r in self._search(search="Smith")]
+        )
+
+    def test_keys_follow_renames_saved_with_update_fields(self):
+        self.smith.last_name = "Thompson"
+        self.smith.save(update_fields=["last_name"])
+        stored = Person.objects.get(pk=self.smith.pk)
+        self.assertEqual(stored.name_normalized, "catherine thompson")
+        self.assertEqual(stored.last_name_phonetic, self.smith.last_name_phonetic)
+        self.assertEqual(self._search(search="Tomson")[0]["id"], self.smith.id)
+
+    def test_common_surname_key_does_not_crowd_out_better_matches(self):
+        fillers = Person.objects.bulk_create(
+            name_matching.apply_keys(Person(first_name="Filler", last_name="Smith"))
+            for _ in range(name_matching.MAX_CANDIDATES + 100)
+        )
+        name_matching.index_people(fillers)
+        late = Person.objects.create(first_name="Catheryn", last_name="Smyth")
+        ids = [p.pk for p in name_matching.find_people("Kathryn Smith")]
+        self.assertIn(late.pk, ids)
+
+
+@override_settings(DASHBOARD_REFRESH_BACKGROUND=False)
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="dash", password="pw", role="investigator"
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.case = escalate_incident(
+            Incident.objects.create(title="Inc").id, self.user.id
+        )
+
+    def _page(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/dashboard/")
+        self.assertEqual(resp.status_code, 200)
+        return resp, [q["sql"] for q in ctx.captured_queries]
+
+    def test_warm_page_runs_no_aggregate_queries(self):
+        self._page()
+        resp, queries = self._page()
+        self.assertFalse([sql for sql in queries if "crimes_" in sql], queries)
+        self.assertContains(resp, self.case.case_number)
+
+    def test_write_serves_stale_then_refreshes(self):
+        self._page()
+        with self.captureOnCommitCallbacks(execute=True):
+            Evidence.objects.create(code="E-1", case=self.case, collected_by=self.user)
+        resp, _ = self._page()  # stale snapshot; triggers the refresh
+        self.assertEqual(resp.context["evidence_total"], 0)
+        resp, _ = self._page()
+        self.assertEqual(resp.context["evidence_total"], 1)
+
+    def test_refresh_overlapping_invalidation_stays_stale(self):
+        cache.set(dashboard.INVALIDATED_KEY, float("inf"))
+        dashboard.refresh()
+        self.assertEqual(cache.get(dashboard.SNAPSHOT_KEY)[0], 0)
+
+
+class AuthorizationContextTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lead = User.objects.create_user(
+            username="lead", password="pw", role="investigator"
+        )
+        self.other = User.objects.create_user(
+            username="other", password="pw", role="investigator"
+        )
+        self.case = escalate_incident(
+            Incident.objects.create(title="Inc").id, self.lead.id
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.other)
+
+    def _add_evidence(self, code):
+        return self.api.post(
+            f"/api/cases/{self.case.id}/evidence/", {"code": code}, format="json"
+        )
+
+    def test_unassigned_investigator_is_refused_everywhere(self):
+        self.assertEqual(self._add_evidence("E-1").status_code, 403)
+        html = Client()
+        html.force_login(self.other)
+        html.post(f"/cases/{self.case.id}/evidence/add/", {"code": "E-2"})
+        html.post(f"/cases/{self.case.id}/close/", {"reason": "x"})
+        self.case.refresh_from_db()
+        self.assertEqual(self.case.status, Case.Status.OPEN)
+        self.assertFalse(Evidence.objects.filter(case=self.case).exists())
+
+    def test_case_ids_cached_until_assignment_changes(self):
+        self._add_evidence("E-1")
+        with CaptureQueriesContext(connection) as ctx:
+            self._add_evidence("E-2")
+        self.assertFalse(
+            [q for q in ctx.captured_queries if "crimes_caseassignment" in q["sql"]]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            CaseAssignment.objects.create(
+                case=self.case, user=self.other, role=CaseAssignment.Role.INVESTIGATOR
+            )
+        self.assertEqual(self._add_evidence("E-3").status_code, 201)
+
+    def test_previous_lead_loses_access_when_lead_changes(self):
+        context = authz.AuthorizationContext(self.lead)
+        self.assertIn(self.case.pk, context.lead_case_ids)
+        case = Case.objects.get(pk=self.case.pk)
+        case.lead_investigator = self.other
+        with self.captureOnCommitCallbacks(execute=True):
+            case.save(update_fields=["lead_investigator"])
+        # A loaded case is judged by its own lead, not the cached ids.
+        self.assertFalse(context.can_modify_case(case))
+        self.assertNotIn(
+            self.case.pk, authz.AuthorizationContext(self.lead).lead_case_ids
+        )
+
+
+class CaseChangeTrackingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="ct", password="pw")
+        self.case = escalate_incident(
+            Incident.objects.create(title="Inc").id, self.user.id
+        )
+
+    def _selects(self, fn):
+        with CaptureQueriesContext(connection) as ctx:
+            fn()
+        return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+
+    def test_save_compares_against_loaded_values(self):
+        case = Case.objects.get(pk=self.case.pk)
+        case.title = "Renamed"
+        self.assertEqual(case.changed_fields(), {})
+        self.assertEqual(self._selects(case.save), [])
+        self.assertEqual(case.status_history.count(), 1)
+
+        case.status = Case.Status.INVESTIGATING
+        self.assertEqual(
+            case.changed_fields(), {"status": (Case.Status.OPEN, "investigating")}
+        )
+        self.assertEqual(self._selects(case.save), [])
+        self.assertEqual(case.changed_fields(), {})
+        self.assertEqual(
+            list(case.status_history.values_list("old_status", "new_status")),
+            [(None, "open"), ("open", "investigating")],
+        )
+
+    def test_status_left_out_of_update_fields_is_not_logged(self):
+        case = Case.objects.get(pk=self.case.pk)
+        case.status = Case.Status.CLOSED
+        case.title = "Only the title"
+        case.save(update_fields=["title"])
+        self.assertEqual(case.status_history.count(), 1)
+        # The unsaved status change is still pending and is logged later.
+        self.assertEqual(
+            case.changed_fields(), {"status": (Case.Status.OPEN, "closed")}
+        )
+        case.save(update_fields=["status"])
+        self.assertEqual(
+            list(case.status_history.values_list("old_status", "new_status")),
+            [(None, "open"), ("open", "closed")],
+        )
+
+    def test_refresh_from_db_resnapshots(self):
+        case = Case.objects.get(pk=self.case.pk)
+        Case.objects.filter(pk=case.pk).update(status=Case.Status.INVESTIGATING)
+        case.refresh_from_db(fields=["status"])
+        self.assertEqual(case.changed_fields(), {})
+        case.status = Case.Status.CLOSED
+        self.assertEqual(self._selects(case.save), [])
+        self.assertEqual(
+            case.status_history.values_list("old_status", flat=True).last(),
+            "investigating",
+        )
+
+    def test_queryset_update_writes_history(self):
+        other = escalate_incident(Incident.objects.create(title="B").id, self.user.id)
+        Case.objects.filter(pk=other.pk).update(status=Case.Status.INVESTIGATING)
+        updated = Case.objects.filter(pk__in=[self.case.pk, other.pk]).update(
+            status=Case.Status.INVESTIGATING
+        )
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.case.status_history.count(), 2)
+        self.assertEqual(other.status_history.count(), 2)  # no-op row not logged
+        self.assertEqual(CaseSummary.objects.get(case=self.case).history_count, 2)
+
+
+class CaseDetailQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="cd", password="pw", role="admin"
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def _case_with(self, n):
+        case = escalate_incident(Incident.objects.create(title=f"I{n}").id, self.user.id)
+        for i in range(n):
+            person = Person.objects.create(first_name=f"F{i}", last_name="L")
+            CasePerson.objects.create(case=case, person=person, role="witness")
+            Evidence.objects.create(code=f"C{n}-{i}", case=case)
+        return case
+
+    def _queries(self, case):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(f"/cases/{case.pk}/")
+        self.assertEqual(resp.status_code, 200)
+        return resp, len(ctx.captured_queries)
+
+    def test_query_count_independent_of_case_size(self):
+        _, small = self._queries(self._case_with(1))
+        resp, large = self._queries(self._case_with(25))
+        self.assertEqual(small, large)
+        self.assertContains(resp, "People (25)")
+        self.assertContains(resp, "F24 L")
+        self.assertNotContains(resp, "select person")
+
+
+class TypeaheadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        typeahead._index = None  # built per process; start each test afresh
+        self.user = User.objects.create_user(
+            username="ta", password="pw", role="investigator", is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.ann = Person.objects.create(first_name="Ann", last_name="Zúñiga")
+        Person.objects.create(first_name="Anna", last_name="Brown")
+        Person.objects.create(first_name="Bob", last_name="Annett")
+
+    def _get(self, url, **params):
+        resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.data["results"]
+
+    def test_people_prefix_on_first_or_last_name(self):
+        names = [r["first_name"] for r in self._get("/api/typeahead/people", q="ann")]
+        self.assertEqual(names, ["Ann", "Anna", "Bob"])
+        found = self._get("/api/typeahead/people", q="zun")
+        self.assertEqual([r["id"] for r in found], [self.ann.id])
+        self.assertEqual(len(self._get("/api/typeahead/people", q="a", limit=1)), 1)
+
+    def test_investigator_index_refreshes_on_user_change(self):
+        self.assertEqual(self._get("/api/typeahead/investigators", q="mar"), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(
+                username="marlowe", password="pw", role="investigator", is_staff=True
+            )
+        found = self._get("/api/typeahead/investigators", q="MAR")
+        self.assertEqual([r["username"] for r in found], ["marlowe"])
+
+    def test_investigator_index_expires_without_a_generation_change(self):
+        self._get("/api/typeahead/investigators", q="mar")
+        # A change made through another worker's process-local cache.
+        User.objects.create_user(
+            username="marlowe", password="pw", role="investigator", is_staff=True
+        )
+        self.assertEqual(self._get("/api/typeahead/investigators", q="mar"), [])
+        with mock.patch.object(typeahead.time, "monotonic", return_value=1e12):
+            found = self._get("/api/typeahead/investigators", q="mar")
+        self.assertEqual([r["username"] for r in found], ["marlowe"])
+
+    def test_viewers_cannot_list_investigators(self):
+        viewer = User.objects.create_user(username="v", password="pw", role="viewer")
+        self.client.force_authenticate(viewer)
+        resp = self.client.get("/api/typeahead/investigators", {"q": "t"})
+        self.assertEqual(resp.status_code, 403)
+
+    def test_prefix_index_bisects(self):
+        index = typeahead.PrefixIndex(
+            [("bea", 1), ("ben", 2), ("bob", 3), ("ben smith", 2)],
+            {pk: {"id": pk} for pk in (1, 2, 3)},
+        )
+        self.assertEqual(index.search("be", 10), [{"id": 1}, {"id": 2}])
+        self.assertEqual(index.search("c", 10), [])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="cg", password="pw", role="admin"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.incident = Incident.objects.create(title="Inc")
+        self.case = escalate_incident(self.incident.id, self.user.id)
+
+    def _revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_detail_304_until_changed(self):
+        url = f"/api/cases/{self.case.id}/"
+        etag = self.client.get(url)["ETag"]
+        resp = self._revalidate(url, etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.content, b"")
+        self.assertEqual(resp["ETag"], etag)
+        self.client.patch(url, {"title": "New title"}, format="json")
+        resp = self._revalidate(url, etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_etag_covers_nested_users(self):
+        url = f"/api/cases/{self.case.id}/"
+        etag = self.client.get(url)["ETag"]
+        User.objects.filter(pk=self.user.pk).update(email="lead@example.com")
+        resp = self._revalidate(url, etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["lead_investigator"]["email"], "lead@example.com")
+
+    def test_if_modified_since(self):
+        url = f"/api/incidents/{self.incident.id}/"
+        last_modified = self.client.get(url)["Last-Modified"]
+        resp = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_list_etag_tracks_page_contents(self):
+        etag = self.client.get("/api/cases/")["ETag"]
+        self.assertEqual(self._revalidate("/api/cases/", etag).status_code, 304)
+        escalate_incident(Incident.objects.create(title="B").id, self.user.id)
+        resp = self._revalidate("/api/cases/", etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data["results"]), 2)
+        etag = resp["ETag"]
+        Case.objects.filter(pk=self.case.pk).update(status=Case.Status.INVESTIGATING)
+        self.assertEqual(self._revalidate("/api/cases/", etag).status_code, 200)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        response_cache.get_backend().clear()
+        response_cache.hits.clear()
+        response_cache.misses.clear()
+        self.user = User.objects.create_user(username="rc", password="pw", role="viewer")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Incident.objects.create(title="First")
+
+    def _titles(self, resp):
+        self.assertEqual(resp.status_code, 200)
+        return [row["title"] for row in resp.json()["results"]]
+
+    def test_hit_skips_the_database_until_a_write(self):
+        self._titles(self.client.get("/api/incidents/"))
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/api/incidents/")
+        self.assertEqual(self._titles(resp), ["First"])
+        self.assertFalse([q for q in ctx.captured_queries if "crimes_" in q["sql"]])
+        self.assertEqual(response_cache.stats()["incident-list"], {"hits": 1, "misses": 1})
+
+        resp = self.client.get("/api/incidents/", HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(resp.status_code, 304)
+
+        Incident.objects.create(title="Second")
+        resp = self.client.get("/api/incidents/")
+        self.assertEqual(self._titles(resp), ["Second", "First"])
+
+    def test_key_includes_params_and_role(self):
+        self.client.get("/api/incidents/")
+        self.client.get("/api/incidents/?page_size=1")
+        admin = User.objects.create_user(username="rc2", password="pw", role="admin")
+        self.client.force_authenticate(admin)
+        self.client.get("/api/incidents/")
+        self.assertEqual(response_cache.stats()["incident-list"]["misses"], 3)
+
+    def test_generations_are_shared_between_processes(self):
+        self.client.get("/api/incidents/")
+        # Another worker's write, through its own store over the same files.
+        location = response_cache.get_generations().location
+        other = response_cache.FileGenerations(location)
+        other.bump(response_cache._generation_key(Incident))
+        self.client.get("/api/incidents/")
+        self.assertEqual(response_cache.stats()["incident-list"]["misses"], 2)
+
+    def test_locmem_evicts_least_recently_used(self):
+        backend = response_cache.LocMemBackend(max_bytes=10)
+        backend.set("a", b"aaaa", timeout=60, size=4)
+        backend.set("b", b"bbbb", timeout=60, size=4)
+        backend.get("a")
+        backend.set("c", b"cccc", timeout=60, size=4)
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.get("a"), b"aaaa")
+        self.assertEqual(backend.size, 8)
+
+    def test_file_backend_round_trip_and_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = response_cache.FileBackend(max_bytes=200, location=tmp)
+            backend.set("a", b"a" * 50, timeout=60, size=50)
+            self.assertEqual(backend.get("a"), b"a" * 50)
+            os.utime(os.path.join(tmp, "a.cache"), (1, 1))  # make "a" the oldest
+            backend.set("b", b"b" * 120, timeout=60, size=120)
+            self.assertIsNone(backend.get("a"))
+            self.assertEqual(backend.get("b"), b"b" * 120)
+
+
+class CaseCountsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="cc", password="pw")
+        self.cases = [
+            escalate_incident(Incident.objects.create(title=f"I{i}").id, self.user.id)
+            for i in range(3)
+        ]
+
+    def _expected(self):
+        return [
+            {"status": row["status"], "c": row["c"]}
+            for row in Case.objects.values("status")
+            .annotate(c=Count("id"))
+            .order_by("status")
+        ]
+
+    def test_incremental_refresh_matches_full_count(self):
+        case_counts.full_refresh()
+        self.cases[0].status = Case.Status.INVESTIGATING
+        self.cases[0].save()
+        Case.objects.filter(pk=self.cases[1].pk).update(status=Case.Status.CLOSED)
+        new = escalate_incident(Incident.objects.create(title="N").id, self.user.id)
+        new.status = Case.Status.CLOSED
+        new.save()
+        delta = case_counts.refresh()
+        self.assertEqual(
+            delta,
+            {
+                Case.Status.OPEN: -2,
+                Case.Status.INVESTIGATING: 1,
+                Case.Status.CLOSED: 2,
+            },
+        )
+        self.assertEqual(case_counts.get_counts(), self._expected())
+        self.assertEqual(case_counts.refresh(), {})
+
+    def test_refresh_skips_an_interval_already_claimed(self):
+        case_counts.full_refresh()
+        before = case_counts.get_counts()
+        escalate_incident(Incident.objects.create(title="N").id, self.user.id)
+        # Another refresh moved the watermarks after this one read them.
+        with mock.patch.object(case_counts, "_read_state", return_value=(0, 0, 0)):
+            self.assertIsNone(case_counts.refresh())
+        self.assertEqual(case_counts.get_counts(), before)
+
+    def test_command_watch_refreshes_until_interrupted(self):
+        call_command("refresh_case_counts", "--full", stdout=io.StringIO())
+        escalate_incident(Incident.objects.create(title="N").id, self.user.id)
+        out = io.StringIO()
+        with mock.patch("time.sleep", side_effect=KeyboardInterrupt):
+            call_command("refresh_case_counts", "--watch", stdout=out)
+        self.assertIn("open +1", out.getvalue())
+        self.assertEqual(case_counts.get_counts(), self._expected())
+
+    def test_deleted_case_is_recounted_on_next_read(self):
+        case_counts.full_refresh()
+        self.cases[0].delete()
+        self.assertEqual(case_counts.get_counts(max_age=3600), self._expected())
+
+    def test_periodic_full_reconcile(self):
+        case_counts.full_refresh()
+        # A change the watermarks cannot see (as with an out-of-order commit).
+        Case.objects.filter(pk=self.cases[0].pk).update(
+            status=Case.Status.CLOSED, updated_at=timezone.now()
+        )
+        CaseStatusHistory.objects.filter(case=self.cases[0]).delete()
+        with override_settings(CASE_COUNTS_RECONCILE_INTERVAL=3600):
+            self.assertNotEqual(case_counts.get_counts(), self._expected())
+        with override_settings(CASE_COUNTS_RECONCILE_INTERVAL=0):
+            self.assertEqual(case_counts.get_counts(), self._expected())
+
+    @override_settings(DASHBOARD_REFRESH_BACKGROUND=False, CASE_COUNTS_MAX_AGE=0)
+    def test_dashboard_reads_refreshed_counts(self):
+        cache.clear()
+        client = Client()
+        client.force_login(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get("/dashboard/")
+        self.assertEqual(resp.context["case_counts"], self._expected())
+        grouped = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if 'FROM "crimes_case"' in q["sql"] and "GROUP BY" in q["sql"]
+        ]
+        self.assertTrue(all("WHERE" in sql for sql in grouped), grouped)
+
+
+class MaterializedViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="mv", password="pw", role="investigator"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        escalate_incident(Incident.objects.create(title="A").id, self.user.id)
+
+    def test_report_serves_last_refresh_until_refreshed_again(self):
+        resp = self.client.get("/api/reports/case-summary")
+        self.assertEqual(len(resp.data), 1)
+        self.assertIn("Last-Modified", resp)
+        escalate_incident(Incident.objects.create(title="B").id, self.user.id)
+        self.assertEqual(len(self.client.get("/api/reports/case-summary").data), 1)
+        matviews.CASE_SUMMARY.refresh()
+        self.assertEqual(len(self.client.get("/api/reports/case-summary").data), 2)
+
+    def test_staleness_follows_refresh_interval(self):
+        view = matviews.CASE_SUMMARY
+        self.assertIsNone(view.last_refreshed())
+        self.assertIn(view, matviews.due())
+        refreshed_at = view.refresh()
+        self.assertEqual(view.last_refreshed(), refreshed_at)
+        self.assertNotIn(view, matviews.due())
+        MaterializedViewRefresh.objects.filter(name=view.name).update(
+            refreshed_at=refreshed_at - timedelta(seconds=view.refresh_interval)
+        )
+        self.assertTrue(view.is_stale())
+
+    @override_settings(MATVIEW_REFRESH_BACKGROUND=False)
+    def test_stale_read_triggers_a_refresh(self):
+        view = matviews.CASE_SUMMARY
+        refreshed_at = view.refresh()
+        MaterializedViewRefresh.objects.filter(name=view.name).update(
+            refreshed_at=refreshed_at - timedelta(seconds=view.refresh_interval)
+        )
+        cache.clear()
+        self.client.get("/api/reports/case-summary")
+        self.assertFalse(view.is_stale())
+
+    def test_command_refreshes_due_views(self):
+        out = io.StringIO()
+        call_command("refresh_views", stdout=out)
+        self.assertIn("mv_case_summary refreshed", out.getvalue())
+        self.assertFalse(matviews.CASE_SUMMARY.is_stale())
+        with self.assertRaises(CommandError):
+            call_command("refresh_views", "mv_nope", stdout=io.StringIO())
+
+
+class ActivityRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="ts", password="pw", role="investigator"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.case = escalate_incident(
+                Incident.objects.create(title="A").id, self.user.id
+            )
+            self.case.status = Case.Status.INVESTIGATING
+            self.case.save()
+            Case.objects.filter(pk=self.case.pk).update(status=Case.Status.CLOSED)
+            Evidence.objects.create(code="E-1", case=self.case, collected_by=self.user)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def _totals(self):
+        return sorted(
+            ActivityRollup.objects.values_list(
+                "granularity", "metric", "status", "bucket", "count"
+            )
+        )
+
+    def test_rows_are_counted_as_they_arrive(self):
+        today = timezone.now().date()
+        start, end = rollups.day_range(today, today)
+        counts = {
+            (metric, row["status"]): row["count"]
+            for metric in rollups.METRICS
+            for row in rollups.series(metric, "day", start, end)
+        }
+        self.assertEqual(
+            counts,
+            {
+                ("incidents_reported", ""): 1,
+                ("cases_opened", ""): 1,
+                ("status_transitions", Case.Status.INVESTIGATING): 1,
+                ("status_transitions", Case.Status.CLOSED): 1,
+                ("evidence_collected", ""): 1,
+            },
+        )
+        hourly = rollups.series("incidents_reported", "hour", start, end)
+        self.assertEqual(sum(row["count"] for row in hourly), 1)
+
+    def test_backfill_rebuilds_the_same_rollups(self):
+        incremental = self._totals()
+        ActivityRollup.objects.all().delete()
+        call_command("backfill_rollups", stdout=io.StringIO())
+        self.assertEqual(self._totals(), incremental)
+
+    def test_endpoint_answers_long_ranges_from_rollups(self):
+        today = timezone.now().date()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.api.get(
+                "/api/reports/timeseries",
+                {
+                    "metric": "status_transitions",
+                    "interval": "month",
+                    "start": str(today.replace(year=today.year - 5)),
+                    "end": str(today),
+                    "status": "closed",
+                },
+            )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([row["count"] for row in resp.data["results"]], [1])
+        self.assertFalse(
+            [q for q in ctx.captured_queries if "crimes_casestatushistory" in q["sql"]]
+        )
+        for params in (
+            {"metric": "nope"},
+            {"metric": "cases_opened", "start": "2020-13-01"},
+            {"metric": "cases_opened", "interval": "hour", "start": "2020-01-01"},
+        ):
+            self.assertEqual(
+                self.api.get("/api/reports/timeseries", params).status_code, 400
+            )
+
+
+class LifecycleAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="sla", password="pw", role="investigator"
+        )
+        self.t0 = timezone.now() - timedelta(days=1)
+        self._case(
+            [
+                (None, "open", 0),
+                ("open", "investigating", 1),
+                ("investigating", "closed", 5),
+            ]
+        )
+        self._case([(None, "open", 0), ("open", "investigating", 3)])
+
+    def _case(self, steps):
+        case = escalate_incident(Incident.objects.create(title="C").id, self.user.id)
+        case.status_history.all().delete()
+        for old, new, hours in steps:
+            row = CaseStatusHistory.objects.create(
+                case=case, old_status=old, new_status=new, changed_by=self.user
+            )
+            CaseStatusHistory.objects.filter(pk=row.pk).update(
+                changed_at=self.t0 + timedelta(hours=hours)
+            )
+
+    def test_time_in_status_and_cycle_time(self):
+        summary = lifecycle.compute(chunk_cases=1)
+        self.assertEqual(summary["rows"], 5)
+        opened = summary["statuses"]["open"]
+        self.assertEqual((opened["stints"], opened["in_progress"]), (2, 0))
+        self.assertAlmostEqual(opened["mean_seconds"], 2 * 3600)
+        self.assertAlmostEqual(opened["p50_seconds"], 3600, delta=0.03 * 3600)
+        self.assertAlmostEqual(opened["p99_seconds"], 3 * 3600, delta=0.03 * 3 * 3600)
+        investigating = summary["statuses"]["investigating"]
+        self.assertEqual(
+            (investigating["stints"], investigating["in_progress"]), (1, 1)
+        )
+        self.assertEqual(summary["statuses"]["closed"]["in_progress"], 1)
+        self.assertEqual(
+            summary["investigators"],
+            [{"user_id": self.user.pk, "closed": 1, "mean_cycle_seconds": 5 * 3600}],
+        )
+
+    def test_since_keeps_stints_and_cycle_times_started_earlier(self):
+        summary = lifecycle.compute(since=self.t0 + timedelta(hours=2), chunk_cases=1)
+        self.assertEqual(summary["rows"], 2)
+        opened = summary["statuses"]["open"]
+        self.assertEqual((opened["stints"], opened["in_progress"]), (1, 0))
+        self.assertAlmostEqual(opened["mean_seconds"], 3 * 3600)
+        investigating = summary["statuses"]["investigating"]
+        self.assertEqual(
+            (investigating["stints"], investigating["in_progress"]), (1, 1)
+        )
+        self.assertAlmostEqual(investigating["mean_seconds"], 4 * 3600)
+        self.assertEqual(
+            summary["investigators"],
+            [{"user_id": self.user.pk, "closed": 1, "mean_cycle_seconds": 5 * 3600}],
+        )
+
+    def test_endpoint_serves_cached_summary(self):
+        api = APIClient()
+        api.force_authenticate(self.user)
+        resp = api.get("/api/reports/lifecycle")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["investigators"][0]["username"], "sla")
+        with CaptureQueriesContext(connection) as ctx:
+            api.get("/api/reports/lifecycle")
+        self.assertFalse(
+            [q for q in ctx.captured_queries if "crimes_casestatushistory" in q["sql"]]
+        )
+
+    def test_endpoint_rejects_bad_since(self):
+        api = APIClient()
+        api.force_authenticate(self.user)
+        self.assertEqual(
+            api.get("/api/reports/lifecycle", {"since": "nope"}).status_code, 400
+        )
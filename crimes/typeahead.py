@@ -0,0 +1,149 @@
+"""Typeahead lookups for people and lead-investigator candidates.
+
+People are looked up with an index range scan on the normalized name keys
+(``name_normalized`` for "first last", ``name_reversed`` for "last first").
+The range ``[prefix, prefix')`` maps directly onto the B-tree, so the cost
+depends on ``limit`` and not on the size of the registry.
+
+Lead-investigator candidates are few, so they are held in memory as a sorted
+``PrefixIndex`` per process. The index is rebuilt when the cache generation
+bumped by user saves and deletes (see ``signals.py``) moves on, and in any
+case once it is ``TYPEAHEAD_INDEX_MAX_AGE`` seconds old: with a per-process
+cache the generation only reaches the worker that made the change.
+"""
+
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Person
+from .name_matching import normalize
+
+GENERATION_KEY = "typeahead:investigators:generation"
+MAX_LIMIT = 25
+
+
+def _prefix_upper(prefix):
+    """Smallest string greater than every string starting with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _prefix_range(field, prefix, limit):
+    rows = (
+        Person.objects.filter(
+            **{f"{field}__gte": prefix, f"{field}__lt": _prefix_upper(prefix)}
+        )
+        .order_by(field, "pk")
+        .values_list(field, "pk", "first_name", "last_name", "date_of_birth")[:limit]
+    )
+    # Linguistic collations may widen the range; keep true prefixes only.
+    return [row for row in rows if row[0].startswith(prefix)]
+
+
+def people(q, limit=10):
+    """Up to ``limit`` people whose "first last" or "last first" starts with ``q``."""
+    prefix = normalize(q)
+    if not prefix:
+        return []
+    rows = sorted(
+        _prefix_range("name_normalized", prefix, limit)
+        + _prefix_range("name_reversed", prefix, limit)
+    )
+    results, seen = [], set()
+    for _, pk, first_name, last_name, date_of_birth in rows:
+        if pk in seen:
+            continue
+        seen.add(pk)
+        results.append(
+            {
+                "id": pk,
+                "first_name": first_name,
+                "last_name": last_name,
+                "date_of_birth": date_of_birth,
+            }
+        )
+    return results[:limit]
+
+
+class PrefixIndex:
+    """Sorted ``(key, id)`` pairs searched with ``bisect``."""
+
+    def __init__(self, entries, labels):
+        self.entries = sorted(entries)
+        self.keys = [key for key, _ in self.entries]
+        self.labels = labels
+
+    def search(self, prefix, limit):
+        results, seen = [], set()
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            pk = self.entries[i][1]
+            if pk not in seen:
+                seen.add(pk)
+                results.append(self.labels[pk])
+                if len(results) >= limit:
+                    break
+            i += 1
+        return results
+
+
+def build_investigator_index():
+    users = get_user_model().objects.filter(is_staff=True, is_active=True).values(
+        "pk", "username", "first_name", "last_name", "role"
+    )
+    entries, labels = [], {}
+    for u in users:
+        labels[u["pk"]] = {"id": u["pk"], "username": u["username"], "role": u["role"]}
+        keys = {
+            u["username"].lower(),
+            normalize(f"{u['first_name']} {u['last_name']}"),
+            normalize(u["last_name"]),
+        }
+        entries.extend((key, u["pk"]) for key in keys if key)
+    return PrefixIndex(entries, labels)
+
+
+_lock = threading.Lock()
+_index = None
+_index_generation = None
+_index_built_at = 0.0
+
+
+def investigators(q, limit=10):
+    """Up to ``limit`` lead-investigator candidates matching the prefix ``q``."""
+    global _index, _index_generation, _index_built_at
+    prefixes = {q.strip().lower(), normalize(q)} - {""}
+    if not prefixes:
+        return []
+    generation = cache.get(GENERATION_KEY)
+    max_age = getattr(settings, "TYPEAHEAD_INDEX_MAX_AGE", 60)
+    with _lock:
+        if (
+            _index is None
+            or _index_generation != generation
+            or time.monotonic() - _index_built_at > max_age
+        ):
+            _index = build_investigator_index()
+            _index_generation = generation
+            _index_built_at = time.monotonic()
+        index = _index
+    results, seen = [], set()
+    for prefix in sorted(prefixes):
+        for row in index.search(prefix, limit):
+            if row["id"] not in seen:
+                seen.add(row["id"])
+                results.append(row)
+    return results[:limit]
+
+
+def investigators_changed():
+    """Make every process rebuild its candidate index once this commits."""
+    transaction.on_commit(
+        lambda: cache.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+    )
@@ -1,10 +1,27 @@
-from rest_framework import viewsets, status, mixins
+import abc
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from rest_framework import generics, viewsets, status, mixins
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.contrib.auth import get_user_model
-
-from .models import Incident, Case, Person, CasePerson, Evidence
+from django.db import IntegrityError
+from django.db.models import CharField, Q
+from django.db.models.functions import Cast
+
+from .models import (
+    Incident,
+    Case,
+    Person,
+    CasePerson,
+    Evidence,
+    CaseStatusHistory,
+    AuditTrail,
+)
 from .serializers import (
     IncidentSerializer,
     CaseSerializer,
@@ -15,28 +32,48 @@ from .serializers import (
     CaseAddEvidenceSerializer,
     EscalateIncidentSerializer,
     PersonCreateSerializer,
+    PersonMatchSerializer,
+    AuditTrailSerializer,
+)
+from .conditional import ConditionalGetMixin
+from .response_cache import CachedListMixin
+from .permissions import AuditTrailPermission, RolePermission
+from .pagination import AuditKeysetPagination, PersonKeysetPagination
+from . import (
+    authz,
+    dashboard,
+    matviews,
+    name_matching,
+    lifecycle,
+    rollups,
+    search,
+    typeahead,
 )
-from .permissions import RolePermission
 from .services import (
     escalate_incident,
     log_action,
     close_case,
     change_case_status,
+    add_evidence_bulk,
     ALLOWED_CASE_STATUS_TRANSITIONS,
+    MAX_BULK_EVIDENCE,
 )
 
 User = get_user_model()
 
 
 class IncidentViewSet(
+    CachedListMixin,
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = Incident.objects.all().order_by("-created_at")
+    queryset = Incident.objects.select_related("reported_by").order_by("-created_at")
     serializer_class = IncidentSerializer
     permission_classes = [RolePermission]
+    cache_models = (Incident,)
 
     def perform_create(self, serializer):
         serializer.save(reported_by=self.request.user)
@@ -56,11 +93,15 @@ class IncidentViewSet(
         q = request.query_params.get("q")
         qs = self.get_queryset()
         if q:
-            qs = qs.filter(title__icontains=q)
-        return Response(IncidentSerializer(qs, many=True).data)
+            ids = search.matching_ids(q, "incident")
+            qs = qs.filter(pk__in=ids) if ids is not None else qs.none()
+        page = self.paginate_queryset(qs)
+        return self.get_paginated_response(IncidentSerializer(page, many=True).data)
 
 
 class CaseViewSet(
+    CachedListMixin,
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,  # enable PUT/PATCH for inline edits
@@ -73,6 +114,7 @@ class CaseViewSet(
     )
     serializer_class = CaseSerializer
     permission_classes = [RolePermission]
+    cache_models = (Case,)
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -106,6 +148,51 @@ class CaseViewSet(
         )
         return Response(EvidenceSerializer(evidence).data, status=201)
 
+    @action(detail=True, methods=["post"], url_path="evidence/bulk")
+    def add_evidence_bulk(self, request, pk=None):
+        case = self.get_object()
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get("items")
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Expected a list of evidence items"}, status=400)
+        if len(items) > MAX_BULK_EVIDENCE:
+            return Response(
+                {"detail": f"At most {MAX_BULK_EVIDENCE} items per request"},
+                status=400,
+            )
+        valid, errors = [], []
+        for index, item in enumerate(items):
+            ser = CaseAddEvidenceSerializer(data=item)
+            if ser.is_valid():
+                valid.append((index, ser.validated_data))
+            else:
+                errors.append({"index": index, "errors": ser.errors})
+        created = []
+        if valid:
+            try:
+                created, conflicts = add_evidence_bulk(case, valid, request.user)
+            except IntegrityError:
+                return Response(
+                    {"detail": "Evidence codes changed concurrently; retry the upload"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            errors.extend(conflicts)
+        errors.sort(key=lambda e: e["index"])
+        if not created:
+            code = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_201_CREATED
+        return Response(
+            {
+                "created": EvidenceSerializer(created, many=True).data,
+                "errors": errors,
+            },
+            status=code,
+        )
+
     @action(detail=True, methods=["get"], url_path="history")
     def history(self, request, pk=None):
         case = self.get_object()
@@ -140,6 +227,8 @@ class CaseViewSet(
 
 
 class PersonViewSet(
+    CachedListMixin,
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -148,36 +237,322 @@ class PersonViewSet(
     queryset = Person.objects.all().order_by("last_name", "first_name")
     serializer_class = PersonSerializer
     permission_classes = [RolePermission]
+    pagination_class = PersonKeysetPagination
+    cache_models = (Person,)
 
     def get_serializer_class(self):
         if self.action == "create":
             return PersonCreateSerializer
         return super().get_serializer_class()
 
-    def get_queryset(self):
-        qs = super().get_queryset()
-        q = self.request.query_params.get("search")
-        if q:
-            qs = qs.filter(first_name__icontains=q) | qs.filter(last_name__icontains=q)
-        return qs
+    max_match_limit = 100
+
+    def list(self, request, *args, **kwargs):
+        q = request.query_params.get("search")
+        if not q:
+            return super().list(request, *args, **kwargs)
+        # Fuzzy matches are ranked, so they come back as one bounded page.
+        try:
+            dob = parse_date(request.query_params.get("date_of_birth") or "")
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            return Response({"detail": "Invalid date_of_birth or limit"}, status=400)
+        limit = max(1, min(limit, self.max_match_limit))
+        matches = name_matching.find_people(q, date_of_birth=dob, limit=limit)
+        return Response(
+            {
+                "next": None,
+                "previous": None,
+                "results": PersonMatchSerializer(matches, many=True).data,
+            }
+        )
 
 
-from django.db import connection
 from rest_framework.views import APIView
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from django.utils.http import http_date
+from .reports import (
+    CASE_SUMMARY_COLUMNS,
+    CASE_SUMMARY_SOURCE,
+    iter_case_summary,
+    stream_case_summary,
+)
+
+
+class _ExportRenderer(BaseRenderer):
+    """Marker renderer so DRF negotiates ?format=csv|ndjson (and Accept headers).
+
+    The view short-circuits with a StreamingHttpResponse, so render() is unused.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b""
+
+
+class CSVExportRenderer(_ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONExportRenderer(_ExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
 
 
 class CaseSummaryReportView(APIView):
     permission_classes = [RolePermission]
+    renderer_classes = [
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        CSVExportRenderer,
+        NDJSONExportRenderer,
+    ]
+
+    def get(self, request):
+        # Last-Modified tells callers when the materialized rows were computed.
+        refreshed_at = matviews.ensure_populated(CASE_SUMMARY_SOURCE)
+        fmt = request.accepted_renderer.format
+        if fmt in ("csv", "ndjson"):
+            response = stream_case_summary(fmt)
+        else:
+            cols = CASE_SUMMARY_COLUMNS
+            rows = [dict(zip(cols, r)) for r in iter_case_summary(cols)]
+            response = Response(rows)
+        response["Last-Modified"] = http_date(refreshed_at.timestamp())
+        return response
+
+
+class TimeSeriesReportView(APIView):
+    """Activity counts per bucket, answered from ``ActivityRollup``.
+
+    ``?metric=`` one of ``rollups.METRICS``, ``interval=hour|day|week|month|
+    year`` (default day), ``start``/``end`` dates, both inclusive (default:
+    the last 30 days), and ``status`` to filter ``status_transitions``.
+    """
+
+    permission_classes = [RolePermission]
+    max_days = {"hour": 93}
+    max_years = 50
+
+    def get(self, request):
+        params = request.query_params
+        metric = params.get("metric")
+        interval = params.get("interval", "day")
+        if metric not in rollups.METRICS or interval not in rollups.INTERVALS:
+            return Response(
+                {
+                    "detail": "metric must be one of "
+                    f"{', '.join(rollups.METRICS)}; interval one of "
+                    f"{', '.join(rollups.INTERVALS)}"
+                },
+                status=400,
+            )
+        today = timezone.now().date()
+        try:
+            last = parse_date(params["end"]) if "end" in params else today
+            first = (
+                parse_date(params["start"])
+                if "start" in params
+                else last - timedelta(days=29)
+            )
+        except ValueError:
+            first = last = None
+        if first is None or last is None:
+            return Response({"detail": "start and end must be YYYY-MM-DD"}, status=400)
+        days = (last - first).days + 1
+        max_days = self.max_days.get(interval, self.max_years * 366)
+        if not 0 < days <= max_days:
+            return Response(
+                {"detail": f"range must cover 1 to {max_days} days for {interval}"},
+                status=400,
+            )
+        start, end = rollups.day_range(first, last)
+        points = rollups.series(
+            metric, interval, start, end, status=params.get("status") or None
+        )
+        return Response(
+            {
+                "metric": metric,
+                "interval": interval,
+                "start": first,
+                "end": last,
+                "results": points,
+            }
+        )
+
+
+class LifecycleReportView(APIView):
+    """Time spent in each case status and closes per investigator.
+
+    ``?since=YYYY-MM-DD`` limits the history rows considered. Results are
+    cached for ``LIFECYCLE_CACHE_TTL`` seconds (see ``lifecycle.py``).
+    """
+
+    permission_classes = [RolePermission]
+
+    def get(self, request):
+        since = None
+        if "since" in request.query_params:
+            try:
+                since = parse_date(request.query_params["since"])
+            except ValueError:
+                since = None
+            if since is None:
+                return Response({"detail": "since must be YYYY-MM-DD"}, status=400)
+        summary = lifecycle.summarize(since)
+        names = dict(
+            User.objects.filter(
+                pk__in=[row["user_id"] for row in summary["investigators"]]
+            ).values_list("pk", "username")
+        )
+        investigators = [
+            {**row, "username": names.get(row["user_id"])}
+            for row in summary["investigators"]
+        ]
+        return Response({**summary, "since": since, "investigators": investigators})
+
+
+def _parse_moment(value, end=False):
+    """An ISO datetime, or a date's start (with ``end``, the next day's start)."""
+    try:
+        moment = parse_datetime(value)
+        day = None if moment else parse_date(value)
+    except ValueError:
+        return None
+    if day is not None:
+        moment = datetime.combine(day + timedelta(days=1 if end else 0), dt_time.min)
+    if moment is not None and timezone.is_naive(moment):
+        moment = moment.replace(tzinfo=dt_timezone.utc)
+    return moment
+
+
+class AuditTrailView(generics.ListAPIView):
+    """Audit log entries, newest first, in keyset pages.
+
+    Filters: ``entity_type`` (and ``entity_id``), ``case`` id (the case, its
+    incident and its evidence), ``user`` id, ``action``, and ``start``/``end``
+    as ISO dates or datetimes (a date ``end`` includes that day). Entity and
+    user queries are served by the ``(entity_type, entity_id, timestamp)`` and
+    ``(user, timestamp)`` indexes; every page, however deep, is one index
+    range scan and nothing is counted. Archived months are not included
+    (``manage.py audit_log search`` reads them). Investigators and compliance
+    (``admin``) only.
+    """
+
+    permission_classes = [AuditTrailPermission]
+    serializer_class = AuditTrailSerializer
+    pagination_class = AuditKeysetPagination
+
+    def get_queryset(self):
+        params = self.request.query_params
+        if params.get("entity_id") and not params.get("entity_type"):
+            raise ParseError("entity_id needs entity_type")
+        rows = AuditTrail.objects.select_related("user")
+        if params.get("case"):
+            try:
+                case_id = int(params["case"])
+            except ValueError:
+                raise ParseError("case must be a case id")
+            case = get_object_or_404(Case.objects.only("incident_id"), pk=case_id)
+            evidence = (
+                Evidence.objects.filter(case=case)
+                .annotate(key=Cast("pk", CharField()))
+                .values("key")
+            )
+            related = Q(entity_type="Case", entity_id=str(case.pk)) | Q(
+                entity_type="Evidence", entity_id__in=evidence
+            )
+            if case.incident_id is not None:
+                related |= Q(entity_type="Incident", entity_id=str(case.incident_id))
+            rows = rows.filter(related)
+        for name in ("entity_type", "entity_id", "action"):
+            if params.get(name):
+                rows = rows.filter(**{name: params[name]})
+        if params.get("user"):
+            try:
+                rows = rows.filter(user_id=int(params["user"]))
+            except ValueError:
+                raise ParseError("user must be a user id")
+        for name, lookup in (("start", "gte"), ("end", "lt")):
+            if params.get(name):
+                moment = _parse_moment(params[name], end=name == "end")
+                if moment is None:
+                    raise ParseError(f"{name} must be an ISO date or datetime")
+                rows = rows.filter(**{f"timestamp__{lookup}": moment})
+        return rows
+
+
+class SearchView(APIView):
+    """Ranked full-text search over incidents, cases and evidence.
+
+    ``?q=`` text, optional ``type=incident,case,evidence``, ``limit`` and
+    ``offset``. Paging looks one row ahead instead of counting matches.
+    """
+
+    permission_classes = [RolePermission]
+    max_limit = 100
+    max_offset = 1000
 
     def get(self, request):
-        with connection.cursor() as cur:
-            cur.execute(
-                "SELECT case_id, case_number, status, evidence_count, people_count FROM view_case_summary"
+        q = request.query_params.get("q", "").strip()
+        types = [
+            t
+            for t in request.query_params.get("type", "").split(",")
+            if t in search.ENTITY_CODES
+        ]
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), self.max_limit)
+            offset = int(request.query_params.get("offset", 0))
+        except ValueError:
+            return Response({"detail": "limit and offset must be integers"}, status=400)
+        if limit < 1 or not 0 <= offset <= self.max_offset:
+            return Response({"detail": "limit or offset out of range"}, status=400)
+        rows = search.search(q, types=types, limit=limit, offset=offset) if q else []
+        next_url = None
+        if len(rows) > limit and offset + limit <= self.max_offset:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "offset", offset + limit
             )
-            desc = cur.description or []
-            cols = [c[0] for c in desc]
-            rows = [dict(zip(cols, r)) for r in cur.fetchall()]
-        return Response(rows)
+        return Response({"next": next_url, "results": rows[:limit]})
+
+
+class _TypeaheadView(APIView, metaclass=abc.ABCMeta):
+    permission_classes = [RolePermission]
+
+    @abc.abstractmethod
+    def lookup(self, q, limit):
+        """Up to ``limit`` suggestions for the prefix ``q``."""
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=400)
+        limit = max(1, min(limit, typeahead.MAX_LIMIT))
+        q = request.query_params.get("q", "")
+        return Response({"results": self.lookup(q, limit)})
+
+
+class PersonTypeaheadView(_TypeaheadView):
+    """People whose "first last" or "last first" name starts with ``?q=``."""
+
+    def lookup(self, q, limit):
+        return typeahead.people(q, limit)
+
+
+class InvestigatorTypeaheadView(_TypeaheadView):
+    """Lead-investigator candidates for ``?q=``; viewers cannot escalate."""
+
+    def get(self, request):
+        if request.user.role == "viewer":
+            return Response({"detail": "Not allowed"}, status=403)
+        return super().get(request)
+
+    def lookup(self, q, limit):
+        return typeahead.investigators(q, limit)
 
 
 # ---------- HTML Views (minimal) ----------
@@ -189,6 +564,7 @@ from django import forms
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.db.models import Prefetch
 
 
 class IncidentForm(forms.ModelForm):
@@ -209,14 +585,6 @@ class IncidentDetailView(LoginRequiredMixin, DetailView):
     template_name = "incident_detail.html"
     context_object_name = "incident"
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        # Provide candidate lead investigators (staff users) for dropdown
-        ctx["lead_investigator_candidates"] = User.objects.filter(
-            is_staff=True
-        ).order_by("username")[:200]
-        return ctx
-
 
 @login_required
 def incident_escalate_view(request, pk: int):
@@ -247,17 +615,13 @@ def incident_escalate_view(request, pk: int):
 def case_add_person_view(request, pk: int):
     """HTML endpoint to add a person to a case.
     Expects POST with person_id and role.
-    Only investigators and admins (or lead investigator of the case) can add.
+    Only admins and investigators who lead or are assigned to the case can add.
     """
     case = get_object_or_404(Case, pk=pk)
     if request.method != "POST":
         return redirect("case-detail", pk=pk)
     user = request.user
-    allowed = (
-        user.role in ("admin", "investigator")
-        or getattr(case, "lead_investigator_id", None) == user.id
-    )
-    if not allowed:
+    if not authz.for_request(request).can_modify_case(case):
         return redirect("case-detail", pk=pk)
     person_id = request.POST.get("person_id")
     role = request.POST.get("role")
@@ -299,11 +663,7 @@ def case_add_evidence_view(request, pk: int):
     if request.method != "POST":
         return redirect("case-detail", pk=pk)
     user = request.user
-    allowed = (
-        user.role in ("admin", "investigator")
-        or getattr(case, "lead_investigator_id", None) == user.id
-    )
-    if not allowed:
+    if not authz.for_request(request).can_modify_case(case):
         return redirect("case-detail", pk=pk)
     code = request.POST.get("code")
     description = request.POST.get("description", "")
@@ -325,11 +685,7 @@ def case_close_view(request, pk: int):
     if request.method != "POST":
         return redirect("case-detail", pk=pk)
     user = request.user
-    allowed = (
-        user.role in ("admin", "investigator")
-        or getattr(case, "lead_investigator_id", None) == user.id
-    )
-    if not allowed:
+    if not authz.for_request(request).can_modify_case(case):
         return redirect("case-detail", pk=pk)
     reason = request.POST.get("reason", "")
     case_pk = case.pk
@@ -368,11 +724,18 @@ class CaseDetailView(LoginRequiredMixin, DetailView):
     model = Case
     template_name = "case_detail.html"
     context_object_name = "case"
-
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        ctx["all_people"] = Person.objects.order_by("last_name", "first_name")[:500]
-        return ctx
+    # One query for the case and its to-one relations, one per related list;
+    # the tab counts come from case_summary. People are looked up on demand.
+    queryset = Case.objects.select_related(
+        "incident", "lead_investigator", "summary"
+    ).prefetch_related(
+        Prefetch(
+            "case_people",
+            queryset=CasePerson.objects.select_related("person").order_by("pk"),
+        ),
+        Prefetch("evidence_items", queryset=Evidence.objects.order_by("pk")),
+        Prefetch("status_history", queryset=CaseStatusHistory.objects.order_by("pk")),
+    )
 
 
 class PersonListView(LoginRequiredMixin, ListView):
@@ -381,11 +744,10 @@ class PersonListView(LoginRequiredMixin, ListView):
     context_object_name = "people"
 
     def get_queryset(self):
-        qs = Person.objects.order_by("last_name", "first_name")
         q = self.request.GET.get("q")
         if q:
-            qs = qs.filter(last_name__icontains=q) | qs.filter(first_name__icontains=q)
-        return qs
+            return name_matching.find_people(q, limit=100)
+        return Person.objects.order_by("last_name", "first_name")
 
 
 class PersonDetailView(LoginRequiredMixin, DetailView):
@@ -402,61 +764,50 @@ class PersonCreateView(LoginRequiredMixin, CreateView):
 
 
 from django.views import View
-from django.utils import timezone
-from django.db.models import Count
 from django.shortcuts import render
-from django.db import connection
 
 
 class DashboardView(LoginRequiredMixin, View):
     template_name = "dashboard.html"
 
     def get(self, request):
-        case_counts = Case.objects.values("status").annotate(c=Count("id"))
-        incident_counts = Incident.objects.values("status").annotate(c=Count("id"))
-        recent_cases = Case.objects.order_by("-created_at")[:5]
-        recent_incidents = Incident.objects.order_by("-created_at")[:5]
-        evidence_total = Evidence.objects.count()
-        people_total = Person.objects.count()
-        from django.db.models import Avg
-
-        avg_evidence = (
-            Evidence.objects.values("case")
-            .annotate(c=Count("id"))
-            .aggregate(avg=Avg("c"))["avg"]
-            or 0
-        )
-        recent_people = Person.objects.order_by("-created_at")[:5]
-        return render(
-            request,
-            self.template_name,
-            {
-                "case_counts": case_counts,
-                "incident_counts": incident_counts,
-                "recent_cases": recent_cases,
-                "recent_incidents": recent_incidents,
-                "evidence_total": evidence_total,
-                "people_total": people_total,
-                "avg_evidence": avg_evidence,
-                "recent_people": recent_people,
-                "now": timezone.now(),
-            },
-        )
+        return render(request, self.template_name, dashboard.get_snapshot())
 
 
 class CaseSummaryReportPage(LoginRequiredMixin, View):
     template_name = "reports_case_summary.html"
 
+    columns = ("case_number", "status", "evidence_count", "people_count")
+
     def get(self, request):
-        with connection.cursor() as cur:
-            cur.execute(
-                "SELECT case_number, status, evidence_count, people_count FROM view_case_summary ORDER BY case_number"
-            )
-            desc = cur.description or []
-            cols = [c[0] for c in desc]
-            rows = [dict(zip(cols, r)) for r in cur.fetchall()]
-        return render(request, self.template_name, {"rows": rows})
+        refreshed_at = matviews.ensure_populated(CASE_SUMMARY_SOURCE)
+        fmt = request.GET.get("format")
+        if fmt in ("csv", "ndjson"):
+            return stream_case_summary(fmt, self.columns, order_by="case_number")
+        rows = (
+            dict(zip(self.columns, r))
+            for r in iter_case_summary(self.columns, order_by="case_number")
+        )
+        return render(
+            request, self.template_name, {"rows": rows, "refreshed_at": refreshed_at}
+        )
 
 
 class HomeView(TemplateView):
     template_name = "home.html"
+
+
+from django.http import HttpResponse
+from . import metrics
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint (merged across workers when METRICS_DIR is set).
+
+    Only staff users and clients listed in ``METRICS_ALLOWED_IPS`` may scrape.
+    """
+    if not metrics.scrape_allowed(request):
+        return HttpResponse(status=403)
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "crimes.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -173,3 +174,98 @@ AUTH_USER_MODEL = "users.User"
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "/dashboard/"
 LOGOUT_REDIRECT_URL = "/login/"
+
+REST_FRAMEWORK = {
+    # Keyset pagination on (created_at, id): constant cost per page, no COUNT(*).
+    "DEFAULT_PAGINATION_CLASS": "crimes.pagination.CreatedAtKeysetPagination",
+    "PAGE_SIZE": 50,
+}
+
+# Audit log writes are buffered per transaction and bulk-inserted just before
+# an audit.atomic() block commits. Background mode only affects transactions
+# opened with plain transaction.atomic, whose batches are written after commit
+# by an in-process writer thread (queue size counts batches); see crimes/audit.py.
+# A batch still failing after AUDIT_LOG_WRITE_ATTEMPTS tries is logged and
+# appended to a JSON-lines file in AUDIT_LOG_SPOOL_DIR. When the queue stays
+# full for AUDIT_LOG_QUEUE_TIMEOUT seconds the request writes the batch itself.
+AUDIT_LOG_BACKGROUND = os.getenv("AUDIT_LOG_BACKGROUND", "false").lower() == "true"
+AUDIT_LOG_QUEUE_SIZE = int(os.getenv("AUDIT_LOG_QUEUE_SIZE", "10000"))
+AUDIT_LOG_QUEUE_TIMEOUT = float(os.getenv("AUDIT_LOG_QUEUE_TIMEOUT", "0.05"))
+AUDIT_LOG_WRITE_ATTEMPTS = int(os.getenv("AUDIT_LOG_WRITE_ATTEMPTS", "10"))
+AUDIT_LOG_SPOOL_DIR = os.getenv("AUDIT_LOG_SPOOL_DIR") or str(BASE_DIR / "audit_spool")
+
+# Per-route request metrics exposed at /metrics. Set METRICS_DIR to a
+# directory shared by all gunicorn workers so /metrics reports their sum.
+# Snapshots of exited workers are dropped METRICS_SNAPSHOT_MAX_AGE seconds
+# after their last write. Besides staff users, only the comma-separated
+# addresses or networks in METRICS_ALLOWED_IPS may scrape /metrics.
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+METRICS_SNAPSHOT_MAX_AGE = float(os.getenv("METRICS_SNAPSHOT_MAX_AGE", "300"))
+METRICS_ALLOWED_IPS = [
+    net.strip()
+    for net in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if net.strip()
+]
+
+# A shared cache lets every worker serve the same dashboard snapshot.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+
+# Dashboard aggregates are cached and served stale while one request
+# recomputes them (see crimes/dashboard.py).
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+DASHBOARD_REFRESH_BACKGROUND = (
+    os.getenv("DASHBOARD_REFRESH_BACKGROUND", "true").lower() == "true"
+)
+
+# Oldest mv_case_counts refresh the dashboard accepts before catching it up
+# itself; `refresh_case_counts --watch` normally keeps it fresher than this.
+CASE_COUNTS_MAX_AGE = int(os.getenv("CASE_COUNTS_MAX_AGE", "120"))
+# ...and how often a read recounts mv_case_counts in full, which picks up
+# rows committed out of id order (deletes trigger a recount on their own).
+CASE_COUNTS_RECONCILE_INTERVAL = int(
+    os.getenv("CASE_COUNTS_RECONCILE_INTERVAL", "600")
+)
+
+# A stale materialized view is served as is while one background thread
+# refreshes it (see crimes/matviews.py).
+MATVIEW_REFRESH_BACKGROUND = (
+    os.getenv("MATVIEW_REFRESH_BACKGROUND", "true").lower() == "true"
+)
+
+# Case lifecycle analytics (crimes/lifecycle.py) are recomputed at most this
+# often.
+LIFECYCLE_CACHE_TTL = int(os.getenv("LIFECYCLE_CACHE_TTL", "600"))
+
+# Case ids a user leads or is assigned to are cached for object permission
+# checks; assignment changes drop the entry (see crimes/authz.py).
+AUTHZ_CACHE_TTL = int(os.getenv("AUTHZ_CACHE_TTL", "60"))
+
+# Each worker's in-memory lead-investigator typeahead index is rebuilt on user
+# changes it hears about (see crimes/typeahead.py) and at least this often.
+TYPEAHEAD_INDEX_MAX_AGE = int(os.getenv("TYPEAHEAD_INDEX_MAX_AGE", "60"))
+
+# AuditLog is stored in monthly partitions; `audit_log maintain` archives
+# months older than the retention window to compressed files in
+# AUDIT_ARCHIVE_DIR (see crimes/audit_store.py).
+AUDIT_LOG_RETENTION_MONTHS = int(os.getenv("AUDIT_LOG_RETENTION_MONTHS", "12"))
+AUDIT_LOG_PARTITIONS_AHEAD = int(os.getenv("AUDIT_LOG_PARTITIONS_AHEAD", "2"))
+AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR") or str(BASE_DIR / "audit_archive")
+
+# Rendered API list responses, keyed by per-model write generations
+# (see crimes/response_cache.py). Set RESPONSE_CACHE_BACKEND=file to share
+# entries between the workers on a host, or to an empty value to disable.
+# Generations live in the default cache when REDIS_URL makes it shared, and
+# otherwise in files under RESPONSE_CACHE_DIR (or a temp dir) on the host.
+RESPONSE_CACHE = {
+    "BACKEND": os.getenv("RESPONSE_CACHE_BACKEND", "locmem") or None,
+    "LOCATION": os.getenv("RESPONSE_CACHE_DIR") or None,
+    "MAX_BYTES": int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    "TIMEOUT": int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300")),
+}
@@ -23,6 +23,12 @@ from crimes.views import (
     IncidentViewSet,
     CaseViewSet,
     CaseSummaryReportView,
+    TimeSeriesReportView,
+    LifecycleReportView,
+    AuditTrailView,
+    SearchView,
+    PersonTypeaheadView,
+    InvestigatorTypeaheadView,
     IncidentListView,
     IncidentDetailView,
     IncidentCreateView,
@@ -39,6 +45,7 @@ from crimes.views import (
     PersonViewSet,
     PersonCreateView,
     HomeView,
+    metrics_view,
 )
 from django.contrib.auth import views as auth_views
 from users.views import logout_view
@@ -50,6 +57,7 @@ router.register(r"people", PersonViewSet, basename="person")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("", HomeView.as_view(), name="home"),
     path(
         "login/",
@@ -58,12 +66,39 @@ urlpatterns = [
     ),
     path("logout/", logout_view, name="logout"),
     path("accounts/login/", RedirectView.as_view(url="/login/", permanent=False)),
+    path(
+        "api/cases/<int:pk>/evidence/bulk",
+        CaseViewSet.as_view({"post": "add_evidence_bulk"}, detail=True),
+        name="case-evidence-bulk",
+    ),
     path("api/", include(router.urls)),
     path(
         "api/reports/case-summary",
         CaseSummaryReportView.as_view(),
         name="case-summary-report",
     ),
+    path(
+        "api/reports/timeseries",
+        TimeSeriesReportView.as_view(),
+        name="timeseries-report",
+    ),
+    path(
+        "api/reports/lifecycle",
+        LifecycleReportView.as_view(),
+        name="lifecycle-report",
+    ),
+    path("api/audit", AuditTrailView.as_view(), name="audit-trail"),
+    path("api/search", SearchView.as_view(), name="search"),
+    path(
+        "api/typeahead/people",
+        PersonTypeaheadView.as_view(),
+        name="typeahead-people",
+    ),
+    path(
+        "api/typeahead/investigators",
+        InvestigatorTypeaheadView.as_view(),
+        name="typeahead-investigators",
+    ),
     path("incidents/", IncidentListView.as_view(), name="incidents-list"),
     path("incidents/new/", IncidentCreateView.as_view(), name="incident-create"),
     path("incidents/<int:pk>/", IncidentDetailView.as_view(), name="incident-detail"),